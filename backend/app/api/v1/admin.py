@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.core.database import get_db
@@ -6,7 +6,10 @@ from app.core.security import get_current_admin_user
 from app.models.user import User
 from app.models.report import Report
 from app.schemas.report import ReportResponse
+from app.services.report_service import LISTING_ORDER, ReportService
+from app.services.report_stats import ReportStatsService
 from pydantic import BaseModel
+from app.utils.helpers import image_url_for_format, negotiate_image_format
 
 router = APIRouter()
 
@@ -18,6 +21,8 @@ class ReportWithUser(BaseModel):
     longitude: float
     description: Optional[str]
     image_url: str
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     address: Optional[str]
     waste_type: Optional[str]
     confidence_score: Optional[float]
@@ -49,12 +54,55 @@ class UpdateReportStatusRequest(BaseModel):
         }
 
 
+# Columnas del listado de administración (las de ReportWithUser y las necesarias para las imágenes)
+ADMIN_REPORT_COLUMNS = (
+    Report.id, Report.latitude, Report.longitude, Report.description, Report.image_url,
+    Report.thumbnail_url, Report.preview_url, Report.image_formats, Report.address,
+    Report.waste_type, Report.confidence_score, Report.manual_classification,
+    Report.status, Report.priority, Report.created_at, Report.updated_at, Report.resolved_at,
+    User.id.label("author_id"), User.username, User.email,
+)
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _report_with_user(row, accept: Optional[str]) -> ReportWithUser:
+    """Convierte una fila de ADMIN_REPORT_COLUMNS en ReportWithUser."""
+    image_format = negotiate_image_format(accept, row.image_formats)
+    return ReportWithUser(
+        id=row.id,
+        latitude=row.latitude,
+        longitude=row.longitude,
+        description=row.description,
+        image_url=row.image_url,
+        thumbnail_url=image_url_for_format(row.thumbnail_url, image_format),
+        preview_url=image_url_for_format(row.preview_url, image_format),
+        address=row.address,
+        waste_type=row.waste_type,
+        confidence_score=row.confidence_score,
+        manual_classification=row.manual_classification,
+        status=row.status,
+        priority=row.priority,
+        created_at=_isoformat(row.created_at),
+        updated_at=_isoformat(row.updated_at),
+        resolved_at=_isoformat(row.resolved_at),
+        user_id=row.author_id,
+        username=row.username if row.author_id is not None else "Anónimo",
+        user_email=row.email,
+    )
+
+
 @router.get("/reports", response_model=List[ReportWithUser])
 async def get_all_reports(
+    request: Request,
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by status: pending, in_progress, resolved"),
     priority: Optional[int] = Query(None, description="Filter by priority: 1 (low), 2 (medium), 3 (high)"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin_user)
 ):
@@ -66,8 +114,12 @@ async def get_all_reports(
     - priority: 1 (low), 2 (medium), 3 (high)
 
     Retorna información completa del reporte y del usuario que lo creó.
+    Si hay más resultados, el header X-Next-Cursor trae el cursor de la
+    página siguiente (paginación keyset; `skip` se mantiene por compatibilidad).
     """
-    query = db.query(Report).outerjoin(User, Report.user_id == User.id)
+    # Una sola consulta proyectada (reporte + autor): sin cargar objetos ORM ni
+    # consultar el usuario de cada fila por separado
+    query = db.query(*ADMIN_REPORT_COLUMNS).outerjoin(User, Report.user_id == User.id)
 
     # Aplicar filtros
     if status:
@@ -76,38 +128,19 @@ async def get_all_reports(
         query = query.filter(Report.priority == priority)
 
     # Ordenar por prioridad (alta primero) y fecha (más recientes primero)
-    query = query.order_by(Report.priority.desc(), Report.created_at.desc())
-
-    # Paginación
-    reports = query.offset(skip).limit(limit).all()
-
-    # Construir respuesta con información del usuario
-    result = []
-    for report in reports:
-        user = db.query(User).filter(User.id == report.user_id).first() if report.user_id else None
-
-        report_data = {
-            "id": report.id,
-            "latitude": report.latitude,
-            "longitude": report.longitude,
-            "description": report.description,
-            "image_url": report.image_url,
-            "address": report.address,
-            "waste_type": report.waste_type,
-            "confidence_score": report.confidence_score,
-            "manual_classification": report.manual_classification,
-            "status": report.status,
-            "priority": report.priority,
-            "created_at": report.created_at.isoformat() if report.created_at else None,
-            "updated_at": report.updated_at.isoformat() if report.updated_at else None,
-            "resolved_at": report.resolved_at.isoformat() if report.resolved_at else None,
-            "user_id": user.id if user else None,
-            "username": user.username if user else "Anónimo",
-            "user_email": user.email if user else None,
-        }
-        result.append(ReportWithUser(**report_data))
+    if cursor or skip == 0:
+        try:
+            rows, next_cursor = ReportService.keyset_page(query, LISTING_ORDER, limit, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+    else:
+        query = query.order_by(*(col.desc() for col in LISTING_ORDER))
+        rows = query.offset(skip).limit(limit).all()
 
-    return result
+    accept = request.headers.get("accept")
+    return [_report_with_user(row, accept) for row in rows]
 
 
 @router.patch("/reports/{report_id}/status", response_model=ReportResponse)
@@ -165,32 +198,31 @@ async def get_admin_stats(
     - Total de reportes
     - Reportes por estado
     - Reportes por prioridad
+    - Reportes activos por tipo de residuo
     - Total de usuarios
     """
-    total_reports = db.query(Report).count()
+    # Todos los desgloses salen de una sola lectura de report_counters (en caché)
+    stats = ReportStatsService.get(db)
     total_users = db.query(User).count()
 
-    # Reportes por estado
-    pending = db.query(Report).filter(Report.status == "pending").count()
-    in_progress = db.query(Report).filter(Report.status == "in_progress").count()
-    resolved = db.query(Report).filter(Report.status == "resolved").count()
-
-    # Reportes por prioridad
-    high_priority = db.query(Report).filter(Report.priority == 3, Report.status != "resolved").count()
-    medium_priority = db.query(Report).filter(Report.priority == 2, Report.status != "resolved").count()
-    low_priority = db.query(Report).filter(Report.priority == 1, Report.status != "resolved").count()
+    by_status = stats.by_status()
+    active_by_priority = stats.by_priority(exclude_statuses=("resolved",))
 
     return {
-        "total_reports": total_reports,
+        "total_reports": stats.total(),
         "total_users": total_users,
         "reports_by_status": {
-            "pending": pending,
-            "in_progress": in_progress,
-            "resolved": resolved
+            "pending": by_status.get("pending", 0),
+            "in_progress": by_status.get("in_progress", 0),
+            "resolved": by_status.get("resolved", 0)
         },
         "active_reports_by_priority": {
-            "high": high_priority,
-            "medium": medium_priority,
-            "low": low_priority
+            "high": active_by_priority.get(3, 0),
+            "medium": active_by_priority.get(2, 0),
+            "low": active_by_priority.get(1, 0)
+        },
+        "active_reports_by_waste_type": {
+            waste_type or "unclassified": count
+            for waste_type, count in stats.by_waste_type(exclude_statuses=("resolved",)).items()
         }
     }
@@ -139,12 +139,13 @@ async def create_waste_classification(
 @router.get("/priority-stats")
 async def get_priority_statistics(db: Session = Depends(get_db)):
     """Obtener estadísticas de prioridad de reportes"""
-    from app.models.report import Report
+    from app.services.report_stats import ReportStatsService
 
-    # Contar reportes por prioridad
-    high_priority = db.query(Report).filter(Report.priority == 3, Report.status == "pending").count()
-    medium_priority = db.query(Report).filter(Report.priority == 2, Report.status == "pending").count()
-    low_priority = db.query(Report).filter(Report.priority == 1, Report.status == "pending").count()
+    # Contar reportes pendientes por prioridad (lectura compartida de report_counters, en caché)
+    pending = ReportStatsService.get(db).by_priority(statuses=("pending",))
+    high_priority = pending.get(3, 0)
+    medium_priority = pending.get(2, 0)
+    low_priority = pending.get(1, 0)
 
     total_pending = high_priority + medium_priority + low_priority
 
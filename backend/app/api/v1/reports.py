@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body, Header, Response, BackgroundTasks, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 from pydantic import ValidationError
 import json
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import get_current_user_optional
 from app.models.user import User
@@ -10,19 +13,53 @@ from app.schemas.report import (
     ReportResponse,
     ReportListResponse,
     ReportBase,
+    ReportBatchResponse,
     PriorityStatsResponse,
 )
 from app.services.report_service import ReportService
-from app.services.image_service import ImageService
-from app.services.ai_service import AIService
+from app.services.report_batch_service import ReportBatchService
+from app.services.admission_control import OverloadedError
+from app.services.inference_batcher import InferenceQueueFullError
+from app.services.inference_pool import InferenceTimeoutError
+from app.services.report_pipeline import ReportPipeline
+from app.services.report_enrichment import IN_PROGRESS_STATUSES, get_report_enrichment
+from app.services.idempotency import (
+    IdempotencyConflictError,
+    IdempotencyInProgressError,
+    IdempotentResponse,
+    get_idempotency_store,
+)
 from app.services.priority_service import PriorityService
-import asyncio
+from app.utils.validators import InvalidImageError, UploadTooLargeError, read_image_upload
 
 router = APIRouter()
 
 
+def _parse_manual_classification(manual_classification: Optional[str]):
+    # parse manual_classification if provided; accept either JSON or plain string
+    if not manual_classification:
+        return None
+    # try to decode JSON, but if it's a plain string use it as-is
+    try:
+        return json.loads(manual_classification)
+    except Exception:
+        # not a JSON payload, store raw string (trim whitespace)
+        return str(manual_classification).strip()
+
+
+def _with_images(reports, request: Request):
+    """Convierte reportes a ReportResponse con los derivados en el formato que acepta el cliente."""
+    accept = request.headers.get("accept")
+    if isinstance(reports, list):
+        return [ReportResponse.model_validate(r).negotiate_images(accept) for r in reports]
+    return ReportResponse.model_validate(reports).negotiate_images(accept)
+
+
 @router.post("/", response_model=ReportResponse)
 async def create_report(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
     image: UploadFile = File(...),
     latitude: float = Form(...),
     longitude: float = Form(...),
@@ -30,6 +67,7 @@ async def create_report(
     description: Optional[str] = Form(None),
     ai_classification: Optional[str] = Form(None),
     manual_classification: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
@@ -41,55 +79,132 @@ async def create_report(
     - Si no hay token o es inválido, se crea un reporte anónimo (user_id = None)
 
     **Pasos:**
-    1. Sube la imagen a Supabase
-    2. Clasifica la imagen con IA
-    3. Calcula la prioridad automáticamente
-    4. Guarda el reporte en la base de datos
-    5. Asigna puntos al usuario si está autenticado
+    1. Sube la imagen a Supabase y la clasifica con IA en paralelo
+    2. Calcula la prioridad automáticamente
+    3. Guarda el reporte en la base de datos
+    4. Asigna puntos al usuario si está autenticado
+
+    Si el servicio de clasificación está sobrecargado, el reporte se guarda con
+    `classification_status="pending"` y se clasifica en segundo plano.
+
+    Con `REPORT_ASYNC_ENRICHMENT` activo se responde `202` apenas se guardan la
+    imagen original y el reporte (`classification_status="classifying"`); el
+    resultado se consulta en `GET /reports/{id}/enrichment?wait=<segundos>`.
+
+    Los tiempos de cada etapa se devuelven en el header `Server-Timing`.
+    `thumbnail_url`/`preview_url` apuntan al formato que acepta el cliente
+    (AVIF/WebP según el header `Accept`, JPEG en otro caso).
+
+    La imagen se lee por fragmentos: se responde `413` en cuanto supera
+    `IMAGE_MAX_SIZE_MB` y `400` si su extensión o contenido no es JPEG/PNG/WebP.
+
+    **Idempotencia:** con el header `Idempotency-Key`, un reintento con la misma
+    clave y el mismo contenido devuelve la respuesta original (header
+    `Idempotent-Replayed: true`) sin volver a subir, clasificar ni asignar
+    puntos; un duplicado concurrente espera a la ejecución en curso. Reusar la
+    clave con otro contenido responde `422`.
     """
-    file_bytes = await image.read()
-    image_filename = image.filename
+    try:
+        file_bytes = await read_image_upload(image)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def create():
+        return await _create_report(
+            request, response, background_tasks, file_bytes, image.filename, latitude, longitude,
+            address, description, ai_classification, manual_classification, db, current_user,
+        )
 
+    if not idempotency_key:
+        return await create()
+
+    store = get_idempotency_store()
+    created = {}
+
+    async def execute():
+        created["report"] = await create()
+        return IdempotentResponse(response.status_code or 200, jsonable_encoder(created["report"]), None)
+
+    try:
+        stored, replayed = await store.run(
+            store.scoped_key(idempotency_key, current_user.id if current_user else None),
+            store.fingerprint(file_bytes, image.filename, latitude, longitude, address, description,
+                              ai_classification, manual_classification),
+            execute,
+        )
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not replayed:
+        return created["report"]
+    return JSONResponse(content=stored.body, status_code=stored.status_code,
+                        headers={"Idempotent-Replayed": "true"})
+
+
+async def _create_report(request, response, background_tasks, file_bytes, image_filename, latitude, longitude,
+                         address, description, ai_classification, manual_classification, db, current_user):
+    """Crea el reporte a partir de la imagen ya leída (ver create_report)."""
     try:
         ReportBase(latitude=latitude, longitude=longitude, description=description)
     except ValidationError as e:
         raise HTTPException(status_code=400, detail=e.errors())
 
-    public_url = await ImageService().upload_to_supabase(
-        file_bytes=file_bytes,
-        original_filename=image_filename
-    )
-
+    ai_result = None
     if ai_classification is not None and str(ai_classification).strip() != "string":
         try:
             ai_result = json.loads(ai_classification)
         except Exception:
             raise HTTPException(status_code=400, detail="ai_classification debe ser un JSON válido")
-    else:
-        # classification can be CPU-bound; run in a thread to avoid blocking the loop
-        ai_service = AIService()
-        ai_result = await asyncio.to_thread(ai_service.classify_waste, file_bytes)
-
-    # parse manual_classification if provided; accept either JSON or plain string
-    manual_result = None
-    if manual_classification:
-        # try to decode JSON, but if it's a plain string use it as-is
-        try:
-            manual_result = json.loads(manual_classification)
-        except Exception:
-            # not a JSON payload, store raw string (trim whitespace)
-            manual_result = str(manual_classification).strip()
 
     if address is not None and str(address).strip() == "string":
         address = f"Address for ({latitude}, {longitude})"
 
+    # Modo diferido: guardar imagen original + reporte y enriquecer en segundo plano
+    enrichment = get_report_enrichment()
+    if settings.REPORT_ASYNC_ENRICHMENT and ai_result is None and enrichment.has_capacity():
+        report_data = type('ReportData', (), {})()
+        report_data.latitude = latitude
+        report_data.longitude = longitude
+        report_data.address = address
+        report_data.description = description
+        report_data.manual_classification = _parse_manual_classification(manual_classification)
+        try:
+            created_report = await enrichment.submit(
+                db, file_bytes, image_filename, report_data,
+                user_id=current_user.id if current_user else None,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        response.status_code = 202
+        return _with_images(created_report, request)
+
+    # Subida y clasificación corren en paralelo; si una falla, la otra se cancela
+    try:
+        pipeline_result = await ReportPipeline.run(
+            file_bytes=file_bytes,
+            original_filename=image_filename,
+            ai_result=ai_result,
+            db=db,
+            defer_on_overload=settings.AI_DEFER_ON_OVERLOAD,
+        )
+    except (InferenceQueueFullError, OverloadedError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except InferenceTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    response.headers["Server-Timing"] = pipeline_result.server_timing_header()
+
+    manual_result = _parse_manual_classification(manual_classification)
+
     report_data = type('ReportData', (), {})()
     report_data.latitude = latitude
     report_data.longitude = longitude
     report_data.address = address
     report_data.description = description
-    report_data.image_url = public_url
-    report_data.ai_classification = ai_result
+    report_data.image_url = pipeline_result.image_url
+    report_data.ai_classification = pipeline_result.ai_classification
     report_data.manual_classification = manual_result
 
     # Pasar user_id si el usuario está autenticado, None si es anónimo
@@ -97,50 +212,136 @@ async def create_report(
     created_report = await ReportService.create_report(
         db=db,
         report_data=report_data,
-        user_id=user_id
+        user_id=user_id,
+        image_derivatives=pipeline_result.image_derivatives,
     )
 
-    return created_report
+    if pipeline_result.classification_deferred:
+        background_tasks.add_task(ReportService.classify_deferred_report, created_report.id, file_bytes)
+
+    return _with_images(created_report, request)
+
+
+@router.post("/batch", response_model=ReportBatchResponse)
+async def create_reports_batch(
+    background_tasks: BackgroundTasks,
+    manifest: str = Form(..., description="Arreglo JSON o NDJSON con un reporte por entrada"),
+    images: List[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    Carga masiva de reportes (sincronización de equipos de campo y apps aliadas).
+
+    Cada entrada del manifiesto tiene los campos de un reporte (`latitude`,
+    `longitude`, `address`, `description`, `manual_classification`,
+    `ai_classification`) más `image`, el nombre del archivo correspondiente
+    en `images`. Un administrador puede indicar `user_id` para asignar el
+    reporte (y sus puntos) a otro usuario.
+
+    Las imágenes se clasifican en lotes y se suben en paralelo; los reportes
+    se insertan juntos y los puntos se suman con una sola actualización.
+    Se responde con el resultado de cada entrada (`created` o `error`).
+    """
+    try:
+        items = ReportBatchService.parse_manifest(manifest)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(images) > settings.REPORT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Máximo {settings.REPORT_BATCH_MAX_ITEMS} imágenes por carga")
+
+    files = {}
+    for image in images:
+        if image.filename in files:
+            files[image.filename] = ValueError(f"Nombre de imagen duplicado: '{image.filename}'")
+            continue
+        try:
+            files[image.filename] = await read_image_upload(image)
+        except ValueError as e:
+            files[image.filename] = e
+
+    result, deferred = await ReportBatchService.ingest(db, items, files, current_user)
+    for report_id, file_bytes in deferred:
+        background_tasks.add_task(ReportService.classify_deferred_report, report_id, file_bytes)
+    return result
+
+
+def _list_page(request: Request, skip: int, limit: int, cursor: Optional[str], get_page, get_offset_page, count):
+    """
+    Listado paginado por cursor (keyset) o, si se pide `skip` > 0, por offset.
+
+    La primera página y las siguientes vía `cursor` usan keyset, cuyo costo no
+    crece con la profundidad; `skip` se mantiene por compatibilidad. El total
+    sale de `count()` según el modo pedido (exact, approximate o none).
+    """
+    try:
+        total, total_kind = count()
+        if cursor or skip == 0:
+            reports, next_cursor = get_page(cursor)
+            page = None if cursor else 1
+        else:
+            reports, _ = get_offset_page()
+            next_cursor, page = None, (skip // limit) + 1
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return ReportListResponse(
+        reports=_with_images(reports, request),
+        total=total,
+        total_kind=total_kind,
+        page=page,
+        per_page=limit,
+        next_cursor=next_cursor,
+    )
 
 
 @router.get("/", response_model=ReportListResponse)
 async def get_reports(
+    request: Request,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    count: Optional[str] = None,
     status: Optional[str] = None,
     waste_type: Optional[str] = None,
     priority: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """Obtener lista de reportes con filtros opcionales, ordenados por prioridad y fecha."""
-    reports, total = ReportService.get_reports(
-        db=db, skip=skip, limit=limit, status=status,
-        waste_type=waste_type, priority=priority
-    )
-    return ReportListResponse(
-        reports=reports,
-        total=total,
-        page=(skip // limit) + 1,
-        per_page=limit
+    """
+    Obtener lista de reportes con filtros opcionales, ordenados por prioridad y fecha.
+
+    Para paginar, enviar el `next_cursor` de la respuesta como `cursor`.
+    `count` elige el total: exact, approximate o none (por defecto REPORT_COUNT_MODE).
+    """
+    filters = dict(status=status, waste_type=waste_type, priority=priority)
+    return _list_page(
+        request, skip, limit, cursor,
+        get_page=lambda c: ReportService.get_reports_page(db=db, limit=limit, cursor=c, **filters),
+        get_offset_page=lambda: ReportService.get_reports(db=db, skip=skip, limit=limit, count_mode="none", **filters),
+        count=lambda: ReportService.count_reports(db=db, count_mode=count, **filters),
     )
 
 
 @router.get("/user/{user_id}", response_model=ReportListResponse)
 async def get_user_reports(
+    request: Request,
     user_id: int,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    count: Optional[str] = None,
     status: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    reports, total = ReportService.get_user_reports(
-        db=db, user_id=user_id, skip=skip, limit=limit, status=status
-    )
-    return ReportListResponse(
-        reports=reports,
-        total=total,
-        page=(skip // limit) + 1,
-        per_page=limit
+    return _list_page(
+        request, skip, limit, cursor,
+        get_page=lambda c: ReportService.get_user_reports_page(
+            db=db, user_id=user_id, limit=limit, cursor=c, status=status
+        ),
+        get_offset_page=lambda: ReportService.get_user_reports(
+            db=db, user_id=user_id, skip=skip, limit=limit, status=status, count_mode="none"
+        ),
+        count=lambda: ReportService.count_user_reports(db=db, user_id=user_id, status=status, count_mode=count),
     )
 
 
@@ -157,41 +358,67 @@ async def get_priority_statistics(db: Session = Depends(get_db)):
 
 
 @router.get("/urgent", response_model=list[ReportResponse])
-async def get_urgent_reports(limit: int = 10, db: Session = Depends(get_db)):
+async def get_urgent_reports(request: Request, limit: int = 10, db: Session = Depends(get_db)):
     """Obtener los reportes urgentes (alta prioridad)."""
     urgent_reports = ReportService.get_urgent_reports(db=db, limit=limit)
-    return urgent_reports
+    return _with_images(urgent_reports, request)
 
 
 @router.get("/priority/{priority_level}", response_model=ReportListResponse)
 async def get_reports_by_priority(
+    request: Request,
     priority_level: int,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    count: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """Obtener reportes filtrados por nivel de prioridad (1=baja, 2=media, 3=alta)."""
     if priority_level not in [1, 2, 3]:
         raise HTTPException(status_code=400, detail="El nivel de prioridad debe ser 1, 2 o 3")
 
-    reports, total = ReportService.get_reports(
-        db=db, skip=skip, limit=limit, priority=priority_level
-    )
-    return ReportListResponse(
-        reports=reports,
-        total=total,
-        page=(skip // limit) + 1,
-        per_page=limit
+    return _list_page(
+        request, skip, limit, cursor,
+        get_page=lambda c: ReportService.get_reports_page(db=db, limit=limit, cursor=c, priority=priority_level),
+        get_offset_page=lambda: ReportService.get_reports(
+            db=db, skip=skip, limit=limit, priority=priority_level, count_mode="none"
+        ),
+        count=lambda: ReportService.count_reports(db=db, count_mode=count, priority=priority_level),
     )
 
 
 @router.get("/{report_id}", response_model=ReportResponse)
-async def get_report(report_id: int, db: Session = Depends(get_db)):
+async def get_report(report_id: int, request: Request, db: Session = Depends(get_db)):
     """Obtener un reporte específico por ID."""
     report = ReportService.get_report_by_id(db=db, report_id=report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Reporte no encontrado")
-    return report
+    return _with_images(report, request)
+
+
+@router.get("/{report_id}/enrichment", response_model=ReportResponse)
+async def get_report_enrichment_status(
+    report_id: int,
+    request: Request,
+    wait: float = 0,
+    db: Session = Depends(get_db)
+):
+    """
+    Consultar el resultado del enriquecimiento diferido de un reporte.
+
+    Con `wait` > 0 la respuesta se retiene (long-polling) hasta que el reporte
+    deje los estados `classifying`/`enriching` o pasen `wait` segundos.
+    """
+    report = ReportService.get_report_by_id(db=db, report_id=report_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Reporte no encontrado")
+    if report.classification_status in IN_PROGRESS_STATUSES and wait > 0:
+        await get_report_enrichment().wait_for(
+            report_id, min(wait, settings.REPORT_ENRICHMENT_MAX_WAIT_S)
+        )
+        db.refresh(report)
+    return _with_images(report, request)
 
 
 @router.get("/{report_id}/priority-details")
@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, Body, File, UploadFile, F
 from sqlalchemy.orm import Session
 from app.schemas.reward import Reward, RewardCreate, RewardRedemptionCreate
 from app.services.reward_service import create_reward, get_all_rewards, redeem_reward
+from app.core.config import settings
 from app.core.database import get_db
+from app.services.storage_service import get_storage_backend
+from app.utils.validators import InvalidImageError, UploadTooLargeError, read_image_upload
 from typing import Optional
-import shutil
 import os
-from pathlib import Path
 
 router = APIRouter()
 
@@ -34,11 +35,14 @@ async def add_reward(
     """
     image_url = None
 
-    # Si se proporciona una imagen, guardarla
+    # Si se proporciona una imagen, validarla y guardarla en el storage de recompensas
     if image:
-        # Crear directorio si no existe
-        upload_dir = Path("uploads/rewards")
-        upload_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            file_bytes = await read_image_upload(image)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except InvalidImageError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         # Generar nombre único para el archivo
         file_extension = os.path.splitext(image.filename)[1]
@@ -46,15 +50,11 @@ async def add_reward(
         safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).strip()
         safe_name = safe_name.replace(' ', '_')
         file_name = f"{safe_name}{file_extension}"
-        file_path = upload_dir / file_name
+        key = f"rewards/{file_name}"
 
-        # Guardar el archivo
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-
-        # Guardar la URL relativa o completa según tu configuración
-        # Aquí guardamos la ruta relativa, pero podrías usar una URL de Supabase
-        image_url = f"/uploads/rewards/{file_name}"
+        storage = get_storage_backend(settings.REWARDS_STORAGE_BUCKET, kind=settings.REWARDS_STORAGE_BACKEND)
+        await storage.put(key, file_bytes, content_type=image.content_type or "application/octet-stream")
+        image_url = storage.url(key)
 
     # Crear el objeto RewardCreate
     reward_data = RewardCreate(
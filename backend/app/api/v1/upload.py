@@ -1,6 +1,10 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from app.services.ai_service import AIService
-import asyncio
+from app.services.inference_batcher import InferenceQueueFullError
+from app.services.inference_pool import InferenceTimeoutError
+from app.services.classification_cache import get_classification_cache
+from app.services.admission_control import OverloadedError, get_admission_controller
+from app.utils.validators import InvalidImageError, UploadTooLargeError, read_image_upload
 
 router = APIRouter()
 ai_service = AIService()
@@ -12,13 +16,34 @@ async def classify_waste_from_file(
 ):
     """Clasifica el residuo a partir de una imagen subida.
 
-    Ejecuta la clasificación en un hilo (asyncio.to_thread) para no bloquear
-    el event loop de FastAPI/uvicorn cuando el modelo hace trabajo pesado.
+    La clasificación se agrupa con otras solicitudes concurrentes en
+    micro-lotes y se ejecuta fuera del event loop de FastAPI/uvicorn.
+    La imagen se lee por fragmentos y se rechaza con 413 al superar el límite
+    (o con 400 si su extensión o contenido no son de una imagen permitida).
     """
     try:
-        file_bytes = await image.read()
-        # run CPU-bound or blocking classification in a thread
-        result = await asyncio.to_thread(ai_service.classify_waste, file_bytes)
+        file_bytes = await read_image_upload(image)
+        result = await ai_service.classify_waste_async(file_bytes)
         return result
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (InferenceQueueFullError, OverloadedError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except InferenceTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error clasificando imagen: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error clasificando imagen: {str(e)}")
+
+
+@router.get("/classify/cache-stats")
+async def get_classification_cache_stats():
+    """Métricas de la caché de clasificaciones (aciertos, fallos, tamaño, expulsiones)."""
+    return get_classification_cache().stats()
+
+
+@router.get("/classify/admission-stats")
+async def get_admission_stats():
+    """Estado del control de admisión (en vuelo, en espera, rechazadas)."""
+    return get_admission_controller().stats()
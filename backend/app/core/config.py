@@ -29,10 +29,112 @@ class Settings(BaseSettings):
     IMAGE_QUALITY: int = 80
     IMAGE_MAX_SIZE_MB: int = 5
     IMAGE_ALLOWED_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png", ".webp"]
+    IMAGE_PROCESSING_WORKERS: int = 4
+    # Derivados (miniatura y vista previa) generados al subir, lado mayor en píxeles
+    IMAGE_DERIVATIVES_ENABLED: bool = True
+    IMAGE_THUMBNAIL_SIZE: int = 256
+    IMAGE_PREVIEW_SIZE: int = 1024
+    # Formatos modernos además del JPEG de respaldo ("avif" y/o "webp")
+    IMAGE_DERIVATIVE_FORMATS: List[str] = ["webp"]
+    # Subidas: se leen por fragmentos y se cortan al superar IMAGE_MAX_SIZE_MB.
+    # El cuerpo multipart completo admite además este margen para los campos del formulario.
+    UPLOAD_CHUNK_SIZE_KB: int = 64
+    UPLOAD_FORM_OVERHEAD_KB: int = 64
+
+    # Storage: "supabase", "local" (disco) o "memory" (pruebas/benchmarks)
+    STORAGE_BACKEND: str = "supabase"
+    STORAGE_LOCAL_DIR: str = "uploads"
+    STORAGE_PUBLIC_BASE_URL: str = "/uploads"
+    STORAGE_HTTP_TIMEOUT_S: float = 30.0
+    # Recompensas: sus imágenes van aparte de las de reportes. Con "local" quedan en
+    # STORAGE_LOCAL_DIR/rewards como antes; con "supabase" en su propio bucket.
+    REWARDS_STORAGE_BACKEND: str = "local"
+    REWARDS_STORAGE_BUCKET: str = "rewards"
+    STORAGE_HTTP_MAX_CONNECTIONS: int = 20
 
     # AI / ML
     AI_MODEL_ID: str = "prithivMLmods/Trash-Net"
     CONFIDENCE_THRESHOLD: float = 0.7
+    # Backend de inferencia: "pytorch", "pytorch-int8", "onnx" o "onnx-int8"
+    AI_INFERENCE_BACKEND: str = "pytorch"
+    AI_ONNX_CACHE_DIR: str = ".onnx_cache"
+    # Decodificación JPEG reducida + resize/normalización fusionados antes del modelo
+    AI_FAST_PREPROCESS: bool = True
+
+    # Calentamiento del modelo: al arrancar cada worker y/o en el proceso padre
+    # antes del fork (gunicorn --preload) para compartir memoria copy-on-write
+    AI_WARMUP_ON_STARTUP: bool = True
+    AI_PRELOAD_MODEL: bool = False
+
+    # Inferencia por micro-lotes (agrupa clasificaciones concurrentes)
+    AI_BATCHING_ENABLED: bool = True
+    AI_BATCH_MAX_SIZE: int = 8
+    AI_BATCH_MAX_WAIT_MS: int = 10
+    AI_BATCH_QUEUE_SIZE: int = 256
+
+    # Pool de procesos de inferencia (0 = inferencia en hilos del proceso de la API)
+    AI_PROCESS_POOL_WORKERS: int = 0
+    AI_POOL_TORCH_THREADS: int = 1  # hilos intra-op de torch por worker
+    AI_POOL_START_METHOD: str = "spawn"
+    AI_INFERENCE_DEADLINE_S: float = 30.0
+
+    # Control de admisión de inferencia
+    AI_MAX_IN_FLIGHT: int = 32
+    AI_ADMISSION_QUEUE_SIZE: int = 64
+    AI_ADMISSION_MAX_WAIT_S: float = 5.0
+    # Con sobrecarga, guardar el reporte sin clasificar y clasificarlo después
+    AI_DEFER_ON_OVERLOAD: bool = True
+    AI_DEFERRED_MAX_RETRIES: int = 5
+    AI_DEFERRED_RETRY_DELAY_S: float = 2.0
+
+    # Enriquecimiento diferido de reportes: la solicitud solo guarda la imagen
+    # original y el reporte; clasificación, prioridad y puntos van en segundo plano
+    REPORT_ASYNC_ENRICHMENT: bool = False
+    REPORT_ENRICHMENT_WORKERS: int = 4
+    REPORT_ENRICHMENT_QUEUE_SIZE: int = 1000
+    REPORT_ENRICHMENT_MAX_WAIT_S: float = 30.0
+    # Long-polling en un worker que no encoló el reporte: consulta la fila cada POLL_S
+    REPORT_ENRICHMENT_POLL_S: float = 0.5
+    # Un reporte en "enriching" sin cambios en STALE_S se considera abandonado
+    # (worker caído) y `recover` lo retoma
+    REPORT_ENRICHMENT_STALE_S: float = 600.0
+    # Carga masiva (POST /reports/batch): máximo de reportes por solicitud y subidas en paralelo
+    REPORT_BATCH_MAX_ITEMS: int = 25
+    REPORT_BATCH_UPLOAD_CONCURRENCY: int = 8
+    # Idempotencia de POST /reports/ (header Idempotency-Key): respuestas guardadas por
+    # TTL_S; un duplicado concurrente espera hasta WAIT_S a la ejecución original.
+    # Con PERSIST se guardan en la BD y se comparten entre workers.
+    IDEMPOTENCY_TTL_S: int = 86400
+    IDEMPOTENCY_MAX_ENTRIES: int = 10000
+    IDEMPOTENCY_WAIT_S: float = 60.0
+    IDEMPOTENCY_PERSIST: bool = False
+    # Totales de los listados: "none" (sin total), "approximate" (contadores por
+    # combinación de filtros, recargados cada REFRESH_S) o "exact" (COUNT en caché
+    # por CACHE_TTL_S e invalidado al escribir reportes)
+    REPORT_COUNT_MODE: str = "exact"
+    REPORT_COUNT_CACHE_TTL_S: float = 30.0
+    REPORT_COUNT_REFRESH_S: float = 300.0
+    # Estadísticas de los paneles (admin y prioridades): una lectura de report_counters
+    # en caché por CACHE_TTL_S, descartada al confirmar cambios en reportes
+    REPORT_STATS_CACHE_TTL_S: float = 10.0
+    # Reconciliación de la tabla report_counters con reports cada RECONCILE_S en un
+    # solo worker (0 = desactivada; la tabla se llena al arrancar si está vacía)
+    REPORT_COUNTERS_RECONCILE_S: float = 3600.0
+    # Recálculo masivo de prioridades en motores sin UPDATE ... CASE: reportes por lote
+    PRIORITY_RECALC_CHUNK_SIZE: int = 1000
+    # Envejecimiento de prioridades: recalcula cada reporte al cruzar 24h/72h/168h de
+    # exposición, en lotes de BATCH_SIZE; busca reportes nuevos cada SCAN_S. Lo ejecuta
+    # un solo worker (advisory lock en PostgreSQL); con otros motores y varios workers,
+    # activarlo en uno solo
+    PRIORITY_AGING_ENABLED: bool = True
+    PRIORITY_AGING_SCAN_S: float = 300.0
+    PRIORITY_AGING_BATCH_SIZE: int = 500
+
+    # Caché de clasificaciones (LRU + TTL, clave = digest de la imagen + modelo + backend de inferencia)
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MAX_ENTRIES: int = 1024
+    AI_CACHE_TTL_S: int = 3600
+    AI_CACHE_PERSIST: bool = False
 
     # Notificaciones
     ENABLE_NOTIFICATIONS: bool = True
@@ -0,0 +1,70 @@
+import logging
+import zlib
+from sqlalchemy import func, select
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """
+    Elige un solo worker para una tarea de fondo (reconciliación, envejecimiento
+    de prioridades): cada worker de uvicorn/gunicorn la arranca, pero solo la
+    ejecuta el que tiene el lock.
+
+    En PostgreSQL es un advisory lock de sesión tomado en una conexión propia:
+    se libera solo si el worker muere y otro worker lo toma en su siguiente
+    intento. En otros motores (SQLite, un solo proceso) siempre se concede.
+    """
+
+    def __init__(self, name: str, engine=None):
+        self.name = name
+        self.key = zlib.crc32(name.encode())
+        self._engine = engine
+        self._connection = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from app.core.database import engine
+            return engine
+        return self._engine
+
+    def acquire(self) -> bool:
+        """Intenta tomar el lock sin esperar; True si este worker lo tiene."""
+        if self.engine.dialect.name != "postgresql":
+            return True
+        if self._connection is not None:
+            try:
+                # Si la conexión se cayó, el servidor ya soltó el lock
+                self._connection.execute(select(1))
+                self._connection.commit()
+                return True
+            except Exception:
+                logger.warning(f"Se perdió la conexión del lock '{self.name}'")
+                self._connection.invalidate()
+                self._connection = None
+        connection = self.engine.connect()
+        try:
+            acquired = connection.execute(select(func.pg_try_advisory_lock(self.key))).scalar()
+            # El lock es de sesión: cerrar la transacción implícita sin soltarlo
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        logger.info(f"Este worker ejecuta la tarea '{self.name}'")
+        return True
+
+    def release(self):
+        connection = self._connection
+        self._connection = None
+        if connection is None:
+            return
+        try:
+            connection.execute(select(func.pg_advisory_unlock(self.key)))
+            connection.commit()
+        finally:
+            connection.close()
@@ -0,0 +1,84 @@
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Corta las subidas multipart que superan el límite antes de que el parser
+    de formularios las almacene completas.
+
+    - Si el header Content-Length ya supera el límite, responde 413 sin leer el cuerpo.
+    - Si no (p. ej. transfer-encoding chunked), cuenta los bytes a medida que
+      llegan y aborta con 413 apenas se pasa del límite.
+
+    El límite es IMAGE_MAX_SIZE_MB más UPLOAD_FORM_OVERHEAD_KB para los demás
+    campos del formulario (por imagen en la carga masiva, que admite hasta
+    REPORT_BATCH_MAX_ITEMS); el tamaño exacto de cada archivo lo valida después
+    `read_image_upload`.
+    """
+
+    BATCH_PATH_SUFFIX = "/reports/batch"
+
+    def __init__(self, app, max_body_bytes: int = None):
+        self.app = app
+        self.max_body_bytes = max_body_bytes or (
+            settings.IMAGE_MAX_SIZE_MB * 1024 * 1024 + settings.UPLOAD_FORM_OVERHEAD_KB * 1024
+        )
+
+    def _limit_for(self, path: str) -> int:
+        if path.rstrip("/").endswith(self.BATCH_PATH_SUFFIX):
+            return self.max_body_bytes * settings.REPORT_BATCH_MAX_ITEMS
+        return self.max_body_bytes
+
+    def _response(self):
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"La imagen supera el tamaño máximo de {settings.IMAGE_MAX_SIZE_MB}MB"},
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            return await self.app(scope, receive, send)
+
+        max_body_bytes = self._limit_for(scope["path"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() \
+                and int(content_length) > max_body_bytes:
+            return await self._response()(scope, receive, send)
+
+        received = 0
+        exceeded = False
+        replaced = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_bytes:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def limited_send(message):
+            # FastAPI convierte los errores al parsear el formulario en un 400;
+            # si la causa fue el límite, se reemplaza esa respuesta por un 413
+            nonlocal replaced
+            if not exceeded:
+                return await send(message)
+            if message["type"] == "http.response.start" and not replaced:
+                replaced = True
+                await self._response()(scope, receive, send)
+
+        try:
+            await self.app(scope, limited_receive, limited_send)
+        except _BodyTooLarge:
+            if not replaced:
+                await self._response()(scope, receive, send)
@@ -0,0 +1,64 @@
+import logging
+from sqlalchemy import inspect, text
+from app.models.base import Base
+
+logger = logging.getLogger(__name__)
+
+
+def run_migrations(engine):
+    """
+    Migraciones aditivas mínimas (el proyecto no usa Alembic).
+
+    create_all crea las tablas nuevas pero no modifica las existentes, así que
+    aquí se agregan las columnas e índices declarados en los modelos que aún no
+    existen en la base de datos. Solo se agregan; nunca se eliminan ni alteran.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if default is not None:
+                    ddl += f" DEFAULT '{default}'" if isinstance(default, str) else f" DEFAULT {default}"
+                conn.execute(text(ddl))
+                logger.info(f"Migración: columna {table.name}.{column.name} agregada")
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                _create_index(engine, index)
+                # Los índices de otro dialecto (ddl_if) no se crean
+                if inspect(engine).has_index(table.name, index.name):
+                    logger.info(f"Migración: índice {index.name} creado en {table.name}")
+
+
+def _create_index(engine, index):
+    """
+    Crea un índice en una tabla existente. En PostgreSQL usa CREATE INDEX
+    CONCURRENTLY para no bloquear las escrituras mientras se construye (debe
+    ejecutarse fuera de una transacción).
+    """
+    if engine.dialect.name != "postgresql":
+        with engine.begin() as conn:
+            index.create(bind=conn)
+        return
+
+    options = index.dialect_options["postgresql"]
+    options["concurrently"] = True
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            index.create(bind=conn)
+    finally:
+        options["concurrently"] = False
@@ -1,31 +1,90 @@
+from contextlib import asynccontextmanager
+import asyncio
+import gc
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 import uvicorn
 
 
 from app.core.config import settings
 from app.core.database import engine
+from app.core.migrations import run_migrations
 from app.models import base
 from app.api.v1.api import api_router
 from app.services.ai_service import AIService
+from app.services.inference_batcher import get_inference_batcher
+from app.services.inference_pool import get_inference_pool
+from app.services.report_enrichment import get_report_enrichment
+from app.services.priority_aging_service import get_priority_aging_scheduler
+from app.services.report_counter_service import ReportCounterService, get_counter_reconciler
+from app.services.storage_service import SupabaseStorageBackend
 from app.core.exceptions import register_exception_handlers
+from app.core.middleware import UploadSizeLimitMiddleware
 
-# Crear tablas
+# Crear tablas y agregar columnas nuevas a las existentes
 base.Base.metadata.create_all(bind=engine)
+run_migrations(engine)
+# Llenar report_counters en bases existentes antes de atender solicitudes
+with engine.begin() as connection:
+    ReportCounterService.backfill(connection)
+
+# Precarga en el proceso padre (p. ej. `gunicorn --preload -k uvicorn.workers.UvicornWorker`):
+# el modelo se carga una vez antes del fork y los workers comparten sus páginas
+# copy-on-write. gc.freeze() evita que el GC de cada worker toque (y copie) esos objetos.
+if settings.AI_PRELOAD_MODEL:
+    AIService.warm_up()
+    gc.freeze()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("Iniciando la aplicación Zerbin API...")
+    # Calentar el modelo antes de aceptar tráfico (no-op si ya se precargó)
+    inference_pool = get_inference_pool()
+    if settings.AI_WARMUP_ON_STARTUP and not AIService.is_ready():
+        if inference_pool is not None:
+            await inference_pool.warm_up()
+        else:
+            await asyncio.to_thread(AIService.warm_up)
+    # Workers de enriquecimiento diferido de reportes
+    if settings.REPORT_ASYNC_ENRICHMENT:
+        get_report_enrichment().start()
+        await get_report_enrichment().recover()
+    # Reconciliación periódica de report_counters (la ejecuta un solo worker)
+    get_counter_reconciler().start()
+    # Envejecimiento de prioridades por umbrales de exposición
+    if settings.PRIORITY_AGING_ENABLED:
+        get_priority_aging_scheduler().start()
+    yield
+    if settings.PRIORITY_AGING_ENABLED:
+        await get_priority_aging_scheduler().stop()
+    await get_counter_reconciler().stop()
+    if settings.REPORT_ASYNC_ENRICHMENT:
+        await get_report_enrichment().stop()
+    # Detener el worker de micro-lotes de inferencia y el pool de procesos
+    await get_inference_batcher().close()
+    if inference_pool is not None:
+        inference_pool.close()
+    # Cerrar las conexiones HTTP reutilizadas con el storage
+    await SupabaseStorageBackend.aclose()
+
 
 app = FastAPI(
     title="Zerbin API",
     description="API para la aplicación Zerbin - Reporte de residuos en Medellín",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 register_exception_handlers(app)
 
-async def startup_event():
-    print("Iniciando la aplicación Zerbin API...")
-    AIService()
+# Rechazar (413) subidas que superan IMAGE_MAX_SIZE_MB antes de parsear el formulario.
+# Se registra antes que CORS para quedar por dentro: sus 413 también llevan headers CORS.
+app.add_middleware(UploadSizeLimitMiddleware)
 
 # Configurar CORS
 app.add_middleware(
@@ -39,6 +98,15 @@ app.add_middleware(
 # Incluir rutas de la API
 app.include_router(api_router, prefix="/api/v1")
 
+# Con el backend en disco local (reportes o recompensas), los objetos se sirven como archivos estáticos
+uses_local_storage = "local" in (settings.STORAGE_BACKEND.lower(), settings.REWARDS_STORAGE_BACKEND.lower())
+if uses_local_storage and settings.STORAGE_PUBLIC_BASE_URL.startswith("/"):
+    app.mount(
+        settings.STORAGE_PUBLIC_BASE_URL,
+        StaticFiles(directory=settings.STORAGE_LOCAL_DIR, check_dir=False),
+        name="uploads",
+    )
+
 
 @app.get("/")
 async def root():
@@ -50,7 +118,15 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "zerbin-api"}
+    return {"status": "healthy", "service": "zerbin-api", **AIService.readiness()}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: 503 hasta que el modelo IA esté cargado y calentado."""
+    readiness = AIService.readiness()
+    status_code = 200 if readiness["model_ready"] else 503
+    return JSONResponse(status_code=status_code, content={"service": "zerbin-api", **readiness})
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+
+class ClassificationCacheEntry(Base):
+    """Resultado de clasificación persistido, por digest de la imagen y modelo."""
+    __tablename__ = "classification_cache"
+    __table_args__ = (UniqueConstraint("digest", "model_id", name="uq_classification_cache_digest_model"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    digest = Column(String(64), nullable=False, index=True)
+    model_id = Column(String, nullable=False)
+    waste_type = Column(String, nullable=False)
+    confidence_score = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ClassificationCacheEntry(digest={self.digest[:12]}, waste_type={self.waste_type})>"
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Respuesta guardada para un header Idempotency-Key (IDEMPOTENCY_PERSIST).
+
+    Mientras la primera solicitud se ejecuta, status_code es NULL: la fila sirve
+    de reserva para que los duplicados atendidos por otros procesos esperen en
+    lugar de repetir el trabajo.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, unique=True, index=True, nullable=False)  # "<usuario>:<Idempotency-Key>"
+    fingerprint = Column(String(64), nullable=False)  # hash de la imagen y los campos enviados
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)  # JSON
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<IdempotencyKey(key={self.key}, status_code={self.status_code})>"
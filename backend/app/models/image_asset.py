@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+
+class ImageAsset(Base):
+    """
+    Índice de imágenes direccionadas por contenido.
+
+    Relaciona el hash SHA-256 de la imagen normalizada (JPEG recomprimido) con
+    el objeto ya subido y la última clasificación IA obtenida para ella.
+    source_hash guarda el hash de los bytes originales recibidos, lo que permite
+    reconocer reintentos idénticos antes de decodificar la imagen.
+    """
+    __tablename__ = "image_assets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)
+    source_hash = Column(String(64), index=True, nullable=True)
+    object_key = Column(String, nullable=False)
+    image_url = Column(String, nullable=False)
+    derivative_formats = Column(String, nullable=True)  # p. ej. "webp,jpeg"; None = sin derivados
+
+    # Clasificación IA asociada (None hasta que se clasifica)
+    waste_type = Column(String, nullable=True)
+    confidence_score = Column(Float, nullable=True)
+    model_id = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ImageAsset(hash={self.content_hash[:12]}, waste_type={self.waste_type})>"
@@ -1,13 +1,43 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.base import Base
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        # Índices por patrón de acceso (los crea run_migrations en bases existentes):
+        # listado general ordenado por (priority, created_at, id), paginado por cursor
+        Index("ix_reports_priority_created_at_id", "priority", "created_at", "id"),
+        # listado filtrado por estado o tipo de residuo, en el mismo orden; también
+        # sirve los conteos por estado y los urgentes (status + priority + created_at)
+        Index("ix_reports_status_priority_created_at_id", "status", "priority", "created_at", "id"),
+        Index("ix_reports_waste_type_priority_created_at_id", "waste_type", "priority", "created_at", "id"),
+        # carga inicial y reconciliación de report_counters: un GROUP BY
+        # (status, priority, waste_type) que se resuelve leyendo solo el índice
+        Index("ix_reports_status_priority_waste_type", "status", "priority", "waste_type"),
+        # historial por usuario
+        Index("ix_reports_user_id_created_at_id", "user_id", "created_at", "id"),
+        # clasificaciones pendientes o diferidas en curso (parcial en PostgreSQL)
+        Index(
+            "ix_reports_classification_backlog", "classification_status",
+            postgresql_where=text("classification_status IN ('pending', 'classifying', 'enriching')"),
+        ),
+        # reportes activos por prioridad (estadísticas, recálculo); solo PostgreSQL, porque
+        # SQLite no usa índices parciales con parámetros enlazados
+        Index(
+            "ix_reports_active_priority_created_at", "priority", "created_at",
+            postgresql_where=text("status IN ('pending', 'in_progress')"),
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     image_url = Column(String, nullable=False)
+    # Derivados (URL JPEG de respaldo) y formatos modernos disponibles, p. ej. "webp,jpeg"
+    thumbnail_url = Column(String, nullable=True)
+    preview_url = Column(String, nullable=True)
+    image_formats = Column(String, nullable=True)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     address = Column(String, nullable=True)
@@ -16,6 +46,10 @@ class Report(Base):
     waste_type = Column(String, nullable=True)
     confidence_score = Column(Float, nullable=True)
     manual_classification = Column(String, nullable=True)
+    # classified, pending (en espera de capacidad de inferencia), classifying (enriquecimiento
+    # diferido en cola), enriching (tomado por un worker), failed
+    classification_status = Column(String, default="classified")
+    raw_image_key = Column(String, nullable=True)  # imagen original aún sin procesar
 
     # Metadatos
     description = Column(Text, nullable=True)
@@ -27,7 +61,10 @@ class Report(Base):
     user = relationship("User", back_populates="reports")  # 🔹 usar string
 
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # El default en Python guarda la misma precisión que se compara en los cursores
+    # (en SQLite, CURRENT_TIMESTAMP no tiene microsegundos)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(),
+                        default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     resolved_at = Column(DateTime(timezone=True), nullable=True)
 
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String
+from app.models.base import Base
+
+
+class ReportCounter(Base):
+    """
+    Resumen de reportes por (status, priority, waste_type).
+
+    Se actualiza en la misma transacción que cada cambio en reportes, así que
+    las estadísticas se leen de unas pocas filas en lugar de recontar la tabla
+    reports. Los valores nulos se guardan como "" (status, waste_type) y 0
+    (priority) para que formen parte de la clave primaria.
+    """
+    __tablename__ = "report_counters"
+
+    status = Column(String, primary_key=True)
+    priority = Column(Integer, primary_key=True)
+    waste_type = Column(String, primary_key=True)  # "" = sin clasificar
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ReportCounter(status={self.status}, priority={self.priority}, waste_type={self.waste_type}, count={self.count})>"
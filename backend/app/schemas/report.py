@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 from datetime import datetime
 from typing import Optional
+from app.utils.helpers import image_url_for_format, negotiate_image_format
 
 class ReportBase(BaseModel):
     latitude: float = Field(..., ge=-90, le=90, description="Latitud del reporte")
@@ -28,9 +29,13 @@ class ReportUpdate(BaseModel):
 class ReportResponse(ReportBase):
     id: int
     image_url: str
+    thumbnail_url: Optional[str] = None  # miniatura para listas/tarjetas
+    preview_url: Optional[str] = None  # vista previa mediana
+    image_formats: Optional[str] = Field(None, exclude=True)  # formatos disponibles de los derivados
     address: Optional[str]
     waste_type: Optional[str]
     confidence_score: Optional[float]
+    classification_status: Optional[str] = "classified"
     status: str
     priority: int
     priority_label: Optional[str] = None  # "Low", "Medium", "High"
@@ -48,11 +53,43 @@ class ReportResponse(ReportBase):
         labels = {1: "Low", 2: "Medium", 3: "High"}
         return labels.get(priority, "Low")
 
+    def negotiate_images(self, accept_header: Optional[str]) -> "ReportResponse":
+        """Apunta los derivados al mejor formato (AVIF/WebP/JPEG) que acepta el cliente."""
+        fmt = negotiate_image_format(accept_header, self.image_formats)
+        if fmt != "jpeg":
+            self.thumbnail_url = image_url_for_format(self.thumbnail_url, fmt)
+            self.preview_url = image_url_for_format(self.preview_url, fmt)
+        return self
+
 class ReportListResponse(BaseModel):
     reports: list[ReportResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # None con count=none
+    total_kind: str = "exact"  # exact, approximate o none
+    page: Optional[int] = None  # None en las páginas pedidas por cursor
     per_page: int
+    next_cursor: Optional[str] = None  # Enviar como ?cursor= para la página siguiente
+
+class ReportBatchItem(ReportBase):
+    """Entrada del manifiesto de la carga masiva (un reporte)."""
+    image: str = Field(..., description="Nombre del archivo de imagen incluido en la solicitud")
+    ai_classification: Optional[dict] = Field(None, description="Clasificación ya calculada por el cliente")
+    user_id: Optional[int] = Field(None, description="Autor del reporte (solo administradores)")
+
+class ReportBatchItemResult(BaseModel):
+    """Resultado de un reporte de la carga masiva."""
+    index: int
+    image: Optional[str] = None
+    status: str  # "created" o "error"
+    report_id: Optional[int] = None
+    classification_status: Optional[str] = None
+    priority: Optional[int] = None
+    points_earned: int = 0
+    error: Optional[str] = None
+
+class ReportBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[ReportBatchItemResult]
 
 class PriorityStatsResponse(BaseModel):
     """Respuesta con estadísticas de prioridades"""
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, TypeVar
+from app.core.config import settings
+from app.services.inference_pool import InferenceTimeoutError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class OverloadedError(RuntimeError):
+    """No hay capacidad de inferencia disponible (cola de espera llena o espera agotada)."""
+
+
+class AdmissionController:
+    """
+    Control de admisión para la inferencia.
+
+    - Como máximo `max_in_flight` clasificaciones se ejecutan a la vez.
+    - Hasta `max_queue` solicitudes esperan turno; las demás se rechazan al
+      instante con OverloadedError.
+    - Una solicitud que espera más de `max_wait_s` también se rechaza.
+    - Una vez admitida, la clasificación tiene `deadline_s` para terminar o se
+      lanza InferenceTimeoutError. La operación no se cancela (la inferencia en
+      un hilo no se puede interrumpir): sigue ocupando su cupo hasta terminar,
+      así max_in_flight limita el trabajo real y no solo a quien lo espera.
+
+    Así una ráfaga se traduce en rechazos rápidos en lugar de latencia sin límite.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = settings.AI_MAX_IN_FLIGHT,
+        max_queue: int = settings.AI_ADMISSION_QUEUE_SIZE,
+        max_wait_s: float = settings.AI_ADMISSION_MAX_WAIT_S,
+        deadline_s: float = settings.AI_INFERENCE_DEADLINE_S,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.deadline_s = deadline_s
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._loop = loop
+            self.in_flight = 0
+            self.waiting = 0
+        return self._semaphore
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        logger.warning(f"Inferencia rechazada por sobrecarga: {reason}")
+        raise OverloadedError(f"Servicio de clasificación sobrecargado: {reason}")
+
+    async def run(self, operation: Callable[[], Awaitable[T]]) -> T:
+        """Ejecuta la operación si hay capacidad, respetando cola, espera y plazo."""
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self._reject("cola de espera llena")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.max_wait_s)
+            except asyncio.TimeoutError:
+                self._reject(f"sin capacidad tras {self.max_wait_s}s de espera")
+            finally:
+                self.waiting -= 1
+        else:
+            await semaphore.acquire()
+
+        self.in_flight += 1
+        try:
+            task = asyncio.ensure_future(operation())
+        except BaseException:
+            self._release(semaphore)
+            raise
+        task.add_done_callback(lambda done: self._release(semaphore, done))
+        finished, _ = await asyncio.wait({task}, timeout=self.deadline_s)
+        if not finished:
+            raise InferenceTimeoutError(f"La clasificación superó el plazo de {self.deadline_s}s")
+        return task.result()
+
+    def _release(self, semaphore: asyncio.Semaphore, task: Optional[asyncio.Future] = None):
+        """Libera el cupo cuando termina la operación (haya vencido o no su plazo)."""
+        if task is not None and not task.cancelled():
+            task.exception()  # evita el aviso de excepción no recuperada tras un plazo vencido
+        self.in_flight -= 1
+        semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Retorna el controlador de admisión compartido del proceso."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
@@ -1,14 +1,23 @@
-from transformers import pipeline
 from PIL import Image
 import io
+import asyncio
+import logging
 import threading
+import time
 from app.core.config import settings
+from app.services.image_preprocessing import DecodedImage, FastPreprocessor, run_model
+from app.services.inference_backends import build_classifier
+
+logger = logging.getLogger(__name__)
 
 class AIService:
     """Servicio de clasificación IA (carga perezosa y segura para hilos)."""
 
     _lock = threading.Lock()
     _pipeline = None  # modelo compartido entre instancias
+    _preprocessor = None  # preprocesamiento rápido (None = usar el del pipeline)
+    _ready = False  # True tras la inferencia de calentamiento
+    _warmup_seconds = None
 
     def __init__(self):
         # No cargar el modelo en la inicialización para permitir lazy-loading en tests.
@@ -30,33 +39,248 @@ class AIService:
 
         with cls._lock:
             if cls._pipeline is None:
-                cls._pipeline = pipeline(
-                    "image-classification",
-                    model=settings.AI_MODEL_ID,
-                    device="cpu",
-                    use_fast=True
-                )
+                # Backend seleccionado en AI_INFERENCE_BACKEND (pytorch, onnx, int8...)
+                cls._pipeline = build_classifier()
+                if settings.AI_FAST_PREPROCESS:
+                    cls._preprocessor = FastPreprocessor.from_pipeline(cls._pipeline)
             # marcar la instancia que solicitó la carga
             instance._owns_pipeline = True
 
-    def classify_waste(self, image_data: bytes):
-        """Clasifica una imagen de residuo y devuelve tipo y confianza."""
+    @classmethod
+    def warm_up(cls) -> bool:
+        """
+        Carga el pipeline y ejecuta una inferencia de prueba para forzar la
+        inicialización perezosa de kernels/pesos. Retorna True si quedó listo.
+        """
+        start = time.perf_counter()
+        try:
+            instance = cls()
+            cls._ensure_pipeline_loaded(instance)
+            img = cls._load_image(Image.new("RGB", (224, 224), color="white"), cls._preprocessor)
+            instance._predict([img])
+        except Exception as e:
+            logger.error(f"Falló el calentamiento del modelo IA: {e}")
+            return False
+        cls._warmup_seconds = round(time.perf_counter() - start, 3)
+        cls._ready = True
+        logger.info(f"Modelo IA listo en {cls._warmup_seconds}s ({settings.AI_MODEL_ID})")
+        return True
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        if settings.AI_PROCESS_POOL_WORKERS > 0:
+            # El modelo vive en los procesos del pool, no en el de la API
+            from app.services.inference_pool import get_inference_pool
+            return get_inference_pool().ready
+        return cls._ready and cls._pipeline is not None
+
+    @classmethod
+    def readiness(cls) -> dict:
+        """Estado del modelo para el endpoint /health."""
+        return {
+            "model_id": settings.AI_MODEL_ID,
+            "inference_backend": settings.AI_INFERENCE_BACKEND,
+            "model_loaded": cls._pipeline is not None,
+            "model_ready": cls.is_ready(),
+            "warmup_seconds": cls._warmup_seconds,
+            "inference_pool_workers": settings.AI_PROCESS_POOL_WORKERS,
+        }
+
+    @staticmethod
+    def _open_image(image_data) -> Image.Image:
+        """
+        Abre la imagen (solo lee la cabecera) o lanza ValueError. Acepta bytes
+        o una DecodedImage ya compartida con otras etapas (no se vuelve a decodificar).
+        """
+        if isinstance(image_data, DecodedImage):
+            return image_data.image
+        try:
+            return Image.open(io.BytesIO(image_data))
+        except Exception as e:
+            raise ValueError("Imagen inválida o corrupta") from e
+
+    @staticmethod
+    def _load_image(img: Image.Image, preprocessor: FastPreprocessor = None) -> Image.Image:
+        """Decodifica una imagen abierta (reducida si hay preprocesador rápido) o lanza ValueError."""
         try:
-            img = Image.open(io.BytesIO(image_data)).convert("RGB")
+            return preprocessor.load(img) if preprocessor is not None else img.convert("RGB")
         except Exception as e:
             raise ValueError("Imagen inválida o corrupta") from e
 
+    @staticmethod
+    def _decode_image(image_data: bytes) -> Image.Image:
+        """Decodifica los bytes de la imagen a RGB o lanza ValueError."""
+        return AIService._load_image(AIService._open_image(image_data))
+
+    def _predict(self, images: list) -> list:
+        """Ejecuta el modelo; con preprocesador rápido evita el procesador del pipeline."""
+        preprocessor = AIService._preprocessor
+        if preprocessor is not None:
+            return run_model(self.classifier, preprocessor.to_pixel_values(images))
+        if len(images) == 1:
+            return [self.classifier(images[0])]
+        return self.classifier(images, batch_size=len(images))
+
+    @staticmethod
+    def _format_result(results: list) -> dict:
+        """Convierte la salida del pipeline en el contrato {type, confidence}."""
+        top_result = results[0]
+        return {
+            "type": top_result["label"],
+            "confidence": round(top_result["score"] * 100, 2),
+        }
+
+    @staticmethod
+    def _get_cache():
+        if not settings.AI_CACHE_ENABLED:
+            return None
+        from app.services.classification_cache import get_classification_cache
+        return get_classification_cache()
+
+    def classify_waste(self, image_data: bytes):
+        """Clasifica una imagen de residuo y devuelve tipo y confianza."""
+        img = self._open_image(image_data)
+
         # Lazy-load seguro para hilos: cargar solo cuando se necesita y marcar la instancia.
         AIService._ensure_pipeline_loaded(self)
 
         if self.classifier is None:
             raise RuntimeError("El modelo IA no se pudo inicializar")
 
-        # Realiza la clasificación
-        results = self.classifier(img)
-        top_result = results[0]
+        # Decodificar (reducida si es posible) y clasificar
+        img = self._load_image(img, AIService._preprocessor)
+        results = self._predict([img])[0]
+        return self._format_result(results)
 
-        return {
-            "type": top_result["label"],
-            "confidence": round(top_result["score"] * 100, 2),
-        }
\ No newline at end of file
+    def classify_waste_batch(self, images_data: list[bytes]) -> list:
+        """
+        Clasifica varias imágenes en una sola pasada del modelo.
+
+        Retorna una lista alineada con la entrada: cada posición contiene el
+        resultado ({type, confidence}) o la excepción de esa imagen, de modo que
+        una imagen corrupta no hace fallar al resto del lote.
+        """
+        outputs: list = [None] * len(images_data)
+        opened = []
+        for i, image_data in enumerate(images_data):
+            try:
+                opened.append((i, self._open_image(image_data)))
+            except ValueError as e:
+                outputs[i] = e
+
+        if not opened:
+            return outputs
+
+        AIService._ensure_pipeline_loaded(self)
+        if self.classifier is None:
+            raise RuntimeError("El modelo IA no se pudo inicializar")
+
+        images, positions = [], []
+        for i, img in opened:
+            try:
+                images.append(self._load_image(img, AIService._preprocessor))
+                positions.append(i)
+            except ValueError as e:
+                outputs[i] = e
+        if not images:
+            return outputs
+
+        batch_results = self._predict(images)
+        for i, results in zip(positions, batch_results):
+            outputs[i] = self._format_result(results)
+        return outputs
+
+    async def classify_waste_async(self, image_data: bytes, decoded: DecodedImage = None):
+        """
+        Versión asíncrona de classify_waste para los endpoints.
+
+        Si AI_BATCHING_ENABLED está activo, la solicitud se agrupa con otras
+        concurrentes en un micro-lote; si no, se ejecuta en el pool de procesos
+        (AI_PROCESS_POOL_WORKERS > 0) o en un hilo aparte.
+        Los resultados de imágenes ya vistas salen de la caché sin tocar el modelo.
+        Las que sí llegan al modelo pasan por el control de admisión, que puede
+        lanzar OverloadedError o InferenceTimeoutError.
+
+        Si se pasa `decoded`, la inferencia reutiliza esa imagen ya decodificada
+        en lugar de volver a decodificar los bytes.
+        """
+        cache = self._get_cache()
+        if cache is not None:
+            digest = cache.digest(image_data)
+            cached = await cache.aget(digest)
+            if cached is not None:
+                return cached
+
+        from app.services.admission_control import get_admission_controller
+        # Los workers del pool de procesos decodifican por su cuenta: enviarles los
+        # bytes (comprimidos) es más barato que serializar la imagen decodificada
+        item = image_data if decoded is None or settings.AI_PROCESS_POOL_WORKERS > 0 else decoded
+        result = await get_admission_controller().run(lambda: self._infer(item))
+        if cache is not None:
+            await cache.aset(digest, result)
+        return result
+
+    async def classify_waste_batch_async(self, images_data: list, decoded: list = None) -> list:
+        """
+        Clasifica un lote completo conocido de antemano (p. ej. la carga masiva
+        de reportes), sin pasar por el micro-lote de solicitudes individuales.
+
+        Los aciertos de la caché se resuelven sin el modelo; el resto se divide
+        en lotes de AI_BATCH_MAX_SIZE y cada lote es una sola operación del
+        control de admisión. Retorna una lista alineada con la entrada: el
+        resultado ({type, confidence}) o la excepción de cada imagen.
+        """
+        outputs: list = [None] * len(images_data)
+        cache = self._get_cache()
+        digests = {}
+        misses = []
+        for i, image_data in enumerate(images_data):
+            if cache is not None:
+                digests[i] = cache.digest(image_data)
+                cached = await cache.aget(digests[i])
+                if cached is not None:
+                    outputs[i] = cached
+                    continue
+            misses.append(i)
+
+        use_decoded = decoded is not None and settings.AI_PROCESS_POOL_WORKERS <= 0
+        items = [decoded[i] if use_decoded else images_data[i] for i in misses]
+        chunk_size = max(1, settings.AI_BATCH_MAX_SIZE)
+        chunks = [
+            (misses[start:start + chunk_size], items[start:start + chunk_size])
+            for start in range(0, len(misses), chunk_size)
+        ]
+
+        from app.services.admission_control import get_admission_controller
+        controller = get_admission_controller()
+
+        async def run_chunk(positions, chunk):
+            try:
+                results = await controller.run(lambda: self._infer_batch(chunk))
+            except Exception as e:
+                results = [e] * len(chunk)
+            for i, result in zip(positions, results):
+                outputs[i] = result
+                if cache is not None and not isinstance(result, Exception):
+                    await cache.aset(digests[i], result)
+
+        await asyncio.gather(*(run_chunk(positions, chunk) for positions, chunk in chunks))
+        return outputs
+
+    async def _infer_batch(self, images: list) -> list:
+        if settings.AI_PROCESS_POOL_WORKERS > 0:
+            from app.services.inference_pool import get_inference_pool
+            return await get_inference_pool().run_batch(images)
+        return await asyncio.to_thread(self.classify_waste_batch, images)
+
+    async def _infer(self, image_data):
+        if settings.AI_BATCHING_ENABLED:
+            from app.services.inference_batcher import get_inference_batcher
+            return await get_inference_batcher().submit(image_data)
+        if settings.AI_PROCESS_POOL_WORKERS > 0:
+            from app.services.inference_pool import get_inference_pool
+            result = (await get_inference_pool().run_batch([image_data]))[0]
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return await asyncio.to_thread(self.classify_waste, image_data)
@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from app.core.config import settings
+from app.models.classification_cache import ClassificationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def classifier_id() -> str:
+    """
+    Identifica al clasificador que produce los resultados: modelo + backend de
+    inferencia. Un backend cuantizado puede dar otra salida que el fp32, así que
+    sus resultados no se comparten.
+    """
+    return f"{settings.AI_MODEL_ID}:{settings.AI_INFERENCE_BACKEND.lower()}"
+
+
+class ClassificationCache:
+    """
+    Caché LRU + TTL de resultados de clasificación.
+
+    La clave es el digest SHA-256 de los bytes de la imagen más el clasificador
+    (`classifier_id`: AI_MODEL_ID + AI_INFERENCE_BACKEND), así que cambiar de
+    modelo o de backend invalida automáticamente las entradas anteriores. Opcionalmente persiste los resultados en la BD
+    (tabla classification_cache) para sobrevivir a reinicios; el TTL se aplica
+    también a esas filas según su created_at.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.AI_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = settings.AI_CACHE_TTL_S,
+        persist: bool = settings.AI_CACHE_PERSIST,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist = persist
+        self._entries: "OrderedDict[tuple, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_id = classifier_id()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def digest(image_data: bytes) -> str:
+        return hashlib.sha256(image_data).hexdigest()
+
+    def _check_model(self):
+        """Vacía la caché en memoria si cambió el modelo o el backend configurado."""
+        if classifier_id() != self._model_id:
+            self._entries.clear()
+            self._model_id = classifier_id()
+
+    def get(self, digest: str) -> Optional[dict]:
+        """Busca en memoria (y en BD si persist está activo)."""
+        result = self._get_memory(digest)
+        if result is None and self.persist:
+            persisted = self._load_persisted(digest)
+            if persisted is not None:
+                result, age = persisted
+                # En memoria solo vive lo que le queda de TTL a la fila
+                self._set_memory(digest, result, age)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def set(self, digest: str, result: dict):
+        self._set_memory(digest, result)
+        if self.persist:
+            self._store_persisted(digest, result)
+
+    async def aget(self, digest: str) -> Optional[dict]:
+        """Versión asíncrona: la consulta a BD (si aplica) corre fuera del event loop."""
+        if not self.persist:
+            return self.get(digest)
+        return await asyncio.to_thread(self.get, digest)
+
+    async def aset(self, digest: str, result: dict):
+        if not self.persist:
+            return self.set(digest, result)
+        await asyncio.to_thread(self.set, digest, result)
+
+    def _get_memory(self, digest: str) -> Optional[dict]:
+        with self._lock:
+            self._check_model()
+            key = (digest, self._model_id)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return dict(result)
+
+    def _set_memory(self, digest: str, result: dict, age: float = 0.0):
+        with self._lock:
+            self._check_model()
+            key = (digest, self._model_id)
+            self._entries[key] = (time.monotonic() - age, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _load_persisted(self, digest: str) -> Optional[tuple[dict, float]]:
+        """Resultado persistido y su antigüedad en segundos; None si no existe o ya venció."""
+        from app.core.database import SessionLocal
+        now = datetime.now(timezone.utc)
+        try:
+            with SessionLocal() as db:
+                row = db.query(ClassificationCacheEntry).filter(
+                    ClassificationCacheEntry.digest == digest,
+                    ClassificationCacheEntry.model_id == classifier_id(),
+                    ClassificationCacheEntry.created_at >= now - timedelta(seconds=self.ttl_seconds),
+                ).first()
+                if row is None:
+                    return None
+                created_at = row.created_at
+                if created_at.tzinfo is None:
+                    created_at = created_at.replace(tzinfo=timezone.utc)
+                age = max(0.0, (now - created_at).total_seconds())
+                return {"type": row.waste_type, "confidence": row.confidence_score}, age
+        except Exception as e:
+            logger.warning(f"No se pudo leer la caché de clasificación persistida: {e}")
+            return None
+
+    def _store_persisted(self, digest: str, result: dict):
+        from app.core.database import SessionLocal
+        try:
+            with SessionLocal() as db:
+                row = db.query(ClassificationCacheEntry).filter(
+                    ClassificationCacheEntry.digest == digest,
+                    ClassificationCacheEntry.model_id == classifier_id(),
+                ).first()
+                if row is None:
+                    row = ClassificationCacheEntry(digest=digest, model_id=classifier_id())
+                    db.add(row)
+                # Una fila vencida se renueva en lugar de quedar bloqueando la clave
+                row.waste_type = result["type"]
+                row.confidence_score = result["confidence"]
+                row.created_at = datetime.now(timezone.utc)
+                db.commit()
+        except Exception as e:
+            # Una entrada duplicada (otra solicitud ya la guardó) no es un error
+            logger.debug(f"No se pudo persistir la clasificación en caché: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_id": self._model_id,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persist": self.persist,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_cache: Optional[ClassificationCache] = None
+
+
+def get_classification_cache() -> ClassificationCache:
+    """Retorna la caché compartida del proceso."""
+    global _cache
+    if _cache is None:
+        _cache = ClassificationCache()
+    return _cache
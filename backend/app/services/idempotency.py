@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto revisa la BD un duplicado que espera a otro proceso
+PERSISTED_POLL_INTERVAL_S = 0.1
+
+
+class IdempotencyConflictError(ValueError):
+    """La Idempotency-Key ya se usó con una solicitud diferente (HTTP 422)."""
+
+
+class IdempotencyInProgressError(RuntimeError):
+    """La solicitud original sigue en curso tras IDEMPOTENCY_WAIT_S (HTTP 409)."""
+
+
+class IdempotentResponse:
+    """Respuesta guardada de la primera ejecución: se devuelve tal cual a los reintentos."""
+
+    def __init__(self, status_code: int, body, fingerprint: str):
+        self.status_code = status_code
+        self.body = body
+        self.fingerprint = fingerprint
+
+
+class IdempotencyStore:
+    """
+    Almacén de claves de idempotencia con TTL para POST /reports/.
+
+    - Un reintento con la misma clave y el mismo contenido recibe la respuesta
+      guardada sin repetir subida, inferencia ni asignación de puntos.
+    - Los duplicados concurrentes esperan a la ejecución en curso en lugar de
+      competir con ella; si esa ejecución falla, el siguiente la reintenta.
+    - Reusar la clave con otro contenido es un error (IdempotencyConflictError).
+
+    Solo se guardan las respuestas exitosas, para que un error transitorio se
+    pueda reintentar con la misma clave. En memoria la coordinación es por
+    proceso; con `persist` la tabla idempotency_keys extiende la deduplicación
+    (y la espera de duplicados) a todos los workers.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = settings.IDEMPOTENCY_TTL_S,
+        max_entries: int = settings.IDEMPOTENCY_MAX_ENTRIES,
+        wait_seconds: float = settings.IDEMPOTENCY_WAIT_S,
+        persist: bool = settings.IDEMPOTENCY_PERSIST,
+        session_factory=None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.wait_seconds = wait_seconds
+        self.persist = persist
+        self._session_factory = session_factory
+        self._entries: "OrderedDict[str, tuple[float, IdempotentResponse]]" = OrderedDict()
+        self._in_flight: dict[str, tuple[str, asyncio.Future]] = {}
+        self.replays = 0
+
+    @staticmethod
+    def scoped_key(key: str, user_id: Optional[int] = None) -> str:
+        """Las claves son por usuario: otro usuario no puede obtener una respuesta ajena."""
+        return f"{user_id if user_id is not None else 'anon'}:{key}"
+
+    @staticmethod
+    def fingerprint(*parts) -> str:
+        """Hash del contenido de la solicitud (bytes de la imagen y campos del formulario)."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part if isinstance(part, bytes) else str(part).encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def run(self, key: str, fingerprint: str,
+                  operation: Callable[[], Awaitable[IdempotentResponse]]) -> tuple[IdempotentResponse, bool]:
+        """
+        Ejecuta la operación una sola vez por clave.
+
+        Returns:
+            (respuesta, True si es una repetición de una ejecución anterior)
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            stored = self._get_memory(key)
+            if stored is None and self.persist:
+                stored = await asyncio.to_thread(self._load_persisted, key)
+            if stored is not None:
+                return self._replay(stored, fingerprint), True
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                self._check_fingerprint(in_flight[0], fingerprint)
+                result = await self._wait(in_flight[1], deadline)
+                if result is not None:
+                    return self._replay(result, fingerprint), True
+                continue  # la ejecución original falló: reintentar como ejecución principal
+
+            if self.persist and not await asyncio.to_thread(self._claim, key, fingerprint):
+                # Otro proceso ya la está ejecutando
+                result = await self._wait_persisted(key, deadline)
+                if result is not None:
+                    return self._replay(result, fingerprint), True
+                continue
+
+            return await self._execute(key, fingerprint, operation), False
+
+    async def _execute(self, key, fingerprint, operation) -> IdempotentResponse:
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, future)
+        result = None
+        try:
+            result = await operation()
+            result.fingerprint = fingerprint
+            self._set_memory(key, result)
+            if self.persist:
+                await asyncio.to_thread(self._store_persisted, key, result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+            if result is None and self.persist:
+                await asyncio.shield(asyncio.to_thread(self._release, key))
+            # None = falló o se canceló: los duplicados en espera lo reintentan
+            future.set_result(result)
+
+    async def _wait(self, future: asyncio.Future, deadline: float) -> Optional[IdempotentResponse]:
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise IdempotencyInProgressError("La solicitud original con esta Idempotency-Key sigue en curso") from None
+
+    def _replay(self, stored: IdempotentResponse, fingerprint: str) -> IdempotentResponse:
+        self._check_fingerprint(stored.fingerprint, fingerprint)
+        self.replays += 1
+        return stored
+
+    @staticmethod
+    def _check_fingerprint(stored: str, fingerprint: str):
+        if stored != fingerprint:
+            raise IdempotencyConflictError("La Idempotency-Key ya se usó con una solicitud diferente")
+
+    def _get_memory(self, key: str) -> Optional[IdempotentResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        return response
+
+    def _set_memory(self, key: str, response: IdempotentResponse):
+        self._entries[key] = (time.monotonic(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ---- Persistencia (IDEMPOTENCY_PERSIST) ----
+
+    def _new_session(self):
+        if self._session_factory is None:
+            from app.core.database import SessionLocal
+            return SessionLocal()
+        return self._session_factory()
+
+    def _expired(self, row: IdempotencyKey) -> bool:
+        """Vence al pasar el TTL; una reserva sin respuesta (proceso caído) vence tras wait_seconds."""
+        created_at = row.created_at
+        if created_at is None:
+            return False
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        ttl = self.ttl_seconds if row.status_code is not None else self.wait_seconds
+        return datetime.now(timezone.utc) - created_at > timedelta(seconds=ttl)
+
+    def _load_persisted(self, key: str) -> Optional[IdempotentResponse]:
+        with self._new_session() as db:
+            row = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+            if row is None or row.status_code is None or self._expired(row):
+                return None
+            response = IdempotentResponse(row.status_code, json.loads(row.response_body), row.fingerprint)
+        self._set_memory(key, response)
+        return response
+
+    def _claim(self, key: str, fingerprint: str) -> bool:
+        """Reserva la clave insertando su fila; False si otro proceso ya la tiene."""
+        with self._new_session() as db:
+            row = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+            if row is not None:
+                if not self._expired(row):
+                    self._check_fingerprint(row.fingerprint, fingerprint)
+                    return False
+                db.delete(row)
+                db.flush()
+            db.add(IdempotencyKey(key=key, fingerprint=fingerprint, created_at=datetime.now(timezone.utc)))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                return False
+            return True
+
+    def _store_persisted(self, key: str, response: IdempotentResponse):
+        with self._new_session() as db:
+            row = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+            if row is not None:
+                row.status_code = response.status_code
+                row.response_body = json.dumps(response.body)
+                db.commit()
+
+    def _release(self, key: str):
+        """Libera la reserva de una ejecución fallida para que se pueda reintentar."""
+        with self._new_session() as db:
+            db.query(IdempotencyKey).filter(
+                IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+            ).delete(synchronize_session=False)
+            db.commit()
+
+    async def _wait_persisted(self, key: str, deadline: float) -> Optional[IdempotentResponse]:
+        """Espera a que el proceso dueño de la reserva guarde la respuesta (None si la liberó)."""
+        while time.monotonic() < deadline:
+            await asyncio.sleep(PERSISTED_POLL_INTERVAL_S)
+            state = await asyncio.to_thread(self._persisted_state, key)
+            if state != "in_progress":
+                return state
+        raise IdempotencyInProgressError("La solicitud original con esta Idempotency-Key sigue en curso")
+
+    def _persisted_state(self, key: str):
+        with self._new_session() as db:
+            row = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+            if row is None:
+                return None
+            if row.status_code is None:
+                # Una reserva vencida (su proceso cayó) se trata como liberada
+                return None if self._expired(row) else "in_progress"
+        return self._load_persisted(key)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "replays": self.replays,
+            "ttl_seconds": self.ttl_seconds,
+            "persist": self.persist,
+        }
+
+
+_store: Optional[IdempotencyStore] = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Retorna el almacén de idempotencia compartido del proceso."""
+    global _store
+    if _store is None:
+        _store = IdempotencyStore()
+    return _store
@@ -0,0 +1,77 @@
+import logging
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.models.image_asset import ImageAsset
+from app.services.classification_cache import classifier_id
+
+logger = logging.getLogger(__name__)
+
+
+class ImageAssetService:
+    """Índice persistente hash → objeto/clasificación para deduplicar imágenes."""
+
+    @staticmethod
+    def get_by_hash(db, content_hash: str) -> Optional[ImageAsset]:
+        return db.query(ImageAsset).filter(ImageAsset.content_hash == content_hash).first()
+
+    @staticmethod
+    def get_by_source_hash(db, source_hash: str) -> Optional[ImageAsset]:
+        return db.query(ImageAsset).filter(ImageAsset.source_hash == source_hash).first()
+
+    @staticmethod
+    def cached_classification(asset: Optional[ImageAsset]) -> Optional[dict]:
+        """Clasificación guardada para el asset, solo si proviene del modelo y backend actuales."""
+        if asset is None or asset.waste_type is None or asset.model_id != classifier_id():
+            return None
+        return {"type": asset.waste_type, "confidence": asset.confidence_score}
+
+    @staticmethod
+    def _upsert(db, content_hash: str, object_key: str, image_url: str,
+                classification: Optional[dict] = None, source_hash: Optional[str] = None,
+                derivative_formats: Optional[str] = None) -> ImageAsset:
+        """Crea o actualiza la entrada en la sesión, sin confirmar."""
+        asset = ImageAssetService.get_by_hash(db, content_hash)
+        if asset is None:
+            asset = ImageAsset(content_hash=content_hash, object_key=object_key,
+                               image_url=image_url, source_hash=source_hash)
+            db.add(asset)
+        if derivative_formats is not None:
+            asset.derivative_formats = derivative_formats
+        if classification is not None:
+            asset.waste_type = classification.get("type")
+            asset.confidence_score = classification.get("confidence")
+            asset.model_id = classifier_id()
+        return asset
+
+    @staticmethod
+    def register(db, content_hash: str, object_key: str, image_url: str,
+                 classification: Optional[dict] = None, source_hash: Optional[str] = None,
+                 derivative_formats: Optional[str] = None) -> ImageAsset:
+        """Crea o actualiza la entrada del índice para el hash dado."""
+        asset = ImageAssetService._upsert(db, content_hash, object_key, image_url,
+                                          classification, source_hash, derivative_formats)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Otra solicitud registró el mismo hash en paralelo: usar su entrada
+            db.rollback()
+            logger.info(f"Hash {content_hash[:12]} registrado en paralelo; se reutiliza la entrada existente")
+            return ImageAssetService.get_by_hash(db, content_hash)
+        return asset
+
+    @staticmethod
+    def register_many(db, assets: list):
+        """
+        Agrega varias entradas a la transacción en curso sin confirmarla (carga masiva).
+
+        Cada entrada va en su propio SAVEPOINT: si otra solicitud registró el mismo
+        hash en paralelo, solo se descarta esa entrada (el índice es una caché) y
+        el resto de la transacción sigue intacto.
+        """
+        for fields in assets:
+            try:
+                with db.begin_nested():
+                    ImageAssetService._upsert(db, **fields)
+            except IntegrityError:
+                logger.info(f"Hash {fields['content_hash'][:12]} registrado en paralelo; se omite")
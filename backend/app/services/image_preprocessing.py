@@ -0,0 +1,160 @@
+"""
+Preprocesamiento rápido de imágenes para el clasificador.
+
+El pipeline de transformers decodifica la foto a resolución completa (12+ MP en
+celulares) y luego la reduce al tamaño de entrada del modelo (p. ej. 224x224).
+Aquí se evita ese trabajo:
+
+1. Decodificación reducida: en JPEG, `Image.draft` pide al decodificador una
+   escala 1/2, 1/4 u 1/8 que siga siendo >= al tamaño del modelo, así que la
+   mayoría de los píxeles nunca se decodifican.
+2. Un único resize en C (PIL) al tamaño exacto del modelo.
+3. Reescalado + normalización fusionados en un solo multiply-add por canal,
+   escrito directamente en formato CHW dentro de un buffer float32 reutilizable
+   (uno por hilo), sin tensores intermedios.
+"""
+import io
+import threading
+from typing import Optional
+import numpy as np
+from PIL import Image
+
+SUPPORTED_RESAMPLE = {
+    Image.Resampling.NEAREST, Image.Resampling.BILINEAR,
+    Image.Resampling.BICUBIC, Image.Resampling.LANCZOS,
+}
+
+
+class DecodedImage:
+    """
+    Imagen de una solicitud decodificada una sola vez y compartida por las
+    etapas que la consumen (compresión, derivados, inferencia).
+
+    La decodificación es perezosa y segura para hilos: la primera etapa que
+    pide `.image` decodifica; las demás esperan y reutilizan el mismo objeto.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self._image: Optional[Image.Image] = None
+        self._error: Optional[Exception] = None
+        self._lock = threading.Lock()
+
+    @property
+    def image(self) -> Image.Image:
+        """Imagen RGB a resolución completa; lanza ValueError si los bytes no son una imagen."""
+        if self._image is None and self._error is None:
+            with self._lock:
+                if self._image is None and self._error is None:
+                    try:
+                        self._image = Image.open(io.BytesIO(self.data)).convert("RGB")
+                    except Exception as e:
+                        self._error = e
+        if self._error is not None:
+            raise ValueError("Imagen inválida o corrupta") from self._error
+        return self._image
+
+
+class FastPreprocessor:
+    """Decodificación reducida + resize/normalización fusionados hacia un buffer reutilizable."""
+
+    def __init__(self, height: int, width: int, mean, std,
+                 rescale_factor: float = 1 / 255, resample=Image.Resampling.BILINEAR):
+        self.height = height
+        self.width = width
+        self.resample = resample
+        mean = np.asarray(mean, dtype=np.float32)
+        std = np.asarray(std, dtype=np.float32)
+        # (x * rescale - mean) / std == x * scale + offset
+        self.scale = (rescale_factor / std).astype(np.float32)
+        self.offset = (-mean / std).astype(np.float32)
+        self._local = threading.local()
+
+    @classmethod
+    def from_pipeline(cls, classifier) -> Optional["FastPreprocessor"]:
+        """
+        Construye el preprocesador a partir del image_processor del pipeline.
+        Retorna None si el procesador no es un resize fijo + normalización
+        (p. ej. recorte central), en cuyo caso se usa el pipeline tal cual.
+        """
+        processor = getattr(classifier, "image_processor", None)
+        if processor is None or getattr(classifier, "model", None) is None:
+            return None
+        size = getattr(processor, "size", None) or {}
+        if "height" not in size or "width" not in size or getattr(processor, "do_center_crop", False):
+            return None
+
+        do_rescale = getattr(processor, "do_rescale", True)
+        do_normalize = getattr(processor, "do_normalize", True)
+        mean = processor.image_mean if do_normalize else [0.0, 0.0, 0.0]
+        std = processor.image_std if do_normalize else [1.0, 1.0, 1.0]
+        resample = getattr(processor, "resample", Image.Resampling.BILINEAR)
+        try:
+            resample = Image.Resampling(int(resample))
+        except (TypeError, ValueError):
+            resample = Image.Resampling.BILINEAR
+        if resample not in SUPPORTED_RESAMPLE:
+            resample = Image.Resampling.BILINEAR
+        return cls(
+            height=size["height"],
+            width=size["width"],
+            mean=mean,
+            std=std,
+            rescale_factor=getattr(processor, "rescale_factor", 1 / 255) if do_rescale else 1.0,
+            resample=resample,
+        )
+
+    def load(self, img: Image.Image) -> Image.Image:
+        """Decodifica una imagen abierta (perezosa) a la menor escala útil, en RGB."""
+        if img.format == "JPEG":
+            img.draft("RGB", (self.width, self.height))
+        img = img.convert("RGB")
+        if img.size != (self.width, self.height):
+            # reducing_gap reduce primero por bloques (rápido) las imágenes ya
+            # decodificadas a resolución completa, p. ej. una DecodedImage compartida
+            img = img.resize((self.width, self.height), self.resample, reducing_gap=3.0)
+        return img
+
+    def _buffer(self, batch_size: int) -> np.ndarray:
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or buffer.shape[0] < batch_size:
+            buffer = np.empty((batch_size, 3, self.height, self.width), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer
+
+    def to_pixel_values(self, images: list) -> np.ndarray:
+        """
+        Escribe las imágenes (ya en RGB y al tamaño del modelo) normalizadas en
+        el buffer del hilo. Retorna una vista (batch, 3, H, W) sobre el buffer:
+        es válida hasta la siguiente llamada en el mismo hilo.
+        """
+        out = self._buffer(len(images))[:len(images)]
+        for i, img in enumerate(images):
+            pixels = np.asarray(img)  # (H, W, 3) uint8, sin copia
+            for c in range(3):
+                np.multiply(pixels[..., c], self.scale[c], out=out[i, c])
+                out[i, c] += self.offset[c]
+        return out
+
+
+def run_model(classifier, pixel_values: np.ndarray, top_k: int = 5) -> list:
+    """
+    Ejecuta el modelo del pipeline sobre pixel_values ya preprocesados y
+    devuelve, por imagen, la misma estructura que el pipeline: [{label, score}].
+    """
+    import torch
+
+    model = classifier.model
+    with torch.inference_mode():
+        logits = model(pixel_values=torch.from_numpy(pixel_values)).logits
+    if getattr(model.config, "problem_type", None) == "multi_label_classification":
+        scores = logits.sigmoid()
+    else:
+        scores = logits.softmax(-1)
+    top_scores, top_ids = scores.topk(min(top_k, scores.shape[-1]), dim=-1)
+
+    id2label = model.config.id2label
+    return [
+        [{"label": id2label[int(idx)], "score": float(score)} for score, idx in zip(row_scores, row_ids)]
+        for row_scores, row_ids in zip(top_scores, top_ids)
+    ]
@@ -1,25 +1,87 @@
-from PIL import Image
+from PIL import Image, features
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import io
-import uuid
-import time
-import tempfile
-import os
-from app.core.supabase_client import supabase
+from typing import Optional
 from app.core.config import settings
+from app.services.image_preprocessing import DecodedImage
+from app.services.storage_service import StorageBackend, get_storage_backend
+from app.utils.helpers import IMAGE_FORMAT_EXTENSIONS
+
+# Executor acotado para el trabajo CPU-bound de PIL (decode/encode)
+_image_executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PROCESSING_WORKERS,
+    thread_name_prefix="image-worker",
+)
+
+# Parámetros de codificación de los derivados por formato
+DERIVATIVE_ENCODE_OPTIONS = {
+    "avif": {"format": "AVIF", "quality": 55, "speed": 8},
+    "webp": {"format": "WEBP", "quality": 75, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": settings.IMAGE_QUALITY, "optimize": True},
+}
 
 
 class ImageService:
-    async def upload_to_supabase(
-        self,
-        file_bytes: bytes,
-        original_filename: str,
-        bucket: str = settings.SUPABASE_BUCKET_NAME,
-        quality: int = settings.IMAGE_QUALITY,
-        max_size_mb: int = settings.IMAGE_MAX_SIZE_MB,
-    ):
+    def __init__(self, storage: Optional[StorageBackend] = None):
+        # Permite inyectar un backend (p. ej. en memoria para benchmarks offline)
+        self.storage = storage
+
+    @staticmethod
+    def _compress(decoded: DecodedImage, quality: int) -> bytes:
+        """Recomprime a JPEG en memoria la imagen (decodificada una sola vez)."""
+        try:
+            buffer = io.BytesIO()
+            decoded.image.save(buffer, format="JPEG", quality=quality)
+            return buffer.getvalue()
+        except Exception as e:
+            raise ValueError("No se pudo procesar la imagen para compresión") from e
+
+    @staticmethod
+    def derivative_formats() -> list[str]:
+        """Formatos de derivados soportados por este Pillow; JPEG siempre como respaldo."""
+        modern = [f for f in settings.IMAGE_DERIVATIVE_FORMATS if f in ("avif", "webp") and features.check(f)]
+        return modern + ["jpeg"]
+
+    @staticmethod
+    def _make_derivatives(img: Image.Image, formats: list[str]) -> dict:
         """
-        Valida, comprime y sube la imagen a Supabase Storage. Retorna la URL pública.
+        Genera vista previa y miniatura en una sola pasada: cada tamaño se
+        reduce a partir del anterior (no desde el original) y se codifica en
+        todos los formatos. Retorna {nombre: {formato: bytes}}.
         """
+        sizes = sorted(
+            [("preview", settings.IMAGE_PREVIEW_SIZE), ("thumb", settings.IMAGE_THUMBNAIL_SIZE)],
+            key=lambda item: -item[1],
+        )
+        derivatives = {}
+        current = img
+        for name, max_side in sizes:
+            if max(current.size) > max_side:
+                current = current.copy()
+                current.thumbnail((max_side, max_side), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            encoded = {}
+            for fmt in formats:
+                buffer = io.BytesIO()
+                current.save(buffer, **DERIVATIVE_ENCODE_OPTIONS[fmt])
+                encoded[fmt] = buffer.getvalue()
+            derivatives[name] = encoded
+        return derivatives
+
+    @staticmethod
+    def _normalize(decoded: DecodedImage, quality: int) -> "PreparedImage":
+        """Comprime la imagen, genera sus derivados y calcula el hash de los bytes normalizados."""
+        compressed = ImageService._compress(decoded, quality)
+        derivatives = {}
+        if settings.IMAGE_DERIVATIVES_ENABLED:
+            derivatives = ImageService._make_derivatives(decoded.image, ImageService.derivative_formats())
+        return PreparedImage(compressed, hashlib.sha256(compressed).hexdigest(), derivatives)
+
+    @staticmethod
+    def validate(file_bytes: bytes, original_filename: str,
+                 max_size_mb: int = settings.IMAGE_MAX_SIZE_MB):
+        """Valida tamaño y extensión de la imagen; lanza ValueError si no cumple."""
         # === Validar tamaño ===
         size_mb = len(file_bytes) / (1024 * 1024)
         if size_mb > max_size_mb:
@@ -31,41 +93,109 @@ class ImageService:
         if file_ext not in allowed_exts:
             raise ValueError(f"Extensión de imagen no permitida: .{file_ext}")
 
-        # === Comprimir imagen y crear archivo temporal ===
-        try:
-            img = Image.open(io.BytesIO(file_bytes)).convert("RGB")
+    async def prepare_image(
+        self,
+        file_bytes: bytes,
+        original_filename: str,
+        quality: int = settings.IMAGE_QUALITY,
+        max_size_mb: int = settings.IMAGE_MAX_SIZE_MB,
+        decoded: Optional[DecodedImage] = None,
+    ) -> "PreparedImage":
+        """
+        Valida y normaliza la imagen (JPEG recomprimido) y calcula su hash de contenido.
+        La compresión corre en un executor acotado, fuera del event loop.
 
-            # Crear archivo temporal y guardar la imagen comprimida
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-                img.save(temp_file.name, format="JPEG", quality=quality)
-                temp_path = temp_file.name  # Guardar ruta antes de cerrar
+        Si se pasa `decoded` (compartida con la clasificación), se reutiliza su
+        decodificación en lugar de decodificar los bytes otra vez.
+        """
+        self.validate(file_bytes, original_filename, max_size_mb)
+        if decoded is None:
+            decoded = DecodedImage(file_bytes)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_image_executor, self._normalize, decoded, quality)
 
+    async def store_prepared(
+        self,
+        prepared: "PreparedImage",
+        bucket: str = settings.SUPABASE_BUCKET_NAME,
+    ) -> str:
+        """
+        Sube la imagen normalizada bajo su hash de contenido, junto con sus
+        derivados (en paralelo). Retorna la URL pública de la imagen completa.
+        """
+        storage = self.storage or get_storage_backend(bucket)
+        uploads = [storage.put(prepared.object_key, prepared.data, content_type="image/jpeg")]
+        for name, encoded in prepared.derivatives.items():
+            for fmt, data in encoded.items():
+                uploads.append(storage.put(prepared.derivative_key(name, fmt), data, content_type=f"image/{fmt}"))
+        try:
+            await asyncio.gather(*uploads)
+        except ValueError:
+            raise
         except Exception as e:
-            raise ValueError("No se pudo procesar la imagen para compresión") from e
+            raise ValueError(f"Error subiendo la imagen al storage: {e}")
+        return storage.url(prepared.object_key)
 
-        # === Crear nombre único para la imagen ===
-        timestamp = int(time.time())
-        file_name = f"{timestamp}_{uuid.uuid4().hex[:8]}.jpg"
+    async def upload_image(
+        self,
+        file_bytes: bytes,
+        original_filename: str,
+        bucket: str = settings.SUPABASE_BUCKET_NAME,
+        quality: int = settings.IMAGE_QUALITY,
+        max_size_mb: int = settings.IMAGE_MAX_SIZE_MB,
+    ):
+        """
+        Valida, comprime y sube la imagen al backend de storage configurado
+        (Supabase, disco local o memoria). Retorna la URL pública.
 
-        # === Subir a Supabase ===
-        try:
-            # Se pasa el path, no el archivo abierto
-            response = supabase.storage.from_(bucket).upload(file_name, temp_path)
-        except Exception as e:
-            raise ValueError(f"Error subiendo la imagen a Supabase: {e}")
-        finally:
-            # Esperar un poco y eliminar el archivo si aún existe
-            try:
-                if os.path.exists(temp_path):
-                    time.sleep(0.1)  # pequeño delay para que Windows libere el archivo
-                    os.remove(temp_path)
-            except Exception as e:
-                print(f"⚠️ Advertencia: No se pudo eliminar el archivo temporal ({temp_path}): {e}")
-
-        # === Verificar respuesta de Supabase ===
-        if isinstance(response, dict) and response.get("error"):
-            raise ValueError(f"Error subiendo la imagen a Supabase: {response['error']}")
-
-        # === Obtener la URL pública ===
-        public_url = supabase.storage.from_(bucket).get_public_url(file_name)
-        return public_url
+        El objeto se guarda bajo el hash SHA-256 de la imagen normalizada, así
+        que subir dos veces la misma foto produce un único objeto.
+        """
+        prepared = await self.prepare_image(file_bytes, original_filename, quality, max_size_mb)
+        return await self.store_prepared(prepared, bucket)
+
+    def derivative_urls(self, content_hash: str, formats: Optional[str],
+                        bucket: str = settings.SUPABASE_BUCKET_NAME) -> Optional[dict]:
+        """
+        URLs (JPEG de respaldo) de la miniatura y la vista previa de una imagen,
+        más los formatos disponibles. None si la imagen no tiene derivados.
+        """
+        if not formats:
+            return None
+        storage = self.storage or get_storage_backend(bucket)
+        return {
+            "thumbnail_url": storage.url(PreparedImage.key_for(content_hash, "thumb", "jpeg")),
+            "preview_url": storage.url(PreparedImage.key_for(content_hash, "preview", "jpeg")),
+            "image_formats": formats,
+        }
+
+    async def upload_to_supabase(self, file_bytes: bytes, original_filename: str, **kwargs):
+        """Alias histórico de upload_image."""
+        return await self.upload_image(file_bytes, original_filename, **kwargs)
+
+
+class PreparedImage:
+    """Imagen normalizada lista para subir, direccionada por su hash de contenido."""
+
+    def __init__(self, data: bytes, content_hash: str, derivatives: Optional[dict] = None):
+        self.data = data
+        self.content_hash = content_hash
+        self.derivatives = derivatives or {}  # {"thumb"|"preview": {formato: bytes}}
+
+    @property
+    def object_key(self) -> str:
+        return f"{self.content_hash}.jpg"
+
+    @property
+    def derivative_formats(self) -> Optional[str]:
+        """Formatos generados, separados por coma (p. ej. "webp,jpeg")."""
+        if not self.derivatives:
+            return None
+        return ",".join(next(iter(self.derivatives.values())).keys())
+
+    @staticmethod
+    def key_for(content_hash: str, name: str, fmt: str) -> str:
+        return f"{content_hash}/{name}.{IMAGE_FORMAT_EXTENSIONS[fmt]}"
+
+    def derivative_key(self, name: str, fmt: str) -> str:
+        return self.key_for(self.content_hash, name, fmt)
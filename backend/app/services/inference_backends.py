@@ -0,0 +1,89 @@
+"""
+Backends de inferencia para el clasificador de residuos.
+
+Todos devuelven un pipeline "image-classification" de transformers con la misma
+interfaz (imagen o lista de imágenes → [{label, score}, ...]), así que AIService
+no necesita saber cuál está activo. Se elige con AI_INFERENCE_BACKEND:
+
+- "pytorch":      fp32 en PyTorch (comportamiento original)
+- "pytorch-int8": cuantización dinámica int8 de las capas Linear con PyTorch
+- "onnx":         modelo exportado a ONNX y ejecutado con ONNX Runtime
+- "onnx-int8":    modelo ONNX con cuantización dinámica int8
+
+Los backends ONNX requieren las dependencias opcionales `optimum[onnxruntime]`.
+"""
+import logging
+from pathlib import Path
+from transformers import pipeline
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_BACKENDS = ("pytorch", "pytorch-int8", "onnx", "onnx-int8")
+
+
+def _build_pytorch(model_id: str):
+    return pipeline("image-classification", model=model_id, device="cpu", use_fast=True)
+
+
+def _build_pytorch_int8(model_id: str):
+    import torch
+    classifier = _build_pytorch(model_id)
+    classifier.model = torch.quantization.quantize_dynamic(
+        classifier.model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return classifier
+
+
+def _export_onnx(model_id: str, quantize: bool) -> tuple[Path, str]:
+    """Exporta (una vez) el modelo a ONNX en AI_ONNX_CACHE_DIR y opcionalmente lo cuantiza."""
+    try:
+        from optimum.onnxruntime import ORTModelForImageClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    except ImportError as e:
+        raise RuntimeError(
+            "El backend ONNX requiere 'optimum[onnxruntime]' (pip install optimum[onnxruntime])"
+        ) from e
+
+    export_dir = Path(settings.AI_ONNX_CACHE_DIR) / model_id.replace("/", "__")
+    if not (export_dir / "model.onnx").exists():
+        logger.info(f"Exportando {model_id} a ONNX en {export_dir}")
+        model = ORTModelForImageClassification.from_pretrained(model_id, export=True)
+        model.save_pretrained(export_dir)
+
+    if not quantize:
+        return export_dir, "model.onnx"
+
+    quantized_dir = export_dir / "int8"
+    if not (quantized_dir / "model_quantized.onnx").exists():
+        logger.info(f"Cuantizando {model_id} a int8 (dinámica) en {quantized_dir}")
+        quantizer = ORTQuantizer.from_pretrained(export_dir)
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=quantized_dir, quantization_config=qconfig)
+    return quantized_dir, "model_quantized.onnx"
+
+
+def _build_onnx(model_id: str, quantize: bool = False):
+    model_dir, file_name = _export_onnx(model_id, quantize)
+
+    from optimum.onnxruntime import ORTModelForImageClassification
+    from transformers import AutoImageProcessor
+    model = ORTModelForImageClassification.from_pretrained(model_dir, file_name=file_name)
+    image_processor = AutoImageProcessor.from_pretrained(model_id, use_fast=True)
+    return pipeline("image-classification", model=model, image_processor=image_processor)
+
+
+def build_classifier(backend: str = None, model_id: str = None):
+    """Construye el pipeline de clasificación para el backend indicado."""
+    backend = (backend or settings.AI_INFERENCE_BACKEND).lower()
+    model_id = model_id or settings.AI_MODEL_ID
+
+    if backend == "pytorch":
+        return _build_pytorch(model_id)
+    if backend == "pytorch-int8":
+        return _build_pytorch_int8(model_id)
+    if backend == "onnx":
+        return _build_onnx(model_id)
+    if backend == "onnx-int8":
+        return _build_onnx(model_id, quantize=True)
+    raise ValueError(f"AI_INFERENCE_BACKEND no soportado: {backend} (opciones: {', '.join(SUPPORTED_BACKENDS)})")
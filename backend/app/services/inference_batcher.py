@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Función que recibe una lista de imágenes y devuelve un resultado (o excepción) por imagen
+BatchRunner = Callable[[list], Awaitable[list]]
+
+
+class InferenceQueueFullError(RuntimeError):
+    """La cola de inferencia alcanzó su capacidad máxima."""
+
+
+class InferenceBatcher:
+    """
+    Planificador de micro-lotes para la clasificación IA.
+
+    Las solicitudes concurrentes se encolan y un único worker las agrupa en
+    lotes limitados por tamaño máximo (max_batch_size) y ventana de espera
+    (max_wait_ms). Cada lote se ejecuta en una sola pasada del modelo y cada
+    resultado se entrega al future de la solicitud que lo pidió.
+    """
+
+    def __init__(
+        self,
+        run_batch: BatchRunner,
+        max_batch_size: int = settings.AI_BATCH_MAX_SIZE,
+        max_wait_ms: int = settings.AI_BATCH_MAX_WAIT_MS,
+        max_queue_size: int = settings.AI_BATCH_QUEUE_SIZE,
+    ):
+        self._run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self.max_queue_size = max_queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._item_added: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        """Arranca el worker en el event loop actual (o lo reinicia si cambió el loop)."""
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._item_added = asyncio.Event()
+        self._worker = loop.create_task(self._run())
+
+    async def submit(self, item):
+        """Encola una imagen y espera su resultado."""
+        self._ensure_started()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            raise InferenceQueueFullError("La cola de inferencia está llena, intenta más tarde")
+        self._item_added.set()
+        return await future
+
+    async def _collect_batch(self) -> list:
+        """Espera la primera solicitud y agrupa las que lleguen dentro de la ventana."""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            self._item_added.clear()
+            try:
+                await asyncio.wait_for(self._item_added.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            # Descartar solicitudes cuyo cliente ya canceló la espera
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                results = await self._run_batch([item for item, _ in batch])
+            except Exception as e:
+                logger.error(f"Error ejecutando lote de inferencia ({len(batch)} imágenes): {e}")
+                results = [e] * len(batch)
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def close(self):
+        """Detiene el worker y falla las solicitudes que quedaron en cola."""
+        if self._worker is None:
+            return
+        if self._loop is asyncio.get_running_loop():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("El servicio de inferencia se detuvo"))
+        self._worker = None
+
+
+_batcher: Optional[InferenceBatcher] = None
+
+
+def get_inference_batcher() -> InferenceBatcher:
+    """Retorna el planificador compartido del proceso (creado de forma perezosa)."""
+    global _batcher
+    if _batcher is None:
+        from app.services.ai_service import AIService
+        from app.services.inference_pool import get_inference_pool
+        ai_service = AIService()
+        pool = get_inference_pool()
+
+        async def run_batch(images: list) -> list:
+            # La pasada del modelo es CPU-bound: se ejecuta fuera del event loop,
+            # en el pool de procesos si está habilitado o en un hilo si no
+            if pool is not None:
+                return await pool.run_batch(images)
+            return await asyncio.to_thread(ai_service.classify_waste_batch, images)
+
+        _batcher = InferenceBatcher(run_batch)
+    return _batcher
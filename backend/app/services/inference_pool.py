@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceTimeoutError(RuntimeError):
+    """La clasificación no terminó dentro del plazo AI_INFERENCE_DEADLINE_S (ver AdmissionController)."""
+
+
+# Estado del proceso worker (cada proceso del pool mantiene su propia copia del modelo)
+_worker_service = None
+
+
+def _init_worker(torch_threads: int):
+    """Inicializador de cada proceso: fija los hilos de torch y carga el modelo."""
+    global _worker_service
+    if torch_threads > 0:
+        # Debe fijarse antes de importar torch para que OpenMP/MKL lo respeten
+        os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+        os.environ["MKL_NUM_THREADS"] = str(torch_threads)
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+            torch.set_num_interop_threads(1)
+        except (ImportError, RuntimeError):
+            pass
+
+    from app.services.ai_service import AIService
+    AIService.warm_up()
+    _worker_service = AIService()
+
+
+def _classify_batch(images: list) -> list:
+    """Tarea ejecutada en el proceso worker."""
+    return _worker_service.classify_waste_batch(images)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _release_from_thread(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore):
+    """Libera el cupo desde el hilo que completa el future del executor."""
+    if not loop.is_closed():
+        loop.call_soon_threadsafe(semaphore.release)
+
+
+class InferenceProcessPool:
+    """
+    Pool de procesos para la inferencia, fuera del proceso de la API.
+
+    Cada proceso carga una copia del modelo y ejecuta lotes completos, así la
+    inferencia satura los núcleos sin competir por el GIL con el event loop.
+    - Contrapresión: como máximo `max_pending` lotes en los workers; el resto
+      espera su turno (y esa espera cuenta dentro del plazo de la solicitud,
+      que aplica AdmissionController). Un lote cuyo plazo venció conserva su
+      cupo hasta que el worker lo termina.
+    - Si un worker muere (BrokenProcessPool) el pool se recrea y el lote se
+      reintenta una vez.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.AI_PROCESS_POOL_WORKERS,
+        torch_threads: int = settings.AI_POOL_TORCH_THREADS,
+        max_pending: Optional[int] = None,
+        initializer: Optional[Callable] = _init_worker,
+        task: Callable = _classify_batch,
+        start_method: str = settings.AI_POOL_START_METHOD,
+    ):
+        self.workers = max(1, workers)
+        self.torch_threads = torch_threads
+        self.max_pending = max_pending or self.workers * 2
+        self._initializer = initializer
+        self._task = task
+        self._start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.restarts = 0
+        self.ready = False
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self._start_method),
+                initializer=self._initializer,
+                initargs=(self.torch_threads,) if self._initializer is _init_worker else (),
+            )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+            self._loop = loop
+        return self._semaphore
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """Descarta un executor roto; el siguiente lote crea uno nuevo."""
+        if self._executor is broken:
+            self._executor = None
+            self.restarts += 1
+            broken.shutdown(wait=False, cancel_futures=True)
+            logger.warning(f"Worker de inferencia caído; se recrea el pool (reinicio #{self.restarts})")
+
+    async def _submit(self, images: list) -> list:
+        """
+        Envía el lote a un worker. El cupo del semáforo se libera cuando termina
+        el trabajo en el worker, no cuando deja de esperarlo quien llamó: si el
+        plazo de la solicitud vence, el lote sigue ocupando su lugar hasta acabar.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore()
+        for attempt in range(2):
+            await semaphore.acquire()
+            executor = self._get_executor()
+            try:
+                future = executor.submit(self._task, images)
+            except BaseException:
+                semaphore.release()
+                raise
+            future.add_done_callback(lambda _: _release_from_thread(loop, semaphore))
+            try:
+                return await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                self._restart(executor)
+                if attempt == 1:
+                    raise RuntimeError("El worker de inferencia falló al procesar el lote")
+
+    async def run_batch(self, images: list) -> list:
+        """
+        Clasifica un lote en un proceso worker respetando la contrapresión.
+        El plazo de la solicitud lo aplica el control de admisión.
+        """
+        return await self._submit(images)
+
+    async def warm_up(self):
+        """Arranca todos los workers (y carga sus modelos) antes de recibir tráfico."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, _ping) for _ in range(self.workers)
+        ))
+        self.ready = True
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.ready = False
+
+
+_pool: Optional[InferenceProcessPool] = None
+
+
+def get_inference_pool() -> Optional[InferenceProcessPool]:
+    """Retorna el pool compartido, o None si AI_PROCESS_POOL_WORKERS es 0."""
+    global _pool
+    if settings.AI_PROCESS_POOL_WORKERS <= 0:
+        return None
+    if _pool is None:
+        _pool = InferenceProcessPool()
+    return _pool
@@ -0,0 +1,185 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import func
+from app.core.config import settings
+from app.core.leader import LeaderLock
+from app.models.report import Report
+from app.services.priority_service import PriorityService
+from app.services.report_service import ReportService
+
+logger = logging.getLogger(__name__)
+
+
+def next_threshold(created_at: datetime, after: datetime) -> Optional[datetime]:
+    """Próximo momento posterior a `after` en que la exposición del reporte cruza un umbral (None si ya cruzó todos)."""
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    for hours in PriorityService.EXPOSURE_THRESHOLDS_HOURS:
+        crossing = created_at + timedelta(hours=hours)
+        if crossing > after:
+            return crossing
+    return None
+
+
+class PriorityAgingScheduler:
+    """
+    Envejecimiento de prioridades: la prioridad de un reporte solo cambia con el
+    tiempo cuando su exposición cruza 24h, 72h o 168h. El programador guarda en
+    un heap el próximo cruce de cada reporte, duerme hasta el primero y recalcula
+    solo los reportes vencidos, por lotes.
+
+    Solo los reportes de los últimos 7 días tienen cruces pendientes, así que el
+    heap no crece con el histórico. La primera pasada recalcula todos los reportes
+    activos (cruces ocurridos mientras la aplicación estaba detenida); los reportes
+    nuevos se agregan buscando ids mayores al último visto cada SCAN_S.
+
+    Todos los workers lo arrancan, pero solo trabaja el que tiene el LeaderLock
+    (un solo recálculo inicial y un solo heap); los demás reintentan tomarlo
+    cada SCAN_S por si el líder muere.
+    """
+
+    LEADER_NAME = "priority_aging"
+
+    def __init__(
+        self,
+        batch_size: int = settings.PRIORITY_AGING_BATCH_SIZE,
+        scan_seconds: float = settings.PRIORITY_AGING_SCAN_S,
+        session_factory=None,
+    ):
+        self.batch_size = batch_size
+        self.scan_seconds = scan_seconds
+        self._session_factory = session_factory
+        self._heap: list = []  # (cruce, report_id, created_at)
+        self._last_id = 0
+        self._loaded = False
+        self._leader: Optional[LeaderLock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.last_result: Optional[dict] = None
+
+    def _new_session(self):
+        if self._session_factory is None:
+            from app.core.database import SessionLocal
+            return SessionLocal()
+        return self._session_factory()
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap)
+
+    def next_due(self) -> Optional[datetime]:
+        return self._heap[0][0] if self._heap else None
+
+    def schedule(self, report_id: int, created_at: Optional[datetime], now: datetime):
+        """Agrega el próximo cruce del reporte (nada si no le quedan)."""
+        if created_at is None:
+            return
+        crossing = next_threshold(created_at, now)
+        if crossing is not None:
+            heapq.heappush(self._heap, (crossing, report_id, created_at))
+
+    def _scan(self, db, now: datetime, *criteria) -> int:
+        """Programa los reportes con id mayor al último visto (recorrido por la clave primaria)."""
+        added = 0
+        while True:
+            rows = db.query(Report.id, Report.created_at).filter(
+                Report.id > self._last_id, *criteria
+            ).order_by(Report.id).limit(self.batch_size).all()
+            for report_id, created_at in rows:
+                self.schedule(report_id, created_at, now)
+            added += len(rows)
+            if rows:
+                self._last_id = rows[-1][0]
+            if len(rows) < self.batch_size:
+                return added
+
+    def load(self, db, now: datetime) -> dict:
+        """Primera pasada: recálculo completo y carga de los reportes con cruces pendientes."""
+        result = ReportService.recalculate_all_priorities(db, now=now)
+        last_id = db.query(func.max(Report.id)).scalar() or 0
+        oldest = now - timedelta(hours=max(PriorityService.EXPOSURE_THRESHOLDS_HOURS))
+        self._scan(db, now, Report.created_at > oldest, Report.id <= last_id)
+        self._last_id = last_id
+        self._loaded = True
+        return result
+
+    def run_due(self, db, now: datetime) -> dict:
+        """Recalcula, por lotes de batch_size, los reportes cuyo cruce ya llegó y los reprograma."""
+        total = {"total_checked": 0, "updated": 0}
+        while self._heap and self._heap[0][0] <= now:
+            batch = []
+            while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                batch.append(heapq.heappop(self._heap))
+            try:
+                result = ReportService.recalculate_priorities(db, [report_id for _, report_id, _ in batch], now=now)
+            except Exception:
+                for entry in batch:
+                    heapq.heappush(self._heap, entry)
+                raise
+            total["total_checked"] += result["total_checked"]
+            total["updated"] += result["updated"]
+            for _, report_id, created_at in batch:
+                self.schedule(report_id, created_at, now)
+        return total
+
+    def run_once(self, now: Optional[datetime] = None) -> Optional[dict]:
+        """Una pasada del programador; None si otro worker tiene el lock."""
+        now = now or datetime.now(timezone.utc)
+        with self._new_session() as db:
+            if self._leader is None:
+                self._leader = LeaderLock(self.LEADER_NAME, db.get_bind())
+            if not self._leader.acquire():
+                # Si lo vuelve a tomar más adelante, empieza con una primera pasada completa
+                self._heap.clear()
+                self._loaded = False
+                return None
+            if not self._loaded:
+                result = self.load(db, now)
+            else:
+                self._scan(db, now)
+                result = self.run_due(db, now)
+        self.last_result = result
+        if result["updated"]:
+            logger.info(f"Envejecimiento de prioridades: {result['updated']} de {result['total_checked']} reportes actualizados")
+        return result
+
+    def _delay(self) -> float:
+        """Segundos hasta el próximo cruce, sin pasar de scan_seconds (búsqueda de reportes nuevos)."""
+        due = self.next_due()
+        if due is None:
+            return self.scan_seconds
+        return max(0.0, min(self.scan_seconds, (due - datetime.now(timezone.utc)).total_seconds()))
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+                delay = self._delay()
+            except Exception as e:
+                logger.error(f"Falló el envejecimiento de prioridades: {e}")
+                delay = self.scan_seconds
+            await asyncio.sleep(delay)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._leader is not None:
+            await asyncio.to_thread(self._leader.release)
+
+
+_scheduler: Optional[PriorityAgingScheduler] = None
+
+
+def get_priority_aging_scheduler() -> PriorityAgingScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PriorityAgingScheduler()
+    return _scheduler
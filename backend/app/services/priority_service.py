@@ -1,5 +1,6 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+from sqlalchemy import case, func
 
 class PriorityService:
     """
@@ -28,12 +29,29 @@ class PriorityService:
         "unknown": 2,
     }
 
+    TYPE_MAPPINGS = {
+        "batteries": "battery",
+        "e_waste": "e-waste",
+        "ewaste": "e-waste",
+        "electronic": "electronics",
+        "plastics": "plastic",
+        "papers": "paper",
+        "organics": "organic",
+        "foods": "food",
+        "glasses": "glass",
+        "metals": "metal",
+        "medicals": "medical",
+    }
+
     SIZE_WEIGHTS = {
         "small": 1,
         "medium": 2,
         "large": 3,
     }
 
+    # Horas de exposición en que sube el peso de exposición (0 → 1 → 2 → 3)
+    EXPOSURE_THRESHOLDS_HOURS = (24, 72, 168)
+
     @staticmethod
     def estimate_size_from_confidence(confidence_score: float) -> str:
         if confidence_score >= 80:
@@ -44,42 +62,22 @@ class PriorityService:
             return "large"
 
     @staticmethod
-    def get_exposure_time_hours(created_at: datetime) -> float:
-        now = datetime.now(timezone.utc)
+    def get_exposure_time_hours(created_at: datetime, now: Optional[datetime] = None) -> float:
+        now = now or datetime.now(timezone.utc)
         if created_at.tzinfo is None:
             created_at = created_at.replace(tzinfo=timezone.utc)
         return (now - created_at).total_seconds() / 3600
 
     @staticmethod
     def calculate_exposure_weight(hours: float) -> int:
-        if hours < 24:
-            return 0
-        elif hours < 72:
-            return 1
-        elif hours < 168:
-            return 2
-        else:
-            return 3
+        return sum(1 for threshold in PriorityService.EXPOSURE_THRESHOLDS_HOURS if hours >= threshold)
 
     @staticmethod
     def normalize_waste_type(waste_type: Optional[str]) -> str:
         if not waste_type:
             return "unknown"
         waste_type_lower = waste_type.lower().strip()
-        type_mappings = {
-            "batteries": "battery",
-            "e_waste": "e-waste",
-            "ewaste": "e-waste",
-            "electronic": "electronics",
-            "plastics": "plastic",
-            "papers": "paper",
-            "organics": "organic",
-            "foods": "food",
-            "glasses": "glass",
-            "metals": "metal",
-            "medicals": "medical",
-        }
-        normalized = type_mappings.get(waste_type_lower, waste_type_lower)
+        normalized = PriorityService.TYPE_MAPPINGS.get(waste_type_lower, waste_type_lower)
         if normalized not in PriorityService.WASTE_TYPE_WEIGHTS:
             return "trash"
         return normalized
@@ -88,7 +86,8 @@ class PriorityService:
     def calculate_priority(
         waste_type: Optional[str],
         confidence_score: Optional[float],
-        created_at: datetime
+        created_at: datetime,
+        now: Optional[datetime] = None
     ) -> tuple[int, str]:
         score = 0
         normalized_type = PriorityService.normalize_waste_type(waste_type)
@@ -102,7 +101,7 @@ class PriorityService:
         else:
             score += 2
 
-        exposure_hours = PriorityService.get_exposure_time_hours(created_at)
+        exposure_hours = PriorityService.get_exposure_time_hours(created_at, now)
         exposure_weight = PriorityService.calculate_exposure_weight(exposure_hours)
         score += exposure_weight
 
@@ -113,6 +112,44 @@ class PriorityService:
         else:
             return 1, "Low"
 
+    @staticmethod
+    def priority_expression(waste_type, confidence_score, created_at, now: Optional[datetime] = None):
+        """
+        Las mismas reglas de calculate_priority como expresión SQL (CASE) sobre
+        las columnas dadas, para recalcular prioridades con un solo UPDATE.
+
+        La exposición se compara contra fechas de corte calculadas aquí, así que
+        no depende de funciones de fecha del motor.
+        """
+        now = now or datetime.now(timezone.utc)
+
+        names_by_weight = {}
+        for name in (*PriorityService.WASTE_TYPE_WEIGHTS, *PriorityService.TYPE_MAPPINGS):
+            weight = PriorityService.WASTE_TYPE_WEIGHTS[PriorityService.TYPE_MAPPINGS.get(name, name)]
+            names_by_weight.setdefault(weight, []).append(name)
+        normalized = func.lower(func.trim(waste_type))
+        # Sin tipo ("unknown") o tipo no reconocido ("trash"): peso 2
+        type_weight = case(
+            *[(normalized.in_(names), weight) for weight, names in sorted(names_by_weight.items(), reverse=True)],
+            else_=PriorityService.WASTE_TYPE_WEIGHTS["trash"],
+        )
+
+        size_weight = case(
+            (confidence_score.is_(None), 2),
+            (confidence_score >= 80, PriorityService.SIZE_WEIGHTS["small"]),
+            (confidence_score >= 60, PriorityService.SIZE_WEIGHTS["medium"]),
+            else_=PriorityService.SIZE_WEIGHTS["large"],
+        )
+
+        exposure_weight = case(
+            *[(created_at <= now - timedelta(hours=threshold), weight)
+              for weight, threshold in sorted(enumerate(PriorityService.EXPOSURE_THRESHOLDS_HOURS, 1), reverse=True)],
+            else_=0,
+        )
+
+        score = type_weight + size_weight + exposure_weight
+        return case((score >= 8, 3), (score >= 5, 2), else_=1)
+
     def __init__(self, db: Optional[object] = None):
         """Optional DB session parameter for future DB-backed weights.
 
@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+from pydantic import ValidationError
+from app.core.config import settings
+from app.models.report import Report
+from app.models.user import User
+from app.schemas.report import ReportBatchItem, ReportBatchItemResult, ReportBatchResponse
+from app.services.ai_service import AIService
+from app.services.image_asset_service import ImageAssetService
+from app.services.image_preprocessing import DecodedImage
+from app.services.priority_service import PriorityService
+from app.services.report_pipeline import OVERLOAD_ERRORS, ReportPipeline
+from app.services.report_service import DEFAULT_POINTS, POINTS_BY_WASTE_TYPE, ReportService
+
+logger = logging.getLogger(__name__)
+
+
+class ReportBatchService:
+    """
+    Carga masiva de reportes (equipos de campo / apps aliadas que sincronizan
+    lo recolectado sin conexión).
+
+    En lugar de pagar por cada reporte su propia solicitud, inferencia, commit
+    y actualización de puntos:
+    - las imágenes sin clasificar se clasifican en lotes,
+    - las subidas (normalización + derivados + storage) corren en paralelo,
+    - todos los reportes se insertan con un solo INSERT de varias filas,
+    - los puntos se suman con un solo UPDATE agregado por usuario.
+
+    Un reporte inválido no hace fallar al resto: cada entrada tiene su resultado.
+    """
+
+    @staticmethod
+    def parse_manifest(manifest: str) -> list:
+        """Acepta un arreglo JSON o NDJSON (un objeto JSON por línea)."""
+        text = (manifest or "").strip()
+        try:
+            if text.startswith("["):
+                items = json.loads(text)
+            else:
+                items = [json.loads(line) for line in text.splitlines() if line.strip()]
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Manifiesto inválido: {e}") from e
+        if not items:
+            raise ValueError("El manifiesto no contiene reportes")
+        if len(items) > settings.REPORT_BATCH_MAX_ITEMS:
+            raise ValueError(f"Máximo {settings.REPORT_BATCH_MAX_ITEMS} reportes por carga")
+        return items
+
+    @staticmethod
+    def _existing_user_ids(db, user_ids: set) -> set:
+        """Cuáles de los usuarios asignados existen (una sola consulta para todo el lote)."""
+        if not user_ids:
+            return set()
+        return {user_id for (user_id,) in db.query(User.id).filter(User.id.in_(user_ids)).all()}
+
+    @staticmethod
+    def _resolve_user_id(item: ReportBatchItem, current_user, existing_user_ids: set) -> Optional[int]:
+        if item.user_id is None:
+            return current_user.id if current_user else None
+        if current_user is None or current_user.role != "admin":
+            raise ValueError("Solo un administrador puede asignar reportes a otros usuarios")
+        if item.user_id not in existing_user_ids:
+            # Con una FK inválida fallaría el INSERT compartido de todo el lote
+            raise ValueError(f"El usuario {item.user_id} no existe")
+        return item.user_id
+
+    @staticmethod
+    async def _classify(db, entries: list):
+        """Completa entry["classification"] (índice de contenido o lote del modelo)."""
+        pending = []
+        for entry in entries:
+            if entry["item"].ai_classification is not None:
+                continue
+            asset = ImageAssetService.get_by_source_hash(db, hashlib.sha256(entry["bytes"]).hexdigest())
+            cached = ImageAssetService.cached_classification(asset)
+            if cached is not None:
+                entry["classification"] = cached
+            else:
+                pending.append(entry)
+        if not pending:
+            return
+
+        results = await AIService().classify_waste_batch_async(
+            [entry["bytes"] for entry in pending],
+            decoded=[entry["decoded"] for entry in pending],
+        )
+        for entry, result in zip(pending, results):
+            if isinstance(result, OVERLOAD_ERRORS) and settings.AI_DEFER_ON_OVERLOAD:
+                continue  # el pipeline la reintenta y, si sigue sin capacidad, la difiere
+            if isinstance(result, Exception):
+                entry["error"] = str(result)
+            else:
+                entry["classification"] = result
+
+    @staticmethod
+    async def _store(db, entries: list):
+        """
+        Sube las imágenes en paralelo (acotado) reutilizando el pipeline de reportes.
+
+        Las tareas comparten la sesión solo para leer el índice de contenido: sus
+        entradas nuevas quedan en entry["pipeline"].asset y se guardan después, en
+        la misma transacción que los reportes.
+        """
+        semaphore = asyncio.Semaphore(settings.REPORT_BATCH_UPLOAD_CONCURRENCY)
+
+        async def store(entry):
+            async with semaphore:
+                try:
+                    entry["pipeline"] = await ReportPipeline.run(
+                        file_bytes=entry["bytes"],
+                        original_filename=entry["item"].image,
+                        ai_result=entry["item"].ai_classification,
+                        db=db,
+                        defer_on_overload=settings.AI_DEFER_ON_OVERLOAD,
+                        model_classification=entry.get("classification"),
+                        decoded=entry["decoded"],
+                        register_asset=False,
+                    )
+                except Exception as e:
+                    entry["error"] = str(e)
+
+        await asyncio.gather(*(store(entry) for entry in entries))
+
+    @staticmethod
+    async def ingest(db, manifest: list, files: dict, current_user=None):
+        """
+        Crea los reportes del manifiesto.
+
+        Args:
+            db: Sesión de base de datos
+            manifest: Entradas ya parseadas (dicts) del manifiesto
+            files: Nombre de archivo → bytes de la imagen, o la excepción al leerla
+            current_user: Usuario autenticado (None para cargas anónimas)
+
+        Returns:
+            (ReportBatchResponse, [(report_id, bytes)] de los reportes con clasificación diferida)
+        """
+        results = [None] * len(manifest)
+        items = []
+        for index, raw in enumerate(manifest):
+            image = raw.get("image") if isinstance(raw, dict) else None
+            try:
+                items.append((index, ReportBatchItem.model_validate(raw)))
+            except ValidationError as e:
+                results[index] = ReportBatchItemResult(index=index, image=image, status="error", error=str(e))
+        existing_user_ids = ReportBatchService._existing_user_ids(
+            db, {item.user_id for _, item in items if item.user_id is not None}
+        )
+
+        entries = []
+        for index, item in items:
+            try:
+                user_id = ReportBatchService._resolve_user_id(item, current_user, existing_user_ids)
+                file_bytes = files.get(item.image)
+                if file_bytes is None:
+                    raise ValueError(f"La imagen '{item.image}' no se incluyó en la solicitud")
+                if isinstance(file_bytes, Exception):
+                    raise file_bytes
+            except ValueError as e:
+                results[index] = ReportBatchItemResult(index=index, image=item.image, status="error", error=str(e))
+                continue
+            entries.append({
+                "index": index, "item": item, "user_id": user_id,
+                "bytes": file_bytes, "decoded": DecodedImage(file_bytes),
+            })
+
+        await ReportBatchService._classify(db, entries)
+        await ReportBatchService._store(db, [e for e in entries if "error" not in e])
+
+        # Un solo flush de todas las filas (en PostgreSQL el ORM lo emite como un único
+        # INSERT ... VALUES ... RETURNING) + un solo UPDATE de puntos, en la misma transacción
+        # que las entradas nuevas del índice de contenido
+        now = datetime.now(timezone.utc)
+        created, points_by_user = [], {}
+        for entry in entries:
+            if "error" in entry:
+                results[entry["index"]] = ReportBatchItemResult(
+                    index=entry["index"], image=entry["item"].image, status="error", error=entry["error"]
+                )
+                continue
+            item, pipeline = entry["item"], entry["pipeline"]
+            classification = pipeline.ai_classification
+            waste_type = classification.get("type") if classification is not None else None
+            confidence_score = classification.get("confidence") if classification is not None else None
+            priority, _ = PriorityService.calculate_priority(waste_type, confidence_score, now)
+            report = Report(
+                latitude=item.latitude,
+                longitude=item.longitude,
+                description=item.description,
+                image_url=pipeline.image_url,
+                address=item.address,
+                waste_type=waste_type,
+                manual_classification=item.manual_classification,
+                confidence_score=confidence_score,
+                classification_status="classified" if classification is not None else "pending",
+                status="pending",
+                priority=priority,
+                user_id=entry["user_id"],
+            )
+            if pipeline.image_derivatives:
+                ReportService.set_image_derivatives(report, pipeline.image_derivatives)
+
+            points = 0
+            if classification is not None and entry["user_id"]:
+                points = POINTS_BY_WASTE_TYPE.get((waste_type or "").lower(), DEFAULT_POINTS)
+                points_by_user[entry["user_id"]] = points_by_user.get(entry["user_id"], 0) + points
+            created.append((entry, report, points))
+
+        ImageAssetService.register_many(
+            db, [entry["pipeline"].asset for entry, _, _ in created if entry["pipeline"].asset is not None]
+        )
+        db.add_all([report for _, report, _ in created])
+        db.flush()
+
+        deferred, urgent = [], []
+        for entry, report, points in created:
+            results[entry["index"]] = ReportBatchItemResult(
+                index=entry["index"],
+                image=entry["item"].image,
+                status="created",
+                report_id=report.id,
+                classification_status=report.classification_status,
+                priority=report.priority,
+                points_earned=points,
+            )
+            if report.classification_status == "pending":
+                deferred.append((report.id, entry["bytes"]))
+            if report.priority == 3:
+                urgent.append(report)
+
+        ReportService.add_points_bulk(db, points_by_user)
+        db.commit()
+        for report in urgent:
+            await ReportService._generate_urgent_alert(report)
+
+        logger.info(f"Carga masiva: {len(created)} reportes creados, {len(manifest) - len(created)} con error")
+        response = ReportBatchResponse(
+            created=len(created),
+            failed=len(manifest) - len(created),
+            results=results,
+        )
+        return response, deferred
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from typing import Optional
+from sqlalchemy import delete, func, insert, select, text, update
+from app.core.config import settings
+from app.core.leader import LeaderLock
+from app.models.report import Report
+from app.models.report_counter import ReportCounter
+
+logger = logging.getLogger(__name__)
+
+counters = ReportCounter.__table__
+
+
+def counter_key(status, priority, waste_type) -> tuple:
+    """Clave de report_counters (nulos como "" y 0)."""
+    return (status or "", priority or 0, waste_type or "")
+
+
+class ReportCounterService:
+    """
+    Mantenimiento de la tabla report_counters.
+
+    Los cambios en reportes se aplican como diferencias (+1/-1 por clave) dentro
+    de la misma transacción que el cambio, desde el seguimiento de escrituras de
+    la sesión (ver report_counts); `reconcile` recalcula la tabla desde reports
+    y corrige cualquier diferencia.
+    """
+
+    @staticmethod
+    def apply(connection, deltas: dict):
+        """
+        Suma las diferencias {(status, priority, waste_type): delta} a la tabla.
+
+        Las claves se aplican ordenadas para que dos transacciones concurrentes
+        bloqueen las filas en el mismo orden.
+        """
+        dialect = connection.dialect.name
+        for key in sorted(k for k, delta in deltas.items() if delta):
+            delta = deltas[key]
+            values = dict(zip(("status", "priority", "waste_type"), key))
+            if dialect in ("postgresql", "sqlite"):
+                if dialect == "postgresql":
+                    from sqlalchemy.dialects.postgresql import insert as upsert
+                else:
+                    from sqlalchemy.dialects.sqlite import insert as upsert
+                statement = upsert(counters).values(**values, count=delta).on_conflict_do_update(
+                    index_elements=[counters.c.status, counters.c.priority, counters.c.waste_type],
+                    set_={"count": counters.c.count + delta},
+                )
+                connection.execute(statement)
+                continue
+            result = connection.execute(
+                update(counters).where(*ReportCounterService._match(values)).values(count=counters.c.count + delta)
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(counters).values(**values, count=delta))
+
+    @staticmethod
+    def _match(values: dict):
+        return [counters.c[column] == value for column, value in values.items()]
+
+    @staticmethod
+    def read(db) -> list:
+        """Filas (status, priority, waste_type, count) con los nulos restaurados."""
+        rows = db.query(
+            ReportCounter.status, ReportCounter.priority, ReportCounter.waste_type, ReportCounter.count
+        ).all()
+        return [(status or None, priority or None, waste_type or None, count) for status, priority, waste_type, count in rows]
+
+    @staticmethod
+    def backfill(connection) -> Optional[dict]:
+        """
+        Llena report_counters si está vacía (base existente antes de la tabla).
+        Se ejecuta al arrancar, antes de atender solicitudes, para que las
+        estadísticas no lean ceros; retorna None si la tabla ya tenía filas.
+        """
+        if connection.dialect.name == "postgresql":
+            # Los workers que arrancan a la vez esperan al primero y luego ven la tabla llena
+            connection.execute(text("LOCK TABLE report_counters IN EXCLUSIVE MODE"))
+        if connection.execute(select(counters.c.status).limit(1)).first() is not None:
+            return None
+        result = ReportCounterService.reconcile(connection)
+        logger.info(f"report_counters inicializada: {result['repaired']} claves")
+        return result
+
+    @staticmethod
+    def reconcile(connection) -> dict:
+        """
+        Compara report_counters con un GROUP BY sobre reports y corrige las
+        diferencias en la conexión (transacción) dada.
+
+        Returns:
+            {"checked": claves revisadas, "repaired": claves corregidas}
+        """
+        if connection.dialect.name == "postgresql":
+            # Espera a las transacciones que están aplicando diferencias y bloquea
+            # las nuevas hasta terminar, para no pisarlas con un conteo ya viejo
+            connection.execute(text("LOCK TABLE report_counters IN EXCLUSIVE MODE"))
+
+        grouped = connection.execute(
+            select(Report.status, Report.priority, Report.waste_type, func.count(Report.id))
+            .group_by(Report.status, Report.priority, Report.waste_type)
+        ).all()
+        actual = {}
+        for status, priority, waste_type, count in grouped:
+            key = counter_key(status, priority, waste_type)
+            actual[key] = actual.get(key, 0) + count
+        stored = {
+            (status, priority, waste_type): count
+            for status, priority, waste_type, count in connection.execute(
+                select(counters.c.status, counters.c.priority, counters.c.waste_type, counters.c.count)
+            ).all()
+        }
+
+        repaired = 0
+        for key in sorted(set(actual) | set(stored)):
+            expected = actual.get(key, 0)
+            if stored.get(key) == expected or (expected == 0 and key not in stored):
+                continue
+            repaired += 1
+            values = dict(zip(("status", "priority", "waste_type"), key))
+            connection.execute(delete(counters).where(*ReportCounterService._match(values)))
+            if expected:
+                connection.execute(insert(counters).values(**values, count=expected))
+            logger.warning(f"report_counters {key}: {stored.get(key, 0)} → {expected}")
+        return {"checked": len(set(actual) | set(stored)), "repaired": repaired}
+
+
+class ReportCounterReconciler:
+    """
+    Tarea periódica de reconciliación de report_counters, cada
+    REPORT_COUNTERS_RECONCILE_S (la carga inicial la hace `backfill` al
+    arrancar). Todos los workers la arrancan, pero solo la ejecuta el que
+    tiene el LeaderLock, para no repetir el LOCK TABLE en cada worker.
+    """
+
+    LEADER_NAME = "report_counters_reconcile"
+
+    def __init__(self, interval_seconds: float = settings.REPORT_COUNTERS_RECONCILE_S, session_factory=None):
+        self.interval_seconds = interval_seconds
+        self._session_factory = session_factory
+        self._leader: Optional[LeaderLock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.last_result: Optional[dict] = None
+
+    def _new_session(self):
+        if self._session_factory is None:
+            from app.core.database import SessionLocal
+            return SessionLocal()
+        return self._session_factory()
+
+    def run_once(self) -> Optional[dict]:
+        """Una pasada de reconciliación; None si otro worker tiene el lock."""
+        with self._new_session() as db:
+            if self._leader is None:
+                self._leader = LeaderLock(self.LEADER_NAME, db.get_bind())
+            if not self._leader.acquire():
+                return None
+            result = ReportCounterService.reconcile(db.connection())
+            db.commit()
+        self.last_result = result
+        if result["repaired"]:
+            logger.warning(f"Reconciliación de report_counters: {result['repaired']} claves corregidas")
+        return result
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"Falló la reconciliación de report_counters: {e}")
+
+    def start(self):
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._leader is not None:
+            await asyncio.to_thread(self._leader.release)
+
+
+_reconciler: Optional[ReportCounterReconciler] = None
+
+
+def get_counter_reconciler() -> ReportCounterReconciler:
+    global _reconciler
+    if _reconciler is None:
+        _reconciler = ReportCounterReconciler()
+    return _reconciler
@@ -0,0 +1,274 @@
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable, Optional
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.report import Report
+from app.services.report_counter_service import ReportCounterService, counter_key
+
+logger = logging.getLogger(__name__)
+
+COUNT_MODES = ("none", "approximate", "exact")
+
+# Columnas por las que se filtran los listados (clave de los contadores)
+COUNTED_COLUMNS = ("status", "priority", "waste_type", "user_id")
+
+# Máximo de combinaciones de filtros con conteo exacto en caché
+EXACT_CACHE_MAX_ENTRIES = 1024
+
+
+class ReportCounts:
+    """
+    Totales de los listados de reportes sin un COUNT(*) por solicitud.
+
+    - "approximate": contadores por combinación (status, priority, waste_type,
+      user_id), cargados con un solo GROUP BY y mantenidos con los cambios que
+      este proceso confirma. Los cambios de otros workers se ven al recargar
+      (cada REPORT_COUNT_REFRESH_S).
+    - "exact": COUNT de la combinación de filtros, guardado hasta
+      REPORT_COUNT_CACHE_TTL_S y descartado en cuanto este proceso confirma un
+      cambio en reportes.
+    - "none": sin total.
+
+    Hay un estado por engine, para que bases distintas (p. ej. en pruebas) no
+    compartan conteos.
+    """
+
+    def __init__(self, exact_ttl_seconds: float = None, refresh_seconds: float = None):
+        self.exact_ttl_seconds = exact_ttl_seconds
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._counters: Optional[dict] = None  # (status, priority, waste_type, user_id) → total
+        self._loaded_at = 0.0
+        self._exact: "OrderedDict[tuple, tuple[float, int]]" = OrderedDict()
+        self._generation = 0  # cambia con cada escritura confirmada
+
+    @property
+    def generation(self) -> int:
+        """Cambia con cada escritura de reportes confirmada en este proceso."""
+        return self._generation
+
+    @staticmethod
+    def filter_key(**filters) -> tuple:
+        return tuple(filters.get(column) for column in COUNTED_COLUMNS)
+
+    def count(self, db, mode: str, filters: dict, count_query: Callable[[], int]) -> tuple[Optional[int], str]:
+        """
+        Total de los reportes que cumplen `filters` según el modo pedido.
+
+        Returns:
+            (total o None, modo efectivo)
+        """
+        if mode not in COUNT_MODES:
+            raise ValueError(f"Modo de conteo inválido: {mode} (use none, approximate o exact)")
+        if mode == "none":
+            return None, "none"
+        if mode == "approximate":
+            return self._approximate(db, filters), "approximate"
+        return self._exact_count(filters, count_query), "exact"
+
+    def _exact_count(self, filters: dict, count_query: Callable[[], int]) -> int:
+        key = self.filter_key(**filters)
+        ttl = settings.REPORT_COUNT_CACHE_TTL_S if self.exact_ttl_seconds is None else self.exact_ttl_seconds
+        with self._lock:
+            cached = self._exact.get(key)
+            if cached is not None and time.monotonic() - cached[0] <= ttl:
+                return cached[1]
+            generation = self._generation
+
+        total = count_query()
+        with self._lock:
+            # Si hubo una escritura mientras se contaba, el resultado ya no es seguro de guardar
+            if ttl > 0 and generation == self._generation:
+                self._exact[key] = (time.monotonic(), total)
+                self._exact.move_to_end(key)
+                while len(self._exact) > EXACT_CACHE_MAX_ENTRIES:
+                    self._exact.popitem(last=False)
+        return total
+
+    def _approximate(self, db, filters: dict) -> int:
+        refresh = settings.REPORT_COUNT_REFRESH_S if self.refresh_seconds is None else self.refresh_seconds
+        with self._lock:
+            counters = self._counters
+            stale = counters is None or time.monotonic() - self._loaded_at > refresh
+        if stale:
+            counters = self.reload(db)
+
+        wanted = self.filter_key(**filters)
+        return sum(
+            total for key, total in counters.items()
+            if all(value is None or value == actual for value, actual in zip(wanted, key))
+        )
+
+    def reload(self, db) -> dict:
+        """Recarga los contadores con un solo GROUP BY sobre reportes."""
+        columns = [getattr(Report, column) for column in COUNTED_COLUMNS]
+        rows = db.query(*columns, func.count(Report.id)).group_by(*columns).all()
+        counters = {tuple(row[:-1]): row[-1] for row in rows}
+        with self._lock:
+            self._counters = counters
+            self._loaded_at = time.monotonic()
+        return counters
+
+    def apply(self, deltas: dict):
+        """Aplica los cambios confirmados: clave → diferencia de reportes."""
+        with self._lock:
+            self._generation += 1
+            self._exact.clear()
+            if self._counters is None:
+                return
+            for key, delta in deltas.items():
+                total = self._counters.get(key, 0) + delta
+                if total > 0:
+                    self._counters[key] = total
+                else:
+                    self._counters.pop(key, None)
+
+    def invalidate(self):
+        """Descarta todo (p. ej. tras un UPDATE masivo del que no se conocen las filas)."""
+        with self._lock:
+            self._generation += 1
+            self._exact.clear()
+            self._counters = None
+
+    def stats(self) -> dict:
+        return {
+            "exact_cached": len(self._exact),
+            "counter_keys": len(self._counters) if self._counters is not None else None,
+        }
+
+
+_counts: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_counts_lock = threading.Lock()
+
+
+def get_report_counts(db) -> ReportCounts:
+    """Retorna los conteos del engine de la sesión (uno por base de datos)."""
+    bind = db.get_bind()
+    with _counts_lock:
+        counts = _counts.get(bind)
+        if counts is None:
+            counts = _counts[bind] = ReportCounts()
+        return counts
+
+
+# ---- Seguimiento de escrituras ----
+
+PENDING_KEY = "report_count_deltas"
+
+
+def _key_of(report: Report, previous: bool = False) -> Optional[tuple]:
+    """
+    Clave de contadores del reporte; con previous, la de antes del flush
+    (None si un valor previo no estaba cargado y no se puede saber).
+    """
+    state = inspect(report)
+    values = []
+    for column in COUNTED_COLUMNS:
+        history = state.attrs[column].history
+        if not previous or not history.has_changes():
+            values.append(getattr(report, column))
+        elif history.deleted:
+            values.append(history.deleted[0])
+        else:
+            return None
+    return tuple(values)
+
+
+def _keep_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Cargar el valor anterior al modificar una columna contada (aunque el objeto
+# esté expirado), para conocer la clave de la que sale el reporte
+for _column in COUNTED_COLUMNS:
+    event.listen(getattr(Report, _column), "set", _keep_previous_value, active_history=True, retval=True)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_report_changes(session, flush_context):
+    """
+    Anota las diferencias de cada flush: los contadores en memoria las aplican
+    solo si la transacción confirma; report_counters se actualiza ya, dentro de
+    la misma transacción que el cambio.
+    """
+    changes = [obj for obj in (*session.new, *session.dirty, *session.deleted) if isinstance(obj, Report)]
+    if not changes:
+        return
+    flushed = {}
+
+    def add(key, delta):
+        flushed[key] = flushed.get(key, 0) + delta
+
+    for obj in changes:
+        if obj in session.new:
+            add(_key_of(obj), 1)
+        elif obj in session.deleted:
+            add(_key_of(obj, previous=True), -1)
+        else:
+            before, after = _key_of(obj, previous=True), _key_of(obj)
+            if before != after:
+                add(before, -1)
+                add(after, 1)
+
+    record_report_changes(session, flushed)
+
+
+def record_report_changes(session, deltas: dict):
+    """
+    Registra diferencias {(status, priority, waste_type, user_id): delta} de la
+    transacción de la sesión: se suman a report_counters en ella y a los
+    contadores en memoria al confirmar. Para escrituras hechas fuera del ORM
+    (p. ej. UPDATE masivos con conteo propio).
+    """
+    pending = session.info.setdefault(PENDING_KEY, {})
+    for key, delta in deltas.items():
+        pending[key] = pending.get(key, 0) + delta
+
+    if None in deltas:
+        ReportCounterService.reconcile(session.connection())
+        return
+    table_deltas = {}
+    for (status, priority, waste_type, _), delta in deltas.items():
+        key = counter_key(status, priority, waste_type)
+        table_deltas[key] = table_deltas.get(key, 0) + delta
+    ReportCounterService.apply(session.connection(), table_deltas)
+
+
+@event.listens_for(Session, "after_bulk_update")
+def _bulk_update(update_context):
+    if update_context.mapper.class_ is Report:
+        update_context.session.info.setdefault(PENDING_KEY, {})[None] = 0
+        ReportCounterService.reconcile(update_context.session.connection())
+
+
+@event.listens_for(Session, "after_bulk_delete")
+def _bulk_delete(delete_context):
+    if delete_context.mapper.class_ is Report:
+        delete_context.session.info.setdefault(PENDING_KEY, {})[None] = 0
+        ReportCounterService.reconcile(delete_context.session.connection())
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_report_changes(session):
+    deltas = session.info.pop(PENDING_KEY, None)
+    if not deltas:
+        return
+    try:
+        counts = get_report_counts(session)
+    except Exception:
+        return
+    if None in deltas:
+        # UPDATE/DELETE masivo o valor previo desconocido: recargar en la próxima consulta
+        counts.invalidate()
+    else:
+        counts.apply(deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_report_changes(session):
+    session.info.pop(PENDING_KEY, None)
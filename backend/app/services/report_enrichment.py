@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import and_, or_
+from app.core.config import settings
+from app.models.report import Report
+from app.services.image_service import ImageService
+from app.services.report_pipeline import OVERLOAD_ERRORS, ReportPipeline
+from app.services.report_service import ReportService
+from app.services.storage_service import StorageBackend, get_storage_backend
+
+logger = logging.getLogger(__name__)
+
+# Estados de un reporte cuyo enriquecimiento no ha terminado
+IN_PROGRESS_STATUSES = ("classifying", "enriching")
+
+CONTENT_TYPES = {"jpg": "image/jpeg", "jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+class ReportEnrichment:
+    """
+    Enriquecimiento diferido de reportes (REPORT_ASYNC_ENRICHMENT).
+
+    La solicitud solo guarda la imagen original tal cual (`raw/<uuid>.<ext>`)
+    e inserta el reporte con classification_status="classifying". Un pool de
+    workers asíncronos hace después el trabajo pesado: normaliza y sube la
+    imagen, la clasifica, calcula la prioridad y asigna los puntos.
+
+    Los clientes consultan el resultado con long-polling (`wait_for`). Al
+    arrancar, `recover` reencola los reportes que quedaron a medias.
+
+    Cada worker toma el reporte con un UPDATE condicional ("classifying" →
+    "enriching") antes de enriquecerlo, así que aunque varios procesos lo
+    encolen (p. ej. `recover` en cada worker de uvicorn) solo uno lo procesa.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.REPORT_ENRICHMENT_WORKERS,
+        max_queue: int = settings.REPORT_ENRICHMENT_QUEUE_SIZE,
+        session_factory=None,
+        storage: Optional[StorageBackend] = None,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._session_factory = session_factory
+        self._storage = storage
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._events: dict[int, asyncio.Event] = {}
+
+    @property
+    def storage(self) -> StorageBackend:
+        return self._storage or get_storage_backend()
+
+    def _new_session(self):
+        if self._session_factory is None:
+            from app.core.database import SessionLocal
+            return SessionLocal()
+        return self._session_factory()
+
+    def start(self):
+        """Crea la cola y los workers en el event loop actual."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def has_capacity(self) -> bool:
+        return bool(self._tasks) and not self._queue.full()
+
+    async def submit(self, db, file_bytes: bytes, original_filename: str, report_data, user_id=None) -> Report:
+        """Guarda la imagen original y el reporte sin enriquecer, y lo encola."""
+        ImageService.validate(file_bytes, original_filename)
+        ext = original_filename.split(".")[-1].lower()
+        # Clave propia del reporte: dos reportes con la misma imagen no comparten
+        # el original, que se borra al terminar cada enriquecimiento
+        raw_key = f"raw/{uuid.uuid4().hex}.{ext}"
+        await self.storage.put(raw_key, file_bytes, content_type=CONTENT_TYPES.get(ext, "application/octet-stream"))
+
+        report_data.image_url = self.storage.url(raw_key)
+        report_data.ai_classification = None
+        report = await ReportService.create_report(
+            db=db,
+            report_data=report_data,
+            user_id=user_id,
+            classification_status="classifying",
+            raw_image_key=raw_key,
+        )
+        if not self._enqueue(report.id, file_bytes, original_filename):
+            # La cola se llenó después de has_capacity: enriquecer en esta solicitud
+            # (más latencia, pero el reporte no se pierde por backpressure)
+            await self.enrich(report.id, file_bytes, original_filename)
+            db.refresh(report)
+        return report
+
+    def _enqueue(self, report_id: int, file_bytes: bytes, original_filename: str) -> bool:
+        """Encola el reporte; False si la cola está llena (el reporte sigue en "classifying")."""
+        self._events.setdefault(report_id, asyncio.Event())
+        try:
+            self._queue.put_nowait((report_id, file_bytes, original_filename))
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"Cola de enriquecimiento llena; el reporte {report_id} se enriquece en la solicitud")
+            self._events.pop(report_id).set()
+            return False
+
+    async def _worker(self):
+        while True:
+            report_id, file_bytes, original_filename = await self._queue.get()
+            try:
+                await self.enrich(report_id, file_bytes, original_filename)
+            except Exception as e:
+                logger.error(f"Error enriqueciendo el reporte {report_id}: {e}")
+            finally:
+                event = self._events.pop(report_id, None)
+                if event is not None:
+                    event.set()
+                self._queue.task_done()
+
+    async def enrich(self, report_id: int, file_bytes: bytes, original_filename: str):
+        """Normaliza/sube la imagen, clasifica, prioriza y asigna puntos."""
+        db = self._new_session()
+        try:
+            if not ReportService.claim_enrichment(db, report_id):
+                logger.info(f"El reporte {report_id} ya lo enriquece otro worker")
+                return
+            result = None
+            for attempt in range(settings.AI_DEFERRED_MAX_RETRIES):
+                try:
+                    result = await ReportPipeline.run(file_bytes, original_filename, db=db)
+                    break
+                except OVERLOAD_ERRORS:
+                    await asyncio.sleep(settings.AI_DEFERRED_RETRY_DELAY_S * (2 ** attempt))
+                except Exception as e:
+                    logger.error(f"Falló el pipeline del reporte {report_id}: {e}")
+                    break
+
+            if result is None:
+                ReportService.mark_classification_failed(db, report_id)
+                return
+
+            report = db.query(Report).filter(Report.id == report_id).first()
+            if report is None:
+                return
+            raw_key = report.raw_image_key
+            report.image_url = result.image_url
+            report.raw_image_key = None
+            if result.image_derivatives:
+                ReportService.set_image_derivatives(report, result.image_derivatives)
+            await ReportService.apply_deferred_classification(db, report_id, result.ai_classification)
+            if raw_key:
+                await self.storage.delete(raw_key)
+        finally:
+            db.close()
+
+    async def wait_for(self, report_id: int, timeout: float):
+        """
+        Espera (como máximo `timeout` s) a que termine el enriquecimiento del reporte.
+
+        El aviso de fin solo existe en el proceso que encoló el reporte; si la
+        consulta llega a otro worker, se consulta la fila cada
+        REPORT_ENRICHMENT_POLL_S hasta que deje de estar en curso.
+        """
+        if timeout <= 0:
+            return
+        event = self._events.get(report_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._in_progress(report_id):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(settings.REPORT_ENRICHMENT_POLL_S, remaining))
+
+    def _in_progress(self, report_id: int) -> bool:
+        db = self._new_session()
+        try:
+            status = db.query(Report.classification_status).filter(Report.id == report_id).scalar()
+        finally:
+            db.close()
+        return status in IN_PROGRESS_STATUSES
+
+    async def recover(self):
+        """
+        Reencola los reportes que quedaron en "classifying" (p. ej. tras un
+        reinicio) y los "enriching" abandonados por un worker caído.
+
+        El reencolado corre en segundo plano y espera espacio en la cola, así
+        que no retrasa el arranque ni descarta reportes si hay más que cupos.
+        """
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.REPORT_ENRICHMENT_STALE_S)
+        db = self._new_session()
+        try:
+            pending = db.query(Report.id, Report.raw_image_key).filter(
+                or_(
+                    Report.classification_status == "classifying",
+                    and_(Report.classification_status == "enriching", Report.updated_at < stale_before),
+                ),
+                Report.raw_image_key.isnot(None),
+            ).all()
+        finally:
+            db.close()
+
+        if pending:
+            logger.info(f"Reencolando {len(pending)} reportes pendientes de enriquecimiento")
+            self._tasks.append(asyncio.create_task(self._requeue(pending)))
+
+    async def _requeue(self, pending: list):
+        """Lee la imagen original de cada reporte (de a una) y la encola cuando hay espacio."""
+        for report_id, raw_key in pending:
+            try:
+                file_bytes = await self.storage.get(raw_key)
+            except FileNotFoundError:
+                logger.error(f"Imagen original {raw_key} no encontrada; el reporte {report_id} queda como 'failed'")
+                db = self._new_session()
+                try:
+                    ReportService.mark_classification_failed(db, report_id)
+                finally:
+                    db.close()
+                continue
+            self._events.setdefault(report_id, asyncio.Event())
+            await self._queue.put((report_id, file_bytes, raw_key))
+
+
+_enrichment: Optional[ReportEnrichment] = None
+
+
+def get_report_enrichment() -> ReportEnrichment:
+    """Retorna el servicio de enriquecimiento compartido del proceso."""
+    global _enrichment
+    if _enrichment is None:
+        _enrichment = ReportEnrichment()
+    return _enrichment
@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Optional
+from app.services.admission_control import OverloadedError
+from app.services.ai_service import AIService
+from app.services.image_asset_service import ImageAssetService
+from app.services.image_preprocessing import DecodedImage
+from app.services.image_service import ImageService
+from app.services.inference_batcher import InferenceQueueFullError
+from app.services.inference_pool import InferenceTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Errores de capacidad de inferencia que permiten diferir la clasificación
+OVERLOAD_ERRORS = (OverloadedError, InferenceQueueFullError, InferenceTimeoutError)
+
+
+class ReportPipelineResult:
+    """Resultado de las etapas de creación de un reporte."""
+
+    def __init__(self, image_url: str, ai_classification: Optional[dict], timings: dict,
+                 deduplicated: bool = False, classification_deferred: bool = False,
+                 image_derivatives: Optional[dict] = None, asset: Optional[dict] = None):
+        self.image_url = image_url
+        # {thumbnail_url, preview_url, image_formats} o None si no hay derivados
+        self.image_derivatives = image_derivatives
+        self.ai_classification = ai_classification  # None si la clasificación se difirió
+        self.timings = timings  # milisegundos por etapa
+        self.deduplicated = deduplicated  # la imagen ya existía en el índice de contenido
+        self.classification_deferred = classification_deferred
+        # Entrada del índice de contenido que queda por registrar (register_asset=False)
+        self.asset = asset
+
+    def server_timing_header(self) -> str:
+        """Formatea los tiempos por etapa para el header HTTP Server-Timing."""
+        return ", ".join(f"{stage};dur={ms:.1f}" for stage, ms in self.timings.items())
+
+
+class ReportPipeline:
+    """
+    Ejecuta en paralelo las etapas independientes de la creación de un reporte.
+    La imagen se decodifica una sola vez (DecodedImage) y esa decodificación la
+    comparten la compresión y la inferencia.
+
+    La compresión + subida de la imagen y la clasificación IA solo dependen de
+    los bytes del archivo, así que la latencia total queda cerca de
+    max(subida, clasificación) en lugar de su suma. Si una etapa falla, la otra
+    se cancela y se propaga el error original.
+
+    Con defer_on_overload, si no hay capacidad de inferencia la clasificación se
+    omite (ai_classification=None) y la subida continúa, para que el reporte se
+    guarde y se clasifique más tarde.
+
+    Con una sesión de BD se consulta el índice de contenido (image_assets):
+    - Un reintento con los mismos bytes se reconoce por su hash original antes
+      de decodificar nada, y se omiten subida y clasificación.
+    - Si la imagen normalizada ya fue subida se omite la subida, y si además ya
+      fue clasificada con el modelo actual se cancela la clasificación.
+    """
+
+    @staticmethod
+    async def _timed(stage: str, coro, timings: dict):
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            timings[stage] = (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    async def _classify(file_bytes: bytes, decoded: DecodedImage, defer_on_overload: bool, state: dict):
+        try:
+            return await AIService().classify_waste_async(file_bytes, decoded=decoded)
+        except OVERLOAD_ERRORS as e:
+            if not defer_on_overload:
+                raise
+            logger.warning(f"Clasificación diferida por sobrecarga: {e}")
+            state["deferred"] = True
+            return None
+
+    @staticmethod
+    async def _store_image(db, file_bytes, decoded, original_filename, classify_task, state, timings):
+        """Normaliza la imagen, consulta el índice de contenido y sube solo si hace falta."""
+        image_service = ImageService()
+        prepared = await ReportPipeline._timed(
+            "prepare", image_service.prepare_image(file_bytes, original_filename, decoded=decoded), timings
+        )
+        state["prepared"] = prepared
+
+        asset = ImageAssetService.get_by_hash(db, prepared.content_hash) if db is not None else None
+        if asset is not None:
+            state["deduplicated"] = True
+            cached = ImageAssetService.cached_classification(asset)
+            if cached is not None:
+                state["classification"] = cached
+                if classify_task is not None and not classify_task.done():
+                    classify_task.cancel()
+            if asset.derivative_formats or not prepared.derivatives:
+                state["derivative_formats"] = asset.derivative_formats
+                return asset.image_url
+            # Imagen subida antes de existir los derivados: subirla de nuevo con ellos
+            state["derivatives_backfilled"] = True
+
+        state["derivative_formats"] = prepared.derivative_formats
+        return await ReportPipeline._timed("store", image_service.store_prepared(prepared), timings)
+
+    @staticmethod
+    async def run(
+        file_bytes: bytes,
+        original_filename: str,
+        ai_result: Optional[dict] = None,
+        db=None,
+        defer_on_overload: bool = False,
+        model_classification: Optional[dict] = None,
+        decoded: Optional[DecodedImage] = None,
+        register_asset: bool = True,
+    ) -> ReportPipelineResult:
+        """
+        Sube y clasifica la imagen de forma concurrente.
+
+        Args:
+            file_bytes: Bytes de la imagen subida
+            original_filename: Nombre original del archivo (para validar extensión)
+            ai_result: Clasificación enviada por el cliente; si existe, se omite la etapa IA
+            db: Sesión de BD para deduplicar por contenido (opcional)
+            defer_on_overload: Si no hay capacidad de inferencia, continuar sin clasificación
+            model_classification: Resultado del modelo ya calculado (p. ej. en un lote de la
+                carga masiva); se omite la etapa IA pero se guarda en el índice de contenido
+            decoded: Decodificación ya compartida con otra etapa (p. ej. la clasificación del lote)
+            register_asset: Si es False, la entrada del índice no se confirma aquí sino que se
+                retorna en `asset` para que el llamador la guarde en su propia transacción
+        """
+        timings: dict = {}
+        state: dict = {}
+        start = time.perf_counter()
+
+        source_hash = None
+        if db is not None:
+            source_hash = hashlib.sha256(file_bytes).hexdigest()
+            asset = ImageAssetService.get_by_source_hash(db, source_hash)
+            cached = ImageAssetService.cached_classification(asset)
+            known = ai_result if ai_result is not None else model_classification
+            if asset is not None and (cached is not None or known is not None):
+                timings["total"] = (time.perf_counter() - start) * 1000
+                return ReportPipelineResult(
+                    image_url=asset.image_url,
+                    ai_classification=known if known is not None else cached,
+                    timings=timings,
+                    image_derivatives=ImageService().derivative_urls(asset.content_hash, asset.derivative_formats),
+                    deduplicated=True,
+                )
+
+        # Una sola decodificación compartida por compresión e inferencia
+        decoded = decoded or DecodedImage(file_bytes)
+        classify_task = None
+        if ai_result is None and model_classification is None:
+            classify_task = asyncio.create_task(ReportPipeline._timed(
+                "classify", ReportPipeline._classify(file_bytes, decoded, defer_on_overload, state), timings
+            ))
+        upload_task = asyncio.create_task(ReportPipeline._timed(
+            "upload",
+            ReportPipeline._store_image(db, file_bytes, decoded, original_filename, classify_task, state, timings),
+            timings,
+        ))
+        tasks = [task for task in (upload_task, classify_task) if task is not None]
+
+        try:
+            # Una clasificación cancelada por deduplicación no cuenta como fallo
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        except asyncio.CancelledError:
+            # El cliente se desconectó: no dejar etapas huérfanas
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        failed = next((task for task in tasks if task.done() and not task.cancelled()
+                       and task.exception() is not None), None)
+        if failed is not None:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            stage = "upload" if failed is upload_task else "classify"
+            logger.warning(f"Etapa '{stage}' falló; se canceló el resto del pipeline: {failed.exception()}")
+            raise failed.exception()
+
+        image_url = upload_task.result()
+        if ai_result is not None:
+            classification = ai_result
+        elif model_classification is not None:
+            classification = model_classification
+        elif "classification" in state:
+            classification = state["classification"]
+        else:
+            classification = classify_task.result()
+
+        # Registrar (o completar) la entrada del índice de contenido
+        prepared = state.get("prepared")
+        asset = None
+        if db is not None and prepared is not None and (
+                "classification" not in state or state.get("derivatives_backfilled")):
+            asset = {
+                "content_hash": prepared.content_hash,
+                "object_key": prepared.object_key,
+                "image_url": image_url,
+                "classification": classification if ai_result is None and "classification" not in state else None,
+                "source_hash": source_hash,
+                "derivative_formats": prepared.derivative_formats,
+            }
+            if register_asset:
+                ImageAssetService.register(db, **asset)
+                asset = None
+
+        timings["total"] = (time.perf_counter() - start) * 1000
+        result = ReportPipelineResult(
+            image_url=image_url,
+            ai_classification=classification,
+            timings=timings,
+            deduplicated=state.get("deduplicated", False),
+            classification_deferred=state.get("deferred", False),
+            image_derivatives=ImageService().derivative_urls(
+                prepared.content_hash, state.get("derivative_formats")
+            ) if prepared is not None else None,
+            asset=asset,
+        )
+        logger.info(f"Pipeline de reporte: {result.server_timing_header()}")
+        return result
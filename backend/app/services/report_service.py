@@ -1,7 +1,11 @@
 from datetime import datetime, timezone
+import asyncio
 import logging
+from app.core.config import settings
 from app.models.report import Report
 from app.services.priority_service import PriorityService
+from app.services.report_counts import get_report_counts
+from app.utils.helpers import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +19,23 @@ POINTS_BY_WASTE_TYPE = {
 }
 DEFAULT_POINTS = 2
 
+# Órdenes de los listados (todos descendentes); el id desempata filas iguales
+LISTING_ORDER = (Report.priority, Report.created_at, Report.id)
+HISTORY_ORDER = (Report.created_at, Report.id)
+
+# Reportes cuya prioridad se recalcula
+ACTIVE_STATUSES = ("pending", "in_progress")
+# Motores donde el recálculo masivo se hace con un solo UPDATE ... CASE
+SET_BASED_RECALC_DIALECTS = ("postgresql", "sqlite", "mysql", "mariadb")
+
 
 class ReportService:
     def __init__(self):
         pass
 
     @staticmethod
-    async def create_report(db, report_data, user_id=None):
+    async def create_report(db, report_data, user_id=None, classification_status=None, raw_image_key=None,
+                            image_derivatives=None):
         """
         Crea un nuevo reporte con cálculo automático de prioridad y asignación de puntos.
 
@@ -29,10 +43,16 @@ class ReportService:
             db: Sesión de base de datos
             report_data: Datos del reporte
             user_id: ID del usuario autenticado (None para reportes anónimos)
+            classification_status: Forzar el estado de clasificación (p. ej. "classifying")
+            raw_image_key: Clave de la imagen original pendiente de enriquecer
+            image_derivatives: URLs de miniatura/vista previa y formatos disponibles
         """
-        # Extraer datos de clasificación AI
-        waste_type = report_data.ai_classification.get("type")
-        confidence_score = report_data.ai_classification.get("confidence")
+        # Extraer datos de clasificación AI (None si se difirió por sobrecarga)
+        ai_classification = report_data.ai_classification
+        waste_type = ai_classification.get("type") if ai_classification is not None else None
+        confidence_score = ai_classification.get("confidence") if ai_classification is not None else None
+        if classification_status is None:
+            classification_status = "classified" if ai_classification is not None else "pending"
 
         # Calcular prioridad automáticamente
         priority_level, urgency_label = PriorityService.calculate_priority(
@@ -51,25 +71,24 @@ class ReportService:
             waste_type=waste_type,
             manual_classification=report_data.manual_classification,
             confidence_score=confidence_score,
+            classification_status=classification_status,
+            raw_image_key=raw_image_key,
             status="pending",
             priority=priority_level,
             user_id=user_id  # Usar el user_id proporcionado (puede ser None)
         )
 
+        if image_derivatives:
+            ReportService.set_image_derivatives(report, image_derivatives)
+
         db.add(report)
         db.commit()
         db.refresh(report)
 
-        # Asignar puntos al usuario si existe
+        # Asignar puntos al usuario si existe (los reportes sin clasificar los reciben al clasificarse)
         points_earned = 0
-        if report.user_id:
-            points_earned = POINTS_BY_WASTE_TYPE.get((waste_type or "").lower(), DEFAULT_POINTS)
-            from app.models.user import User
-            user = db.query(User).filter(User.id == report.user_id).first()
-            if user:
-                user.points = (user.points or 0) + points_earned
-                db.commit()
-                logger.info(f"Usuario {user.username} ganó {points_earned} puntos. Total: {user.points}")
+        if classification_status == "classified":
+            points_earned = ReportService._award_points(db, report)
 
         # Log de información si el reporte es urgente
         if priority_level == 3:
@@ -84,6 +103,152 @@ class ReportService:
         report.points_earned = points_earned
         return report
 
+    @staticmethod
+    def set_image_derivatives(report: Report, image_derivatives: dict):
+        """Copia al reporte las URLs de sus derivados (miniatura, vista previa)."""
+        report.thumbnail_url = image_derivatives.get("thumbnail_url")
+        report.preview_url = image_derivatives.get("preview_url")
+        report.image_formats = image_derivatives.get("image_formats")
+
+    @staticmethod
+    def _award_points(db, report: Report) -> int:
+        """Suma al autor del reporte los puntos según el tipo de residuo."""
+        if not report.user_id:
+            return 0
+        points_earned = POINTS_BY_WASTE_TYPE.get((report.waste_type or "").lower(), DEFAULT_POINTS)
+        from app.models.user import User
+        user = db.query(User).filter(User.id == report.user_id).first()
+        if user:
+            user.points = (user.points or 0) + points_earned
+            db.commit()
+            logger.info(f"Usuario {user.username} ganó {points_earned} puntos. Total: {user.points}")
+        return points_earned
+
+    @staticmethod
+    def add_points_bulk(db, points_by_user: dict):
+        """
+        Suma puntos a varios usuarios con un solo UPDATE (CASE por id de usuario).
+        No hace commit: se aplica en la transacción de quien llama.
+        """
+        if not points_by_user:
+            return
+        from sqlalchemy import case, func, update
+        from app.models.user import User
+        db.execute(
+            update(User)
+            .where(User.id.in_(list(points_by_user)))
+            .values(points=func.coalesce(User.points, 0) + case(points_by_user, value=User.id, else_=0))
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    async def apply_deferred_classification(db, report_id, classification: dict):
+        """
+        Completa un reporte guardado sin clasificación: tipo de residuo,
+        prioridad y puntos del usuario.
+        """
+        from sqlalchemy import update
+
+        report = db.query(Report).filter(Report.id == report_id).first()
+        if not report or report.classification_status == "classified":
+            return report
+
+        # Paso atómico a "classified": si otro proceso ya completó el reporte, el
+        # UPDATE no afecta filas y no se vuelven a asignar puntos
+        claimed = db.execute(
+            update(Report.__table__)
+            .where(Report.id == report_id, Report.classification_status != "classified")
+            .values(classification_status="classified")
+        ).rowcount
+        if claimed != 1:
+            db.rollback()
+            return db.query(Report).filter(Report.id == report_id).first()
+
+        report.waste_type = classification.get("type")
+        report.confidence_score = classification.get("confidence")
+        report.priority, _ = PriorityService.calculate_priority(
+            waste_type=report.waste_type,
+            confidence_score=report.confidence_score,
+            created_at=report.created_at or datetime.now(timezone.utc)
+        )
+        db.commit()
+        db.refresh(report)
+
+        ReportService._award_points(db, report)
+        if report.priority == 3:
+            await ReportService._generate_urgent_alert(report)
+        return report
+
+    @staticmethod
+    async def classify_deferred_report(report_id, file_bytes: bytes, session_factory=None):
+        """
+        Tarea en segundo plano para reportes guardados con clasificación pendiente.
+        Reintenta con espera exponencial mientras la inferencia siga sobrecargada.
+        """
+        from app.services.ai_service import AIService
+        from app.services.report_pipeline import OVERLOAD_ERRORS
+
+        classification = None
+        for attempt in range(settings.AI_DEFERRED_MAX_RETRIES):
+            try:
+                classification = await AIService().classify_waste_async(file_bytes)
+                break
+            except OVERLOAD_ERRORS:
+                await asyncio.sleep(settings.AI_DEFERRED_RETRY_DELAY_S * (2 ** attempt))
+            except Exception as e:
+                logger.error(f"Error clasificando el reporte {report_id}: {e}")
+                break
+
+        if session_factory is None:
+            from app.core.database import SessionLocal
+            session_factory = SessionLocal
+        db = session_factory()
+        try:
+            if classification is not None:
+                await ReportService.apply_deferred_classification(db, report_id, classification)
+            else:
+                ReportService.mark_classification_failed(db, report_id)
+        finally:
+            db.close()
+
+    @staticmethod
+    def claim_enrichment(db, report_id, stale_after_s: float = None) -> bool:
+        """
+        Toma un reporte "classifying" para enriquecerlo (lo pasa a "enriching").
+
+        Es un UPDATE condicional: si varios workers intentan tomar el mismo
+        reporte, solo uno lo logra. Un reporte en "enriching" sin cambios en
+        stale_after_s segundos (worker caído) se puede volver a tomar.
+        """
+        from datetime import timedelta
+        from sqlalchemy import and_, or_, update
+
+        stale_after_s = settings.REPORT_ENRICHMENT_STALE_S if stale_after_s is None else stale_after_s
+        now = datetime.now(timezone.utc)
+        claimed = db.execute(
+            update(Report.__table__)
+            .where(
+                Report.id == report_id,
+                or_(
+                    Report.classification_status == "classifying",
+                    and_(Report.classification_status == "enriching",
+                         Report.updated_at < now - timedelta(seconds=stale_after_s)),
+                ),
+            )
+            .values(classification_status="enriching", updated_at=now)
+        ).rowcount
+        db.commit()
+        return claimed == 1
+
+    @staticmethod
+    def mark_classification_failed(db, report_id):
+        """Marca un reporte cuya clasificación diferida no se pudo completar."""
+        report = db.query(Report).filter(Report.id == report_id).first()
+        if report:
+            report.classification_status = "failed"
+            db.commit()
+        logger.error(f"No se pudo clasificar el reporte {report_id}; queda como 'failed'")
+
     @staticmethod
     async def _generate_urgent_alert(report: Report):
         """Genera una alerta urgente para residuos de alta prioridad."""
@@ -98,35 +263,112 @@ class ReportService:
             logger.error(f"Error generando alerta urgente: {e}")
 
     @staticmethod
-    def get_reports(db, skip=0, limit=50, status=None, waste_type=None, priority=None):
-        """Obtiene reportes con filtros opcionales y ordenados por prioridad descendente."""
-        query = db.query(Report)
+    def _filter_reports(query, status=None, waste_type=None, priority=None):
         if status:
             query = query.filter(Report.status == status)
         if waste_type:
             query = query.filter(Report.waste_type == waste_type)
         if priority:
             query = query.filter(Report.priority == priority)
-
-        query = query.order_by(Report.priority.desc(), Report.created_at.desc())
-        total = query.count()
-        reports = query.offset(skip).limit(limit).all()
-        return reports, total
+        return query
 
     @staticmethod
-    def get_user_reports(db, user_id, skip=0, limit=50, status=None):
-        query = db.query(Report).filter(Report.user_id == user_id)
-
+    def _filter_user_reports(query, user_id, status=None):
+        query = query.filter(Report.user_id == user_id)
         if status:
             if status == 'collected':
                 status = 'resolved'
             query = query.filter(Report.status == status)
+        return query
+
+    @staticmethod
+    def keyset_page(query, order, limit, cursor=None):
+        """
+        Página por cursor (keyset) sobre las columnas de `order`, en orden descendente.
+
+        En lugar de OFFSET (que recorre y descarta todas las filas anteriores) se
+        filtra `(col1, col2, ...) < valores de la última fila vista`, así que el
+        costo de cualquier página es el mismo con un índice sobre esas columnas.
+        Retorna (filas, next_cursor); next_cursor es None en la última página.
+        Lanza ValueError si el cursor no es válido.
+        """
+        from sqlalchemy import DateTime, tuple_
+        if cursor:
+            types = [datetime if isinstance(col.type, DateTime) else int for col in order]
+            query = query.filter(tuple_(*order) < tuple_(*decode_cursor(cursor, types)))
+        rows = query.order_by(*(col.desc() for col in order)).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([getattr(rows[-1], col.key) for col in order])
+        return rows, next_cursor
+
+    @staticmethod
+    def get_reports(db, skip=0, limit=50, status=None, waste_type=None, priority=None, count_mode=None):
+        """
+        Obtiene reportes con filtros opcionales y ordenados por prioridad descendente.
 
-        query = query.order_by(Report.created_at.desc())
-        total = query.count()
+        El total sigue `count_mode` (ver count_reports); con "none" es None.
+        """
+        query = ReportService._filter_reports(db.query(Report), status, waste_type, priority)
+        total, _ = ReportService.count_reports(
+            db, count_mode, status=status, waste_type=waste_type, priority=priority, query=query
+        )
+        query = query.order_by(*(col.desc() for col in LISTING_ORDER))
         reports = query.offset(skip).limit(limit).all()
         return reports, total
 
+    @staticmethod
+    def get_reports_page(db, limit=50, cursor=None, status=None, waste_type=None, priority=None):
+        """Como get_reports, pero paginado por cursor: retorna (reportes, next_cursor)."""
+        query = ReportService._filter_reports(db.query(Report), status, waste_type, priority)
+        return ReportService.keyset_page(query, LISTING_ORDER, limit, cursor)
+
+    @staticmethod
+    def count_reports(db, count_mode=None, status=None, waste_type=None, priority=None, user_id=None, query=None):
+        """
+        Total de reportes con esos filtros sin un COUNT(*) por solicitud.
+
+        Args:
+            count_mode: "exact" (COUNT en caché, invalidado al escribir), "approximate"
+                (contadores mantenidos por combinación de filtros) o "none".
+                None = REPORT_COUNT_MODE.
+            query: Consulta ya filtrada para el conteo exacto (si no, se arma aquí)
+
+        Returns:
+            (total o None, modo usado)
+
+        Raises:
+            ValueError: Si el modo no es válido
+        """
+        if query is None:
+            query = ReportService._filter_reports(db.query(Report), status, waste_type, priority)
+            if user_id is not None:
+                query = ReportService._filter_user_reports(query, user_id)
+        filters = dict(status=status, waste_type=waste_type, priority=priority, user_id=user_id)
+        return get_report_counts(db).count(db, count_mode or settings.REPORT_COUNT_MODE, filters, query.count)
+
+    @staticmethod
+    def get_user_reports(db, user_id, skip=0, limit=50, status=None, count_mode=None):
+        query = ReportService._filter_user_reports(db.query(Report), user_id, status)
+        total, _ = ReportService.count_user_reports(db, user_id, status, count_mode, query=query)
+        query = query.order_by(*(col.desc() for col in HISTORY_ORDER))
+        reports = query.offset(skip).limit(limit).all()
+        return reports, total
+
+    @staticmethod
+    def get_user_reports_page(db, user_id, limit=50, cursor=None, status=None):
+        """Historial del usuario paginado por cursor: retorna (reportes, next_cursor)."""
+        query = ReportService._filter_user_reports(db.query(Report), user_id, status)
+        return ReportService.keyset_page(query, HISTORY_ORDER, limit, cursor)
+
+    @staticmethod
+    def count_user_reports(db, user_id, status=None, count_mode=None, query=None):
+        """Total del historial del usuario; mismos modos que count_reports."""
+        if status == 'collected':
+            status = 'resolved'
+        return ReportService.count_reports(db, count_mode, status=status, user_id=user_id, query=query)
+
     @staticmethod
     def get_urgent_reports(db, limit=10):
         """Obtiene los reportes urgentes (prioridad alta y pendientes)."""
@@ -194,39 +436,114 @@ class ReportService:
         return report
 
     @staticmethod
-    def recalculate_all_priorities(db):
-        """Recalcula las prioridades de todos los reportes pendientes."""
-        pending_reports = db.query(Report).filter(
-            Report.status.in_(["pending", "in_progress"])
+    def recalculate_all_priorities(db, chunk_size: int = None, now: datetime = None):
+        """
+        Recalcula las prioridades de todos los reportes pendientes.
+
+        En los motores con las funciones necesarias (CASE, lower, trim) las
+        reglas de PriorityService se aplican con un solo UPDATE; en los demás,
+        por lotes de chunk_size reportes.
+        """
+        return ReportService._recalculate_priorities(db, chunk_size, now=now)
+
+    @staticmethod
+    def recalculate_priorities(db, report_ids, chunk_size: int = None, now: datetime = None):
+        """Recalcula las prioridades de los reportes activos dados (mismo resultado que recalculate_all_priorities)."""
+        if not report_ids:
+            return {"total_checked": 0, "updated": 0}
+        return ReportService._recalculate_priorities(db, chunk_size, Report.id.in_(list(report_ids)), now=now)
+
+    @staticmethod
+    def _recalculate_priorities(db, chunk_size, *criteria, now: datetime = None):
+        dialect = getattr(getattr(db.get_bind(), "dialect", None), "name", None)
+        if dialect in SET_BASED_RECALC_DIALECTS:
+            return ReportService._recalculate_priorities_set_based(db, *criteria, now=now)
+        return ReportService._recalculate_priorities_chunked(
+            db, chunk_size or settings.PRIORITY_RECALC_CHUNK_SIZE, *criteria, now=now
+        )
+
+    @staticmethod
+    def _recalculate_priorities_set_based(db, *criteria, now: datetime = None):
+        """UPDATE reports SET priority = CASE ... sobre los reportes activos cuya prioridad cambia."""
+        from sqlalchemy import and_, func, or_, select, update
+        from app.services.report_counts import record_report_changes
+
+        new_priority = PriorityService.priority_expression(
+            Report.waste_type, Report.confidence_score, Report.created_at, now or datetime.now(timezone.utc)
+        )
+        active = and_(Report.status.in_(ACTIVE_STATUSES), *criteria)
+        changed = and_(active, or_(Report.priority.is_(None), Report.priority != new_priority))
+
+        total_checked = db.query(func.count(Report.id)).filter(active).scalar()
+        # Cuántos reportes pasan de cada clave de contadores a cuál, para
+        # mantener report_counters sin recontar la tabla
+        moving = select(
+            Report.status, Report.priority, Report.waste_type, Report.user_id, new_priority.label("new_priority")
+        ).where(changed).subquery()
+        moves = db.execute(
+            select(*moving.c, func.count()).group_by(*moving.c)
         ).all()
+        if not moves:
+            return {"total_checked": total_checked, "updated": 0}
+
+        # UPDATE sobre la tabla (no la entidad): el seguimiento de escrituras del
+        # ORM no lo ve y las diferencias se registran abajo
+        updated_count = db.execute(
+            update(Report.__table__).where(changed).values(priority=new_priority)
+        ).rowcount
+
+        deltas = {}
+        for status, old_priority, waste_type, user_id, priority, count in moves:
+            for key, delta in (((status, old_priority, waste_type, user_id), -count),
+                               ((status, priority, waste_type, user_id), count)):
+                deltas[key] = deltas.get(key, 0) + delta
+        if updated_count != sum(count for *_, count in moves):
+            # Otra transacción cambió reportes entre la lectura y el UPDATE: recontar
+            deltas = {None: 0}
+        record_report_changes(db, deltas)
+        db.commit()
+
+        return {"total_checked": total_checked, "updated": updated_count}
 
+    @staticmethod
+    def _recalculate_priorities_chunked(db, chunk_size: int, *criteria, now: datetime = None):
+        """Recorre los reportes activos por lotes (cursor por id) y confirma cada lote."""
+        total_checked = 0
         updated_count = 0
-        for report in pending_reports:
-            old_priority = report.priority
-            priority_level, _ = PriorityService.calculate_priority(
-                waste_type=report.waste_type,
-                confidence_score=report.confidence_score,
-                created_at=report.created_at
-            )
-            if old_priority != priority_level:
-                report.priority = priority_level
-                updated_count += 1
+        last_id = 0
+        while True:
+            chunk = db.query(Report).filter(
+                Report.status.in_(ACTIVE_STATUSES), Report.id > last_id, *criteria
+            ).order_by(Report.id).limit(chunk_size).all()
+
+            chunk_updated = 0
+            for report in chunk:
+                priority_level, _ = PriorityService.calculate_priority(
+                    waste_type=report.waste_type,
+                    confidence_score=report.confidence_score,
+                    created_at=report.created_at,
+                    now=now
+                )
+                if report.priority != priority_level:
+                    report.priority = priority_level
+                    chunk_updated += 1
+
+            total_checked += len(chunk)
+            updated_count += chunk_updated
+            if len(chunk) < chunk_size:
+                break
+            last_id = chunk[-1].id
+            if chunk_updated:
+                db.commit()
 
         if updated_count > 0:
             db.commit()
 
-        return {"total_checked": len(pending_reports), "updated": updated_count}
+        return {"total_checked": total_checked, "updated": updated_count}
 
     @staticmethod
     def get_priority_stats(db):
         """Obtiene estadísticas de prioridad de los reportes activos."""
-        from sqlalchemy import func
-        stats = db.query(
-            Report.priority,
-            func.count(Report.id).label("count")
-        ).filter(
-            Report.status.in_(["pending", "in_progress"])
-        ).group_by(Report.priority).all()
-
-        priority_labels = {1: "Low", 2: "Medium", 3: "High"}
-        return {priority_labels[p]: c for p, c in stats}
\ No newline at end of file
+        from app.services.report_stats import PRIORITY_LABELS, ReportStatsService
+        stats = ReportStatsService.get(db).by_priority(statuses=("pending", "in_progress"))
+        return {PRIORITY_LABELS[p]: c for p, c in stats.items() if p in PRIORITY_LABELS}
\ No newline at end of file
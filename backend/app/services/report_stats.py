@@ -0,0 +1,99 @@
+import threading
+import time
+import weakref
+from typing import Iterable, Optional
+from app.core.config import settings
+from app.services.report_counter_service import ReportCounterService
+from app.services.report_counts import get_report_counts
+
+PRIORITY_LABELS = {1: "Low", 2: "Medium", 3: "High"}
+
+
+class ReportStats:
+    """
+    Conteos de reportes por (status, priority, waste_type); cada desglose de
+    los paneles se suma a partir de ellos sin volver a la BD.
+    """
+
+    def __init__(self, rows: Iterable):
+        self.counts: dict[tuple, int] = {}
+        for status, priority, waste_type, count in rows:
+            key = (status, priority, waste_type)
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def _select(self, statuses=None, exclude_statuses=None):
+        for (status, priority, waste_type), count in self.counts.items():
+            if statuses is not None and status not in statuses:
+                continue
+            if exclude_statuses is not None and status in exclude_statuses:
+                continue
+            yield status, priority, waste_type, count
+
+    def total(self, statuses=None, exclude_statuses=None) -> int:
+        return sum(count for *_, count in self._select(statuses, exclude_statuses))
+
+    def by_status(self) -> dict:
+        result = {}
+        for status, _, _, count in self._select():
+            result[status] = result.get(status, 0) + count
+        return result
+
+    def by_priority(self, statuses=None, exclude_statuses=None) -> dict:
+        result = {}
+        for _, priority, _, count in self._select(statuses, exclude_statuses):
+            result[priority] = result.get(priority, 0) + count
+        return result
+
+    def by_waste_type(self, statuses=None, exclude_statuses=None) -> dict:
+        result = {}
+        for _, _, waste_type, count in self._select(statuses, exclude_statuses):
+            result[waste_type] = result.get(waste_type, 0) + count
+        return result
+
+
+class ReportStatsService:
+    """
+    Estadísticas de reportes compartidas por los paneles de administración y
+    de prioridades: una sola lectura de report_counters en lugar de un COUNT
+    por cifra.
+
+    El resultado se guarda por REPORT_STATS_CACHE_TTL_S y se descarta en cuanto
+    este proceso confirma un cambio en reportes (mismo seguimiento de escrituras
+    que los totales de los listados); en otros workers el límite es el TTL.
+    """
+
+    _lock = threading.Lock()
+    _cache: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()  # engine → (hora, generación, stats)
+
+    @staticmethod
+    def compute(db) -> ReportStats:
+        """Lee la tabla report_counters (unas pocas filas, sin recorrer reports)."""
+        return ReportStats(ReportCounterService.read(db))
+
+    @classmethod
+    def get(cls, db, ttl_seconds: Optional[float] = None) -> ReportStats:
+        """Retorna las estadísticas en caché o las recalcula."""
+        ttl = settings.REPORT_STATS_CACHE_TTL_S if ttl_seconds is None else ttl_seconds
+        bind = db.get_bind()
+        counts = get_report_counts(db)
+        with cls._lock:
+            cached = cls._cache.get(bind)
+        if cached is not None:
+            stored_at, generation, stats = cached
+            if generation == counts.generation and time.monotonic() - stored_at <= ttl:
+                return stats
+
+        generation = counts.generation
+        stats = cls.compute(db)
+        if ttl > 0:
+            with cls._lock:
+                cls._cache[bind] = (time.monotonic(), generation, stats)
+        return stats
+
+    @classmethod
+    def invalidate(cls, db=None):
+        with cls._lock:
+            if db is None:
+                cls._cache.clear()
+            else:
+                cls._cache.pop(db.get_bind(), None)
@@ -0,0 +1,266 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import AsyncIterator, Optional
+import httpx
+from app.core.config import settings
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class StorageBackend(ABC):
+    """
+    Interfaz común para el almacenamiento de objetos (imágenes de reportes,
+    recompensas, derivados). Las claves son rutas relativas, p. ej. "rewards/a.jpg".
+    """
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        """Guarda los bytes bajo la clave indicada."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        """Retorna el contenido del objeto o lanza FileNotFoundError."""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Elimina el objeto (no falla si no existe)."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Indica si el objeto existe."""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """URL pública del objeto."""
+
+    async def put_stream(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str = "application/octet-stream",
+    ):
+        """Guarda un objeto a partir de un iterador asíncrono de fragmentos."""
+        data = bytearray()
+        async for chunk in chunks:
+            data.extend(chunk)
+        await self.put(key, bytes(data), content_type)
+
+    async def stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Lee el objeto en fragmentos de chunk_size bytes."""
+        data = await self.get(key)
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+
+class SupabaseStorageBackend(StorageBackend):
+    """
+    Backend asíncrono para Supabase Storage.
+
+    Usa un único httpx.AsyncClient compartido por el proceso para reutilizar
+    conexiones (keep-alive) entre subidas, y sube directamente desde memoria.
+    """
+
+    _client: Optional[httpx.AsyncClient] = None
+    _client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __init__(self, bucket: str = settings.SUPABASE_BUCKET_NAME):
+        self.bucket = bucket
+
+    @classmethod
+    def _get_client(cls) -> httpx.AsyncClient:
+        """Retorna el cliente HTTP compartido (lo recrea si cambió el event loop)."""
+        loop = asyncio.get_running_loop()
+        if cls._client is None or cls._client.is_closed or cls._client_loop is not loop:
+            cls._client = httpx.AsyncClient(
+                base_url=f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1",
+                headers={
+                    "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}",
+                    "apikey": settings.SUPABASE_SERVICE_ROLE_KEY,
+                },
+                timeout=settings.STORAGE_HTTP_TIMEOUT_S,
+                limits=httpx.Limits(
+                    max_connections=settings.STORAGE_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.STORAGE_HTTP_MAX_CONNECTIONS,
+                ),
+            )
+            cls._client_loop = loop
+        return cls._client
+
+    @classmethod
+    async def aclose(cls):
+        """Cierra el cliente HTTP compartido (al apagar la aplicación)."""
+        if cls._client is not None and not cls._client.is_closed:
+            if cls._client_loop is asyncio.get_running_loop():
+                await cls._client.aclose()
+        cls._client = None
+        cls._client_loop = None
+
+    async def _upload(self, key: str, content, content_type: str):
+        response = await self._get_client().post(
+            f"/object/{self.bucket}/{key}",
+            content=content,
+            headers={"Content-Type": content_type, "x-upsert": "true"},
+        )
+        if response.status_code >= 400:
+            raise ValueError(f"Error subiendo el objeto a Supabase: {response.text}")
+
+    async def put(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        await self._upload(key, data, content_type)
+
+    async def put_stream(self, key, chunks, content_type="application/octet-stream"):
+        # httpx envía el iterador como cuerpo chunked sin acumularlo en memoria
+        await self._upload(key, chunks, content_type)
+
+    async def get(self, key: str) -> bytes:
+        response = await self._get_client().get(f"/object/{self.bucket}/{key}")
+        if response.status_code in (400, 404):
+            raise FileNotFoundError(key)
+        response.raise_for_status()
+        return response.content
+
+    async def stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        async with self._get_client().stream("GET", f"/object/{self.bucket}/{key}") as response:
+            if response.status_code in (400, 404):
+                raise FileNotFoundError(key)
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
+    async def delete(self, key: str):
+        response = await self._get_client().request(
+            "DELETE", f"/object/{self.bucket}", json={"prefixes": [key]}
+        )
+        if response.status_code >= 400 and response.status_code != 404:
+            raise ValueError(f"Error eliminando el objeto de Supabase: {response.text}")
+
+    async def exists(self, key: str) -> bool:
+        response = await self._get_client().head(f"/object/{self.bucket}/{key}")
+        return response.status_code == 200
+
+    def url(self, key: str) -> str:
+        # La URL pública se construye localmente, sin llamada de red
+        return f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1/object/public/{self.bucket}/{key}"
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Backend en disco local. Pensado para nodos edge y desarrollo: los objetos
+    se sirven como archivos estáticos bajo STORAGE_PUBLIC_BASE_URL.
+    """
+
+    def __init__(self, root_dir: str = settings.STORAGE_LOCAL_DIR,
+                 public_base_url: str = settings.STORAGE_PUBLIC_BASE_URL):
+        self.root = Path(root_dir)
+        self.public_base_url = public_base_url.rstrip("/")
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Clave de storage inválida: {key}")
+        return path
+
+    def _write(self, key: str, data: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Escribir a un archivo temporal y renombrar para que la escritura sea atómica
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with tmp_path.open("wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read(self, key: str) -> bytes:
+        return self._path(key).read_bytes()
+
+    async def put(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        await asyncio.to_thread(self._write, key, data)
+
+    async def put_stream(self, key, chunks, content_type="application/octet-stream"):
+        path = self._path(key)
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        f = await asyncio.to_thread(tmp_path.open, "wb")
+        try:
+            try:
+                async for chunk in chunks:
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                f.close()
+            os.replace(tmp_path, path)
+        except BaseException:
+            # No dejar el temporal si el stream falla o se cancela a mitad
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    async def get(self, key: str) -> bytes:
+        return await asyncio.to_thread(self._read, key)
+
+    async def stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(self._path(key).open, "rb")
+        try:
+            while True:
+                chunk = await asyncio.to_thread(f.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            f.close()
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._path(key).unlink, True)
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self._path(key).is_file)
+
+    def url(self, key: str) -> str:
+        return f"{self.public_base_url}/{key}"
+
+
+class MemoryStorageBackend(StorageBackend):
+    """Backend en memoria del proceso, para pruebas y benchmarks sin red."""
+
+    def __init__(self, public_base_url: str = "memory://storage"):
+        self.objects: dict[str, bytes] = {}
+        self.public_base_url = public_base_url.rstrip("/")
+
+    async def put(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        self.objects[key] = bytes(data)
+
+    async def get(self, key: str) -> bytes:
+        try:
+            return self.objects[key]
+        except KeyError:
+            raise FileNotFoundError(key)
+
+    async def delete(self, key: str):
+        self.objects.pop(key, None)
+
+    async def exists(self, key: str) -> bool:
+        return key in self.objects
+
+    def url(self, key: str) -> str:
+        return f"{self.public_base_url}/{key}"
+
+
+_backends: dict[tuple[str, str], StorageBackend] = {}
+
+
+def get_storage_backend(bucket: str = settings.SUPABASE_BUCKET_NAME,
+                        kind: Optional[str] = None) -> StorageBackend:
+    """
+    Retorna el backend `kind` (por defecto el configurado en STORAGE_BACKEND),
+    una instancia por tipo y bucket.
+    """
+    kind = (kind or settings.STORAGE_BACKEND).lower()
+    if (kind, bucket) not in _backends:
+        if kind == "supabase":
+            backend = SupabaseStorageBackend(bucket)
+        elif kind == "local":
+            backend = LocalStorageBackend()
+        elif kind == "memory":
+            backend = MemoryStorageBackend()
+        else:
+            raise ValueError(f"Backend de storage no soportado: {kind}")
+        _backends[(kind, bucket)] = backend
+    return _backends[(kind, bucket)]
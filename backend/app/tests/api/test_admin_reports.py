@@ -0,0 +1,105 @@
+"""
+Pruebas del listado de reportes de administración.
+Valida que cada página se obtenga con un número constante de consultas (sin N+1) y el mapeo a ReportWithUser.
+"""
+import pytest
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+from app.core.database import get_db
+from app.core.security import get_current_admin_user
+from app.main import app
+from app.models.report import Report
+from app.models.user import User
+
+
+@pytest.fixture
+def admin_client(db_session):
+    """Fixture: Cliente autenticado como administrador sobre la BD de prueba"""
+    admin = User(username="admin", email="admin@test.com", hashed_password="x", role="admin")
+    db_session.add(admin)
+    db_session.commit()
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_current_admin_user] = lambda: admin
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_current_admin_user, None)
+
+
+def seed_reports(db, count: int):
+    """Helper: reportes de varios usuarios y algunos anónimos"""
+    users = [User(username=f"user{i}", email=f"user{i}@test.com", hashed_password="x") for i in range(10)]
+    db.add_all(users)
+    db.flush()
+    db.add_all([
+        Report(
+            latitude=6.25, longitude=-75.56, image_url=f"https://storage.test/{i}.jpg",
+            status="pending", priority=1 + i % 3, waste_type="plastic",
+            user_id=users[i % 10].id if i % 4 else None,
+        )
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def count_statements(engine, operation) -> int:
+    """Helper: número de sentencias SQL emitidas por la operación"""
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        operation()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return len(statements)
+
+
+class TestAdminReportsListing:
+    """Suite de pruebas para GET /admin/reports"""
+
+    # ==================== PRUEBA 1 ====================
+    def test_statement_count_is_constant_per_page(self, admin_client, db_session):
+        """
+        GIVEN: 120 reportes de 10 usuarios (y anónimos)
+        WHEN: Se piden páginas de 5, 50 y 100 reportes
+        THEN: Cada página debe costar la misma cantidad de consultas
+        """
+        seed_reports(db_session, 120)
+        engine = db_session.get_bind()
+
+        counts = {
+            limit: count_statements(engine, lambda: admin_client.get("/api/v1/admin/reports", params={"limit": limit}))
+            for limit in (5, 50, 100)
+        }
+
+        assert counts[5] == counts[50] == counts[100] == 1
+
+    # ==================== PRUEBA 2 ====================
+    def test_rows_map_to_report_with_user(self, admin_client, db_session):
+        """
+        GIVEN: Reportes con y sin autor
+        WHEN: Se recorren todas las páginas por X-Next-Cursor
+        THEN: Cada reporte debe traer los datos de su autor o "Anónimo"
+        """
+        seed_reports(db_session, 12)
+
+        reports, params = [], {"limit": 5}
+        while True:
+            response = admin_client.get("/api/v1/admin/reports", params=params)
+            assert response.status_code == 200
+            reports.extend(response.json())
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params = {"limit": 5, "cursor": response.headers["X-Next-Cursor"]}
+
+        assert len({r["id"] for r in reports}) == 12
+        for data in reports:
+            report = db_session.get(Report, data["id"])
+            if report.user_id is None:
+                assert data["username"] == "Anónimo" and data["user_email"] is None
+            else:
+                assert data["user_id"] == report.user_id
+                assert data["username"] == report.user.username
+                assert data["user_email"] == report.user.email
+            assert data["created_at"] == report.created_at.isoformat()
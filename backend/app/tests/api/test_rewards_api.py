@@ -0,0 +1,91 @@
+"""
+Pruebas de la API de recompensas.
+Valida la subida de la imagen de una recompensa.
+"""
+import io
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from PIL import Image
+from app.core.config import settings
+from app.core.database import get_db
+from app.main import app
+from app.services.storage_service import LocalStorageBackend
+
+
+@pytest.fixture
+def client(db_session):
+    """Fixture: Cliente de prueba sobre la BD de pruebas"""
+    app.dependency_overrides[get_db] = lambda: db_session
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Fixture: Storage de recompensas en un directorio temporal"""
+    local = LocalStorageBackend(root_dir=str(tmp_path), public_base_url="/uploads")
+    with patch("app.api.v1.rewards.get_storage_backend", return_value=local) as get_backend:
+        local.get_backend = get_backend
+        yield local
+
+
+def jpeg_bytes() -> bytes:
+    """Helper: JPEG válido"""
+    buf = io.BytesIO()
+    Image.new("RGB", (50, 50), color="green").save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def reward_form(name="Bolsa reutilizable"):
+    return {"name": name, "description": "Recompensa de prueba", "points_required": "50"}
+
+
+class TestRewardsAPI:
+    """Pruebas de POST /api/v1/rewards/"""
+
+    # ==================== PRUEBA 1 ====================
+    def test_image_is_stored_in_rewards_location(self, client, storage, tmp_path):
+        """
+        GIVEN: Una recompensa con imagen JPEG
+        WHEN: Se crea
+        THEN: La imagen debe quedar en rewards/ del storage de recompensas con su URL de siempre
+        """
+        response = client.post("/api/v1/rewards/", data=reward_form(),
+                               files={"image": ("bolsa.jpg", jpeg_bytes(), "image/jpeg")})
+
+        assert response.status_code == 200
+        assert response.json()["image_url"] == "/uploads/rewards/Bolsa_reutilizable.jpg"
+        assert (tmp_path / "rewards" / "Bolsa_reutilizable.jpg").read_bytes() == jpeg_bytes()
+        storage.get_backend.assert_called_once_with("rewards", kind="local")
+
+    # ==================== PRUEBA 2 ====================
+    @pytest.mark.parametrize("filename,content,status", [
+        ("bolsa.jpg", b"no es una imagen", 400),
+        ("bolsa.exe", b"MZ", 400),
+    ])
+    def test_invalid_image_is_rejected(self, client, storage, tmp_path, filename, content, status):
+        """
+        GIVEN: Un archivo que no es una imagen permitida
+        WHEN: Se crea la recompensa
+        THEN: Debe responder 400 sin guardar nada
+        """
+        response = client.post("/api/v1/rewards/", data=reward_form(),
+                               files={"image": (filename, content, "image/jpeg")})
+
+        assert response.status_code == status
+        assert not (tmp_path / "rewards").exists()
+
+    # ==================== PRUEBA 3 ====================
+    def test_oversized_image_is_rejected(self, client, storage, tmp_path):
+        """
+        GIVEN: Una imagen que supera IMAGE_MAX_SIZE_MB
+        WHEN: Se crea la recompensa
+        THEN: Debe responder 413 sin guardar nada
+        """
+        oversized = b"\xff\xd8\xff" + b"\0" * (settings.IMAGE_MAX_SIZE_MB * 1024 * 1024)
+        response = client.post("/api/v1/rewards/", data=reward_form(),
+                               files={"image": ("bolsa.jpg", oversized, "image/jpeg")})
+
+        assert response.status_code == 413
+        assert not (tmp_path / "rewards").exists()
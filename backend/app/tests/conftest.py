@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+# Registrar todos los modelos en la metadata compartida
+from app.models import user, report, reward, reward_redemption, waste_classification, image_asset, classification_cache, idempotency_key, report_counter  # noqa: F401
+
+
+@pytest.fixture
+def db_session():
+    """Fixture: Sesión sobre una base SQLite en memoria con todas las tablas creadas"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
@@ -0,0 +1,74 @@
+"""
+Pruebas unitarias del LeaderLock (un solo worker por tarea de fondo).
+Usa un engine simulado con dialecto PostgreSQL (sin servidor).
+"""
+from unittest.mock import Mock
+from sqlalchemy import create_engine
+from app.core.leader import LeaderLock
+
+
+def postgres_engine(lock_results):
+    """Helper: engine simulado cuyo pg_try_advisory_lock retorna lock_results en orden"""
+    engine = Mock()
+    engine.dialect.name = "postgresql"
+    connections = []
+
+    def connect():
+        connection = Mock()
+        connection.execute.return_value.scalar.return_value = lock_results.pop(0)
+        connections.append(connection)
+        return connection
+
+    engine.connect.side_effect = connect
+    return engine, connections
+
+
+class TestLeaderLock:
+    """Suite de pruebas para LeaderLock"""
+
+    # ==================== PRUEBA 1 ====================
+    def test_only_one_worker_holds_the_lock(self):
+        """
+        GIVEN: Dos workers con el mismo nombre de tarea
+        WHEN: Ambos intentan tomar el lock y el servidor solo se lo concede al primero
+        THEN: El primero debe conservar su conexión y el segundo cerrarla
+        """
+        engine, connections = postgres_engine([True, False])
+        leader, follower = LeaderLock("task", engine), LeaderLock("task", engine)
+
+        assert leader.acquire() is True
+        assert follower.acquire() is False
+        assert leader.acquire() is True  # ya lo tiene: no abre otra conexión
+
+        assert engine.connect.call_count == 2
+        connections[0].close.assert_not_called()
+        connections[1].close.assert_called_once()
+
+        leader.release()
+        connections[0].close.assert_called_once()
+
+    # ==================== PRUEBA 2 ====================
+    def test_lost_connection_retries_the_lock(self):
+        """
+        GIVEN: Un worker con el lock cuya conexión se cae
+        WHEN: Vuelve a intentar tomarlo
+        THEN: Debe descartar la conexión y pedir el lock en una nueva
+        """
+        engine, connections = postgres_engine([True, True])
+        lock = LeaderLock("task", engine)
+        assert lock.acquire() is True
+        connections[0].execute.side_effect = ConnectionError("server closed the connection")
+
+        assert lock.acquire() is True
+
+        connections[0].invalidate.assert_called_once()
+        assert engine.connect.call_count == 2
+
+    # ==================== PRUEBA 3 ====================
+    def test_other_engines_always_grant_the_lock(self):
+        """
+        GIVEN: Un engine SQLite (un solo proceso)
+        WHEN: Se pide el lock
+        THEN: Debe concederse sin consultar la base
+        """
+        assert LeaderLock("task", create_engine("sqlite://")).acquire() is True
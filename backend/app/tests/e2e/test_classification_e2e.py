@@ -60,18 +60,22 @@ class TestClassificationE2E:
             "Debe rechazar peticiones sin imagen"
 
     # ==================== PRUEBA 3 ====================
-    def test_classify_invalid_file_returns_500(self, client):
+    @pytest.mark.parametrize("fake_file", [
+        ("fake.txt", b"not an image", "text/plain"),
+        ("fake.jpg", b"not an image", "image/jpeg"),
+    ])
+    def test_classify_invalid_file_returns_400(self, client, fake_file):
         """
-        GIVEN: Un archivo que no es una imagen
+        GIVEN: Un archivo que no es una imagen (por extensión o por contenido)
         WHEN: Se envía al endpoint
-        THEN: Debe retornar 500 con mensaje de error
+        THEN: Debe retornar 400 (error del cliente) con el motivo
         """
-        fake_file = ("fake.txt", io.BytesIO(b"not an image"), "text/plain")
+        filename, content, content_type = fake_file
 
         response = client.post(
             "/api/v1/classify/",
-            files={"image": fake_file}
+            files={"image": (filename, io.BytesIO(content), content_type)}
         )
 
-        assert response.status_code == 500
-        assert "Error clasificando imagen" in response.json()['detail']
\ No newline at end of file
+        assert response.status_code == 400
+        assert "Error clasificando imagen" not in response.json()['detail']
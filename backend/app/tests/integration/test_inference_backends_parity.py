@@ -0,0 +1,67 @@
+"""
+Pruebas de paridad de precisión entre backends de inferencia.
+Compara PyTorch fp32 contra los backends cuantizados/ONNX sobre un conjunto fijo de imágenes.
+"""
+import pytest
+import io
+from pathlib import Path
+from PIL import Image
+
+torch = pytest.importorskip("torch")
+
+from app.services.inference_backends import build_classifier
+
+TEST_IMAGE = Path(__file__).resolve().parent.parent / "test_image.jpg"
+COLORS = ["red", "green", "blue", "white", "black", "yellow", "gray", "brown"]
+# Porcentaje mínimo de coincidencia en la etiqueta top-1 respecto a fp32
+MIN_TOP1_AGREEMENT = 0.85
+# Diferencia máxima de confianza (0-1) para las imágenes en que coinciden
+MAX_SCORE_DELTA = 0.10
+
+
+def fixed_image_set() -> list:
+    """Helper: imagen de prueba del repo + imágenes sintéticas deterministas"""
+    images = [Image.open(TEST_IMAGE).convert("RGB")] if TEST_IMAGE.exists() else []
+    for color in COLORS:
+        img = Image.new("RGB", (256, 256), color=color)
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=85)
+        images.append(Image.open(io.BytesIO(buffer.getvalue())).convert("RGB"))
+    return images
+
+
+@pytest.fixture(scope="module")
+def reference():
+    classifier = build_classifier("pytorch")
+    images = fixed_image_set()
+    return images, [classifier(img)[0] for img in images]
+
+
+def backend_or_skip(backend: str):
+    if backend.startswith("onnx"):
+        pytest.importorskip("optimum.onnxruntime")
+    return build_classifier(backend)
+
+
+class TestInferenceBackendParity:
+    """Paridad de predicciones de cada backend contra PyTorch fp32"""
+
+    @pytest.mark.parametrize("backend", ["pytorch-int8", "onnx", "onnx-int8"])
+    def test_backend_matches_pytorch(self, backend, reference):
+        """
+        GIVEN: Las predicciones de PyTorch fp32 sobre un conjunto fijo de imágenes
+        WHEN: Se clasifican las mismas imágenes con otro backend
+        THEN: La etiqueta top-1 debe coincidir en casi todas y la confianza ser similar
+        """
+        images, expected = reference
+        classifier = backend_or_skip(backend)
+        actual = [classifier(img)[0] for img in images]
+
+        matches = [(e, a) for e, a in zip(expected, actual) if e["label"] == a["label"]]
+        agreement = len(matches) / len(expected)
+        print(f"\n{backend}: coincidencia top-1 {agreement:.0%} ({len(matches)}/{len(expected)})")
+
+        assert agreement >= MIN_TOP1_AGREEMENT, f"{backend} difiere de fp32 en {1 - agreement:.0%} de las imágenes"
+        for e, a in matches:
+            assert abs(e["score"] - a["score"]) <= MAX_SCORE_DELTA, \
+                f"{backend}: confianza {a['score']:.3f} vs fp32 {e['score']:.3f} ({e['label']})"
@@ -0,0 +1,84 @@
+"""
+Benchmark de backends de inferencia.
+Reporta latencia (p50/p95), throughput por lotes y memoria residente de cada backend.
+"""
+import pytest
+import gc
+import os
+import statistics
+import time
+from PIL import Image
+
+torch = pytest.importorskip("torch")
+
+from app.services.inference_backends import build_classifier, SUPPORTED_BACKENDS
+
+ITERATIONS = 20
+BATCH_SIZE = 8
+
+
+def rss_mb() -> float:
+    """Helper: memoria residente actual del proceso en MB (Linux)"""
+    with open(f"/proc/{os.getpid()}/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def benchmark_backend(backend: str) -> dict:
+    gc.collect()
+    rss_before = rss_mb()
+    classifier = build_classifier(backend)
+    rss_loaded = rss_mb()
+
+    image = Image.new("RGB", (224, 224), color="white")
+    classifier(image)  # calentamiento
+
+    latencies = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        classifier(image)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    batch = [image] * BATCH_SIZE
+    start = time.perf_counter()
+    for _ in range(ITERATIONS // 4):
+        classifier(batch, batch_size=BATCH_SIZE)
+    throughput = BATCH_SIZE * (ITERATIONS // 4) / (time.perf_counter() - start)
+
+    result = {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": sorted(latencies)[int(len(latencies) * 0.95) - 1],
+        "throughput": throughput,
+        "model_rss_mb": rss_loaded - rss_before,
+        "rss_mb": rss_mb(),
+    }
+    del classifier
+    gc.collect()
+    return result
+
+
+class TestInferenceBackendsPerformance:
+    """Latencia, throughput y memoria por backend"""
+
+    def test_backend_report(self):
+        """
+        GIVEN: Cada backend disponible en este entorno
+        WHEN: Se mide la inferencia individual y por lotes
+        THEN: Se imprime un reporte comparativo y cada backend debe funcionar
+        """
+        report = {}
+        for backend in SUPPORTED_BACKENDS:
+            try:
+                report[backend] = benchmark_backend(backend)
+            except RuntimeError as e:
+                # Dependencia opcional ausente (p. ej. optimum para ONNX)
+                print(f"\n{backend}: omitido ({e})")
+
+        print(f"\n{'backend':<14}{'p50 ms':>9}{'p95 ms':>9}{'img/s':>9}{'modelo MB':>11}{'RSS MB':>9}")
+        for backend, r in report.items():
+            print(f"{backend:<14}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['throughput']:>9.1f}"
+                  f"{r['model_rss_mb']:>11.0f}{r['rss_mb']:>9.0f}")
+
+        assert "pytorch" in report
+        for r in report.values():
+            assert r["throughput"] > 0
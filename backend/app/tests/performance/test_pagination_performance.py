@@ -0,0 +1,83 @@
+"""
+Benchmark de paginación profunda del listado de reportes.
+Compara una página profunda por OFFSET contra la misma página por cursor (keyset)
+sobre una tabla grande (PERF_REPORTS_ROWS filas, 1M por defecto).
+"""
+import os
+import time
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.base import Base
+from app.models import user, report  # noqa: F401
+from app.services.report_service import ReportService
+from app.utils.helpers import encode_cursor
+
+ROWS = int(os.getenv("PERF_REPORTS_ROWS", "1000000"))
+PAGE_SIZE = 50
+
+
+@pytest.fixture(scope="module")
+def large_db():
+    """Fixture: SQLite en memoria con ROWS reportes (prioridades y fechas con empates)"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # Fechas con microsegundos: el mismo formato de texto con el que SQLAlchemy guarda y compara en SQLite
+        conn.execute(text("""
+            WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows)
+            INSERT INTO reports (latitude, longitude, image_url, status, priority, classification_status,
+                                 created_at, user_id)
+            SELECT 6.25, -75.56, 'https://storage.test/' || n || '.jpg', 'pending', 1 + n % 3, 'classified',
+                   datetime('2025-01-01', '+' || (n / 10) || ' seconds') || '.000000', 1 + n % 1000
+            FROM seq
+        """), {"rows": ROWS})
+        conn.execute(text("ANALYZE"))
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def timed(operation, repeat: int = 3) -> float:
+    """Helper: mejor tiempo (s) de varias ejecuciones"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class TestPaginationPerformance:
+    """Latencia de páginas profundas: OFFSET vs. keyset"""
+
+    def test_deep_keyset_page_costs_like_first_page(self, large_db):
+        """
+        GIVEN: Una tabla con ROWS reportes
+        WHEN: Se pide una página cerca del final por OFFSET y por cursor
+        THEN: La página por cursor debe costar casi lo mismo que la primera y mucho menos que OFFSET
+        """
+        deep_skip = ROWS - 10 * PAGE_SIZE
+        last_before, _ = ReportService.get_reports(large_db, skip=deep_skip - 1, limit=1)
+        cursor_row = last_before[0]
+        deep_cursor = encode_cursor([cursor_row.priority, cursor_row.created_at, cursor_row.id])
+
+        first = timed(lambda: ReportService.get_reports_page(large_db, limit=PAGE_SIZE))
+        keyset = timed(lambda: ReportService.get_reports_page(large_db, limit=PAGE_SIZE, cursor=deep_cursor))
+        offset = timed(lambda: ReportService.get_reports(large_db, skip=deep_skip, limit=PAGE_SIZE))
+
+        keyset_ids = [r.id for r in ReportService.get_reports_page(large_db, limit=PAGE_SIZE, cursor=deep_cursor)[0]]
+        offset_ids = [r.id for r in ReportService.get_reports(large_db, skip=deep_skip, limit=PAGE_SIZE)[0]]
+
+        print(f"\n{ROWS} reportes, página de {PAGE_SIZE}:")
+        print(f"Primera página (keyset):  {first * 1000:.2f} ms")
+        print(f"Página profunda (keyset): {keyset * 1000:.2f} ms")
+        print(f"Página profunda (OFFSET): {offset * 1000:.2f} ms")
+
+        assert keyset_ids == offset_ids
+        assert keyset < max(first * 5, 0.02)
+        assert keyset * 10 < offset
@@ -0,0 +1,77 @@
+"""
+Benchmark del recálculo masivo de prioridades.
+Compara el UPDATE ... CASE contra el recorrido por lotes en Python sobre
+PERF_RECALC_ROWS reportes activos (100k por defecto).
+"""
+import os
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.base import Base
+from app.models import user, report, report_counter  # noqa: F401
+from app.services.report_service import ReportService
+
+ROWS = int(os.getenv("PERF_RECALC_ROWS", "100000"))
+WASTE_TYPES = ["'battery'", "'plastic'", "'glass'", "'organic'", "'paper'", "'styrofoam'", "NULL"]
+
+
+@contextmanager
+def active_reports_db():
+    """Helper: SQLite en memoria con ROWS reportes activos de todos los tipos, confianzas y antigüedades"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    waste_type = "CASE n % 7 " + " ".join(f"WHEN {i} THEN {v}" for i, v in enumerate(WASTE_TYPES)) + " END"
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows)
+            INSERT INTO reports (latitude, longitude, image_url, status, priority, classification_status,
+                                 waste_type, confidence_score, created_at)
+            SELECT 6.25, -75.56, 'https://storage.test/' || n || '.jpg',
+                   CASE WHEN n % 2 THEN 'pending' ELSE 'in_progress' END, 1, 'classified',
+                   {waste_type}, CASE WHEN n % 11 = 0 THEN NULL ELSE n % 100 END,
+                   datetime('now', '-' || (n % 300) || ' hours') || '.000000'
+            FROM seq
+        """), {"rows": ROWS})
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def timed(operation):
+    """Helper: resultado y tiempo (s) de una ejecución"""
+    start = time.perf_counter()
+    result = operation()
+    return result, time.perf_counter() - start
+
+
+class TestPriorityRecalculationPerformance:
+    """Recálculo de prioridades: UPDATE ... CASE vs. lotes en Python"""
+
+    def test_set_based_update_is_faster_than_chunked_loop(self):
+        """
+        GIVEN: Dos bases iguales con ROWS reportes activos
+        WHEN: Se recalculan las prioridades por UPDATE ... CASE en una y por lotes en la otra
+        THEN: Ambas deben quedar iguales y el UPDATE debe ser varias veces más rápido
+        """
+        with active_reports_db() as set_db, active_reports_db() as chunked_db:
+            set_result, set_time = timed(lambda: ReportService.recalculate_all_priorities(set_db))
+            chunked_result, chunked_time = timed(
+                lambda: ReportService._recalculate_priorities_chunked(chunked_db, chunk_size=1000)
+            )
+            query = text("SELECT priority, count(*) FROM reports GROUP BY priority ORDER BY priority")
+            set_priorities = set_db.execute(query).all()
+            chunked_priorities = chunked_db.execute(query).all()
+
+        print(f"\n{ROWS} reportes activos:")
+        print(f"UPDATE ... CASE:  {set_time * 1000:.0f} ms")
+        print(f"Lotes en Python:  {chunked_time * 1000:.0f} ms")
+
+        assert set_result == chunked_result
+        assert set_result["updated"] > 0
+        assert set_priorities == chunked_priorities
+        assert set_time * 3 < chunked_time
@@ -0,0 +1,159 @@
+"""
+Planes de ejecución de las consultas de reportes.
+Ejecuta las consultas de ReportService sobre una tabla grande (PERF_PLAN_ROWS filas),
+corre EXPLAIN QUERY PLAN sobre cada sentencia emitida y falla si alguna recorre la
+tabla completa u ordena en una tabla temporal en lugar de usar un índice.
+"""
+import os
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.migrations import run_migrations
+from app.models.base import Base
+from app.models import user, report  # noqa: F401
+from app.models.report import Report
+from app.services.report_service import ReportService
+from app.utils.helpers import encode_cursor
+
+ROWS = int(os.getenv("PERF_PLAN_ROWS", "100000"))
+
+
+@pytest.fixture(scope="module")
+def engine():
+    """Fixture: SQLite en memoria con ROWS reportes y estadísticas del planificador (ANALYZE)"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # La mayoría resueltos y clasificados, como en producción; fechas con microsegundos
+        # (el formato con el que SQLAlchemy guarda y compara en SQLite)
+        conn.execute(text("""
+            WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows)
+            INSERT INTO reports (latitude, longitude, image_url, status, priority, waste_type,
+                                 confidence_score, classification_status, created_at, user_id)
+            SELECT 6.25, -75.56, 'https://storage.test/' || n || '.jpg',
+                   CASE WHEN n % 10 < 7 THEN 'resolved' WHEN n % 10 < 9 THEN 'pending' ELSE 'in_progress' END,
+                   1 + n % 3,
+                   CASE n % 6 WHEN 0 THEN 'plastic' WHEN 1 THEN 'glass' WHEN 2 THEN 'paper'
+                              WHEN 3 THEN 'metal' WHEN 4 THEN 'organic' ELSE 'trash' END,
+                   50 + n % 50,
+                   CASE WHEN n % 500 = 0 THEN 'pending' ELSE 'classified' END,
+                   datetime('2025-01-01', '+' || (n * 30) || ' seconds') || '.000000',
+                   1 + n % 2000
+            FROM seq
+        """), {"rows": ROWS})
+        conn.execute(text("ANALYZE"))
+    yield engine
+    engine.dispose()
+
+
+def capture_statements(engine, operation) -> list:
+    """Helper: sentencias (SQL, parámetros) que emite la operación"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            parameters = parameters[0]
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        operation()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def plan_problems(engine, statement: str, parameters) -> list:
+    """
+    Helper: líneas del plan que recorren reports completa u ordenan en una tabla temporal.
+
+    Un SCAN sin índice es un recorrido secuencial; un SCAN por un índice no
+    cubriente sin LIMIT también lee la tabla entera (y además en desorden).
+    """
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    limited = " LIMIT " in statement.upper()
+    problems = []
+    for detail in (row[-1] for row in rows):
+        if detail.startswith("SCAN reports") and "COVERING INDEX" not in detail \
+                and not ("USING INDEX" in detail and limited):
+            problems.append(detail)
+        if detail.startswith("USE TEMP B-TREE FOR ORDER BY"):
+            problems.append(detail)
+    return problems
+
+
+def cursor_for(db, skip: int) -> str:
+    """Helper: cursor de la página que empieza en `skip`"""
+    row = ReportService.get_reports(db, skip=skip - 1, limit=1, count_mode="none")[0][0]
+    return encode_cursor([row.priority, row.created_at, row.id])
+
+
+REPORT_SERVICE_QUERIES = {
+    "listado": lambda db, c: ReportService.get_reports(db, limit=50, count_mode="exact"),
+    "listado por estado": lambda db, c: ReportService.get_reports(db, limit=50, status="pending", count_mode="exact"),
+    "listado por tipo": lambda db, c: ReportService.get_reports(db, limit=50, waste_type="glass", count_mode="exact"),
+    "listado por prioridad": lambda db, c: ReportService.get_reports(db, limit=50, priority=2, count_mode="exact"),
+    "listado por estado y tipo": lambda db, c: ReportService.get_reports(
+        db, limit=50, status="in_progress", waste_type="metal", count_mode="exact"
+    ),
+    "página por cursor": lambda db, c: ReportService.get_reports_page(db, limit=50, cursor=c),
+    "página por cursor con estado": lambda db, c: ReportService.get_reports_page(
+        db, limit=50, status="pending", cursor=c
+    ),
+    "historial de usuario": lambda db, c: ReportService.get_user_reports(db, user_id=7, limit=20, count_mode="exact"),
+    "historial de usuario por estado": lambda db, c: ReportService.get_user_reports_page(
+        db, user_id=7, limit=20, status="resolved"
+    ),
+    "urgentes": lambda db, c: ReportService.get_urgent_reports(db, limit=10),
+    "por id": lambda db, c: ReportService.get_report_by_id(db, ROWS // 2),
+    "estadísticas de prioridad": lambda db, c: ReportService.get_priority_stats(db),
+}
+
+
+class TestReportQueryPlans:
+    """Ninguna consulta de ReportService debe recorrer la tabla reports completa"""
+
+    @pytest.mark.parametrize("name", list(REPORT_SERVICE_QUERIES))
+    def test_query_uses_indexes(self, engine, name):
+        """
+        GIVEN: Una tabla con ROWS reportes y estadísticas del planificador
+        WHEN: Se ejecuta la consulta de ReportService y se analiza el plan de cada sentencia
+        THEN: Ninguna sentencia debe hacer un SCAN completo de reports ni ordenar fuera de un índice
+        """
+        db = sessionmaker(bind=engine)()
+        try:
+            cursor = cursor_for(db, ROWS // 2)
+            statements = capture_statements(engine, lambda: REPORT_SERVICE_QUERIES[name](db, cursor))
+        finally:
+            db.close()
+
+        assert statements
+        problems = {
+            statement: plan_problems(engine, statement, parameters)
+            for statement, parameters in statements
+        }
+        assert not any(problems.values()), {s: p for s, p in problems.items() if p}
+
+    def test_run_migrations_creates_missing_indexes(self):
+        """
+        GIVEN: Una tabla reports creada antes de los índices compuestos
+        WHEN: Se ejecutan las migraciones
+        THEN: Debe crear los índices declarados en el modelo para este dialecto
+        """
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            for index in Report.__table__.indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+        run_migrations(engine)
+
+        created = {index["name"] for index in inspect(engine).get_indexes("reports")}
+        assert "ix_reports_status_priority_created_at_id" in created
+        assert "ix_reports_user_id_created_at_id" in created
+        assert "ix_reports_classification_backlog" in created
+        # Parcial solo para PostgreSQL (ddl_if): no se crea en SQLite
+        assert "ix_reports_active_priority_created_at" not in created
+        engine.dispose()
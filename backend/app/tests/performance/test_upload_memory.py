@@ -0,0 +1,74 @@
+"""
+Benchmark de memoria de la ingesta de imágenes subidas.
+Compara el pico de memoria (tracemalloc) de leer la subida completa con
+`await image.read()` contra la lectura por fragmentos con límite de tamaño.
+"""
+import tempfile
+import tracemalloc
+import pytest
+from starlette.datastructures import UploadFile
+from app.utils.validators import UploadTooLargeError, read_image_upload
+
+MB = 1024 * 1024
+
+
+def make_upload(size: int, known_size: bool = False) -> UploadFile:
+    """Helper: subida JPEG (cabecera válida) de `size` bytes, en disco como la deja Starlette"""
+    spooled = tempfile.SpooledTemporaryFile(max_size=MB)
+    spooled.write(b"\xff\xd8\xff" + b"\x00" * (size - 3))
+    spooled.seek(0)
+    return UploadFile(spooled, filename="foto.jpg", size=size if known_size else None)
+
+
+async def peak_memory(operation) -> int:
+    """Helper: pico de memoria asignada (bytes) durante la operación"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        await operation()
+    except UploadTooLargeError:
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+class TestUploadMemory:
+    """Pico de memoria por subida"""
+
+    @pytest.mark.asyncio
+    async def test_oversized_upload_peak_is_bounded(self):
+        """
+        GIVEN: Una subida de 40MB con límite de 5MB
+        WHEN: Se lee completa vs. por fragmentos
+        THEN: La lectura por fragmentos no debe superar ~límite + fragmento de memoria
+        """
+        full = make_upload(40 * MB)
+        full_peak = await peak_memory(full.read)
+
+        streamed = make_upload(40 * MB)
+        streamed_peak = await peak_memory(lambda: read_image_upload(streamed, max_size_mb=5))
+
+        known = make_upload(40 * MB, known_size=True)
+        known_peak = await peak_memory(lambda: read_image_upload(known, max_size_mb=5))
+
+        print(f"\nLectura completa:              pico {full_peak / MB:.1f} MB")
+        print(f"Por fragmentos (sin tamaño):   pico {streamed_peak / MB:.1f} MB")
+        print(f"Por fragmentos (tamaño previo): pico {known_peak / MB:.1f} MB")
+
+        assert full_peak >= 40 * MB
+        assert streamed_peak < 7 * MB
+        assert known_peak < 1 * MB
+
+    @pytest.mark.asyncio
+    async def test_valid_upload_peak_close_to_size(self):
+        """
+        GIVEN: Una subida válida de 4MB
+        WHEN: Se lee por fragmentos
+        THEN: El pico no debe superar ~2x el tamaño del archivo
+        """
+        upload = make_upload(4 * MB)
+        peak = await peak_memory(lambda: read_image_upload(upload, max_size_mb=5))
+
+        print(f"\nSubida válida de 4MB: pico {peak / MB:.1f} MB")
+        assert peak < 8 * MB
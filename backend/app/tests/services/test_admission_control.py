@@ -0,0 +1,110 @@
+"""
+Pruebas unitarias del control de admisión de inferencia.
+"""
+import pytest
+import asyncio
+import time
+from app.services.admission_control import AdmissionController, OverloadedError
+from app.services.inference_pool import InferenceTimeoutError
+
+
+class TestAdmissionControllerUnit:
+    """Suite de pruebas unitarias para AdmissionController"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.asyncio
+    async def test_limits_in_flight(self):
+        """
+        GIVEN: Un máximo de 2 clasificaciones en vuelo
+        WHEN: Llegan 6 solicitudes concurrentes
+        THEN: Nunca deben ejecutarse más de 2 a la vez y todas deben completarse
+        """
+        controller = AdmissionController(max_in_flight=2, max_queue=10, max_wait_s=5, deadline_s=5)
+        running, peak = 0, 0
+
+        async def operation():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return "ok"
+
+        results = await asyncio.gather(*(controller.run(operation) for _ in range(6)))
+
+        assert results == ["ok"] * 6
+        assert peak == 2
+
+    # ==================== PRUEBA 2 ====================
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        """
+        GIVEN: 1 en vuelo y una cola de espera de 1
+        WHEN: Llegan 3 solicitudes concurrentes
+        THEN: La tercera debe rechazarse de inmediato con OverloadedError
+        """
+        controller = AdmissionController(max_in_flight=1, max_queue=1, max_wait_s=5, deadline_s=5)
+
+        async def operation():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        results = await asyncio.gather(
+            *(controller.run(operation) for _ in range(3)), return_exceptions=True
+        )
+
+        assert results[:2] == ["ok", "ok"]
+        assert isinstance(results[2], OverloadedError)
+        assert controller.stats()["rejected"] == 1
+
+    # ==================== PRUEBA 3 ====================
+    @pytest.mark.asyncio
+    async def test_wait_and_deadline_limits(self):
+        """
+        GIVEN: Una operación más lenta que el plazo y una espera máxima corta
+        WHEN: Se ejecutan dos solicitudes con un solo cupo
+        THEN: La admitida vence su plazo y la que espera se rechaza
+        """
+        controller = AdmissionController(max_in_flight=1, max_queue=5, max_wait_s=0.05, deadline_s=0.1)
+
+        async def operation():
+            await asyncio.sleep(0.3)
+
+        results = await asyncio.gather(
+            controller.run(operation), controller.run(operation), return_exceptions=True
+        )
+
+        assert isinstance(results[0], InferenceTimeoutError)
+        assert isinstance(results[1], OverloadedError)
+        await asyncio.sleep(0.4)
+        assert controller.stats()["in_flight"] == 0
+
+    # ==================== PRUEBA 4 ====================
+    @pytest.mark.asyncio
+    async def test_timed_out_thread_keeps_its_slot(self):
+        """
+        GIVEN: Una inferencia en un hilo (sin pool de procesos) más lenta que el plazo y un solo cupo
+        WHEN: Vence su plazo y llega otra solicitud
+        THEN: El hilo debe seguir ocupando el cupo hasta terminar, y recién ahí admitir la siguiente
+        """
+        controller = AdmissionController(max_in_flight=1, max_queue=5, max_wait_s=0.05, deadline_s=0.05)
+        running, peak = 0, 0
+
+        def infer():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            time.sleep(0.3)
+            running -= 1
+            return "ok"
+
+        with pytest.raises(InferenceTimeoutError):
+            await controller.run(lambda: asyncio.to_thread(infer))
+        assert controller.stats()["in_flight"] == 1
+        with pytest.raises(OverloadedError):
+            await controller.run(lambda: asyncio.to_thread(infer))
+
+        await asyncio.sleep(0.35)
+        assert controller.stats()["in_flight"] == 0
+        assert await controller.run(lambda: asyncio.to_thread(lambda: "ok")) == "ok"
+        assert peak == 1
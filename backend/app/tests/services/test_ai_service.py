@@ -124,4 +124,57 @@ class TestAIServiceUnit:
 
         # Nota: Esta prueba es más flexible porque el modelo puede
         # clasificar de diferentes maneras según su entrenamiento
-        assert result['type'] is not None, "Debe retornar un tipo"
\ No newline at end of file
+        assert result['type'] is not None, "Debe retornar un tipo"
+
+    # ==================== PRUEBA 7 ====================
+    def test_warm_up_marks_service_ready(self, monkeypatch):
+        """
+        GIVEN: Un pipeline disponible
+        WHEN: Se ejecuta el calentamiento
+        THEN: Debe correr una inferencia de prueba y reportar el modelo como listo
+        """
+        calls = []
+
+        def fake_pipeline(image):
+            calls.append(image.size)
+            return [{"label": "plastic", "score": 0.9}]
+
+        monkeypatch.setattr(AIService, "_pipeline", fake_pipeline)
+        monkeypatch.setattr(AIService, "_ready", False)
+
+        assert AIService.warm_up() is True
+        assert calls, "El calentamiento debe ejecutar una inferencia de prueba"
+        assert AIService.readiness()["model_ready"] is True
+
+    # ==================== PRUEBA 8 ====================
+    @pytest.mark.asyncio
+    async def test_batch_async_uses_cache_and_chunks(self, ai_service, monkeypatch):
+        """
+        GIVEN: 5 imágenes, una ya en la caché, y lotes de máximo 2
+        WHEN: Se clasifican con classify_waste_batch_async
+        THEN: Solo las 4 restantes deben llegar al modelo, en lotes de 2, y
+              una imagen corrupta no debe afectar a las demás
+        """
+        from app.core.config import settings
+        from app.services.classification_cache import ClassificationCache
+
+        cache = ClassificationCache()
+        monkeypatch.setattr(AIService, "_get_cache", staticmethod(lambda: cache))
+        monkeypatch.setattr(settings, "AI_BATCH_MAX_SIZE", 2)
+        monkeypatch.setattr(settings, "AI_PROCESS_POOL_WORKERS", 0)
+        cache.set(cache.digest(b"cached"), {"type": "glass", "confidence": 70.0})
+        batches = []
+
+        def fake_batch(images):
+            batches.append(list(images))
+            return [ValueError("Imagen inválida o corrupta") if image == b"bad" else
+                    {"type": "paper", "confidence": 80.0} for image in images]
+
+        monkeypatch.setattr(ai_service, "classify_waste_batch", fake_batch)
+
+        results = await ai_service.classify_waste_batch_async([b"a", b"cached", b"bad", b"c", b"d"])
+
+        assert sorted(len(batch) for batch in batches) == [2, 2]
+        assert results[1] == {"type": "glass", "confidence": 70.0}
+        assert isinstance(results[2], ValueError)
+        assert results[0] == results[3] == results[4] == {"type": "paper", "confidence": 80.0}
@@ -0,0 +1,137 @@
+"""
+Pruebas unitarias de la caché de clasificaciones.
+Valida LRU, TTL, invalidación por modelo y métricas de aciertos.
+"""
+import pytest
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.models.classification_cache import ClassificationCacheEntry
+from app.models.image_asset import ImageAsset
+from app.services.classification_cache import ClassificationCache, classifier_id
+from app.services.image_asset_service import ImageAssetService
+
+
+class TestClassificationCacheUnit:
+    """Suite de pruebas unitarias para ClassificationCache"""
+
+    RESULT = {"type": "plastic", "confidence": 91.2}
+
+    # ==================== PRUEBA 1 ====================
+    def test_hit_and_miss_metrics(self):
+        """
+        GIVEN: Una caché vacía
+        WHEN: Se consulta, se guarda y se vuelve a consultar la misma imagen
+        THEN: Debe registrar un fallo y luego un acierto
+        """
+        cache = ClassificationCache(max_entries=10, ttl_seconds=60, persist=False)
+        digest = cache.digest(b"imagen")
+
+        assert cache.get(digest) is None
+        cache.set(digest, self.RESULT)
+        assert cache.get(digest) == self.RESULT
+
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    # ==================== PRUEBA 2 ====================
+    def test_lru_eviction(self):
+        """
+        GIVEN: Una caché con capacidad 2
+        WHEN: Se guardan 3 entradas habiendo usado la primera
+        THEN: Debe expulsar la menos usada recientemente
+        """
+        cache = ClassificationCache(max_entries=2, ttl_seconds=60, persist=False)
+        a, b, c = (cache.digest(x) for x in (b"a", b"b", b"c"))
+        cache.set(a, self.RESULT)
+        cache.set(b, self.RESULT)
+        cache.get(a)  # 'a' pasa a ser la más reciente
+        cache.set(c, self.RESULT)
+
+        assert cache.get(b) is None
+        assert cache.get(a) is not None
+        assert cache.stats()["evictions"] == 1
+
+    # ==================== PRUEBA 3 ====================
+    def test_entries_expire_after_ttl(self):
+        """
+        GIVEN: Una entrada guardada con TTL corto
+        WHEN: Pasa el TTL
+        THEN: Debe considerarse un fallo
+        """
+        cache = ClassificationCache(max_entries=10, ttl_seconds=0.05, persist=False)
+        digest = cache.digest(b"imagen")
+        cache.set(digest, self.RESULT)
+
+        time.sleep(0.1)
+
+        assert cache.get(digest) is None
+        assert cache.stats()["expirations"] == 1
+
+    # ==================== PRUEBA 4 ====================
+    def test_new_model_id_invalidates(self):
+        """
+        GIVEN: Un resultado guardado con el modelo actual
+        WHEN: Cambia AI_MODEL_ID
+        THEN: El resultado anterior no debe devolverse
+        """
+        cache = ClassificationCache(max_entries=10, ttl_seconds=60, persist=False)
+        digest = cache.digest(b"imagen")
+        cache.set(digest, self.RESULT)
+
+        with patch.object(settings, "AI_MODEL_ID", "otro/modelo"):
+            assert cache.get(digest) is None
+            assert cache.stats()["model_id"] == f"otro/modelo:{settings.AI_INFERENCE_BACKEND}"
+
+    # ==================== PRUEBA 5 ====================
+    def test_new_inference_backend_invalidates(self, db_session):
+        """
+        GIVEN: Un resultado del backend fp32 guardado en memoria, en BD y en el índice de contenido
+        WHEN: Se cambia AI_INFERENCE_BACKEND a "onnx-int8"
+        THEN: Ninguno debe devolverse, para que se use la salida real del backend cuantizado
+        """
+        cache = ClassificationCache(max_entries=10, ttl_seconds=60, persist=True)
+        digest = cache.digest(b"imagen")
+        asset = ImageAsset(content_hash=digest, object_key="x", image_url="x")
+        db_session.add(asset)
+        db_session.commit()
+
+        with patch("app.core.database.SessionLocal", sessionmaker(bind=db_session.get_bind())), \
+             patch.object(settings, "AI_INFERENCE_BACKEND", "pytorch"):
+            cache.set(digest, self.RESULT)
+            ImageAssetService.register(db_session, digest, "x", "x", classification=self.RESULT)
+            assert ImageAssetService.cached_classification(asset) == self.RESULT
+
+            with patch.object(settings, "AI_INFERENCE_BACKEND", "onnx-int8"):
+                assert cache.get(digest) is None
+                assert ImageAssetService.cached_classification(asset) is None
+
+    # ==================== PRUEBA 6 ====================
+    def test_persisted_entries_expire_after_ttl(self, db_session):
+        """
+        GIVEN: Dos filas persistidas, una reciente y otra más vieja que el TTL
+        WHEN: Una caché recién arrancada las consulta y luego se vuelve a clasificar la vieja
+        THEN: Solo la reciente debe ser un acierto, con el TTL que le queda, y la vieja renovarse
+        """
+        now = datetime.now(timezone.utc)
+        cache = ClassificationCache(max_entries=10, ttl_seconds=3600, persist=True)
+        fresh, stale = cache.digest(b"reciente"), cache.digest(b"vieja")
+        for digest, age in ((fresh, timedelta(minutes=50)), (stale, timedelta(hours=2))):
+            db_session.add(ClassificationCacheEntry(
+                digest=digest, model_id=classifier_id(), waste_type="glass",
+                confidence_score=80.0, created_at=now - age,
+            ))
+        db_session.commit()
+
+        with patch("app.core.database.SessionLocal", sessionmaker(bind=db_session.get_bind())):
+            assert cache.get(fresh) == {"type": "glass", "confidence": 80.0}
+            assert cache.get(stale) is None
+            stored_at, _ = cache._entries[(fresh, classifier_id())]
+            assert time.monotonic() - stored_at == pytest.approx(50 * 60, abs=5)
+
+            cache.set(stale, self.RESULT)
+            cache.clear()
+            assert cache.get(stale) == self.RESULT
@@ -0,0 +1,127 @@
+"""
+Pruebas unitarias del almacén de claves de idempotencia.
+Valida que los reintentos y duplicados concurrentes no repitan el trabajo.
+"""
+import pytest
+import asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.base import Base
+from app.services.idempotency import (
+    IdempotencyConflictError,
+    IdempotencyStore,
+    IdempotentResponse,
+)
+
+
+def counting_operation(calls: list, delay: float = 0.0, fail: bool = False):
+    """Helper: operación que registra cuántas veces se ejecutó"""
+    async def operation():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("Fallo transitorio")
+        return IdempotentResponse(200, {"id": len(calls)}, None)
+    return operation
+
+
+class TestIdempotencyStoreUnit:
+    """Suite de pruebas unitarias para IdempotencyStore"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.asyncio
+    async def test_retry_returns_stored_response(self):
+        """
+        GIVEN: Una solicitud ya completada con una Idempotency-Key
+        WHEN: Se reintenta con la misma clave y contenido
+        THEN: Debe devolver la respuesta guardada sin ejecutar de nuevo
+        """
+        store = IdempotencyStore(ttl_seconds=60, wait_seconds=5, persist=False)
+        calls = []
+
+        first, first_replayed = await store.run("u1:key", "fp", counting_operation(calls))
+        second, second_replayed = await store.run("u1:key", "fp", counting_operation(calls))
+
+        assert len(calls) == 1
+        assert (first_replayed, second_replayed) == (False, True)
+        assert second.body == first.body == {"id": 1}
+
+    # ==================== PRUEBA 2 ====================
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_wait_for_first(self):
+        """
+        GIVEN: 5 solicitudes concurrentes con la misma clave
+        WHEN: La primera tarda 0.1s
+        THEN: Solo una debe ejecutarse y todas deben recibir su respuesta
+        """
+        store = IdempotencyStore(ttl_seconds=60, wait_seconds=5, persist=False)
+        calls = []
+
+        results = await asyncio.gather(*(
+            store.run("u1:key", "fp", counting_operation(calls, delay=0.1)) for _ in range(5)
+        ))
+
+        assert len(calls) == 1
+        assert sum(1 for _, replayed in results if not replayed) == 1
+        assert all(response.body == {"id": 1} for response, _ in results)
+
+    # ==================== PRUEBA 3 ====================
+    @pytest.mark.asyncio
+    async def test_key_reused_with_different_content(self):
+        """
+        GIVEN: Una clave ya usada
+        WHEN: Se envía con otro contenido
+        THEN: Debe lanzar IdempotencyConflictError
+        """
+        store = IdempotencyStore(ttl_seconds=60, wait_seconds=5, persist=False)
+        await store.run("u1:key", "fp-a", counting_operation([]))
+
+        with pytest.raises(IdempotencyConflictError):
+            await store.run("u1:key", "fp-b", counting_operation([]))
+
+    # ==================== PRUEBA 4 ====================
+    @pytest.mark.asyncio
+    async def test_failed_execution_is_not_stored(self):
+        """
+        GIVEN: Una primera ejecución que falla mientras un duplicado espera
+        WHEN: Termina con error
+        THEN: El duplicado debe reintentar la operación en lugar de recibir el error
+        """
+        store = IdempotencyStore(ttl_seconds=60, wait_seconds=5, persist=False)
+        calls = []
+
+        first = asyncio.create_task(store.run("u1:key", "fp", counting_operation(calls, delay=0.05, fail=True)))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(store.run("u1:key", "fp", counting_operation(calls)))
+
+        with pytest.raises(RuntimeError):
+            await first
+        response, replayed = await second
+
+        assert len(calls) == 2
+        assert replayed is False and response.body == {"id": 2}
+
+    # ==================== PRUEBA 5 ====================
+    @pytest.mark.asyncio
+    async def test_persisted_keys_are_shared_between_workers(self):
+        """
+        GIVEN: Dos workers (almacenes) que comparten la tabla idempotency_keys
+        WHEN: El segundo recibe un duplicado mientras el primero lo ejecuta
+        THEN: Debe esperar la respuesta del primero sin ejecutar la operación
+        """
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        worker_a = IdempotencyStore(ttl_seconds=60, wait_seconds=5, persist=True, session_factory=factory)
+        worker_b = IdempotencyStore(ttl_seconds=60, wait_seconds=5, persist=True, session_factory=factory)
+        calls = []
+
+        first = asyncio.create_task(worker_a.run("u1:key", "fp", counting_operation(calls, delay=0.2)))
+        await asyncio.sleep(0.05)
+        response, replayed = await worker_b.run("u1:key", "fp", counting_operation(calls))
+        await first
+        engine.dispose()
+
+        assert len(calls) == 1
+        assert replayed is True and response.body == {"id": 1}
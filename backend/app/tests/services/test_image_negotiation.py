@@ -0,0 +1,39 @@
+"""
+Pruebas unitarias de la negociación de formato de los derivados de imagen.
+"""
+import pytest
+from app.utils.helpers import image_url_for_format, negotiate_image_format
+
+
+class TestImageNegotiationUnit:
+    """Suite de pruebas unitarias para negotiate_image_format"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.parametrize("accept,available,expected", [
+        ("image/avif,image/webp,*/*", "avif,webp,jpeg", "avif"),
+        ("image/avif,image/webp,*/*", "webp,jpeg", "webp"),
+        ("image/webp,*/*", "avif,webp,jpeg", "webp"),
+        ("*/*", "avif,webp,jpeg", "jpeg"),
+        (None, "webp,jpeg", "jpeg"),
+        ("image/webp", None, "jpeg"),
+    ])
+    def test_prefers_best_supported_format(self, accept, available, expected):
+        """
+        GIVEN: El header Accept del cliente y los formatos generados
+        WHEN: Se negocia el formato
+        THEN: Debe elegir el más eficiente que ambos soportan, o JPEG
+        """
+        assert negotiate_image_format(accept, available) == expected
+
+    # ==================== PRUEBA 2 ====================
+    def test_url_extension_is_rewritten(self):
+        """
+        GIVEN: La URL JPEG de respaldo de una miniatura
+        WHEN: Se pide en WebP o JPEG
+        THEN: Debe cambiar solo la extensión
+        """
+        url = "https://cdn.test/bucket/abc/thumb.jpg"
+
+        assert image_url_for_format(url, "webp") == "https://cdn.test/bucket/abc/thumb.webp"
+        assert image_url_for_format(url, "jpeg") == url
+        assert image_url_for_format(None, "webp") is None
@@ -0,0 +1,95 @@
+"""
+Pruebas unitarias del preprocesamiento rápido de imágenes.
+Compara contra el procesador de transformers sin necesitar el modelo.
+"""
+import pytest
+import io
+import numpy as np
+from types import SimpleNamespace
+from PIL import Image
+from transformers import ViTImageProcessor
+from app.services.image_preprocessing import FastPreprocessor
+
+
+def gradient_image(size):
+    """Helper: imagen con contenido variado (para que el resize importe)"""
+    w, h = size
+    x = np.linspace(0, 255, w, dtype=np.uint8)
+    y = np.linspace(0, 255, h, dtype=np.uint8)
+    arr = np.stack([np.tile(x, (h, 1)), np.tile(y[:, None], (1, w)), np.full((h, w), 128, np.uint8)], axis=-1)
+    return Image.fromarray(arr)
+
+
+def encode(img, fmt):
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt, quality=90)
+    return buffer.getvalue()
+
+
+class TestFastPreprocessorUnit:
+    """Suite de pruebas unitarias para FastPreprocessor"""
+
+    @pytest.fixture
+    def processor(self):
+        return ViTImageProcessor(size={"height": 224, "width": 224}, image_mean=[0.5] * 3, image_std=[0.5] * 3)
+
+    @pytest.fixture
+    def fast(self, processor):
+        return FastPreprocessor.from_pipeline(SimpleNamespace(image_processor=processor, model=object()))
+
+    # ==================== PRUEBA 1 ====================
+    def test_matches_transformers_processor(self, processor, fast):
+        """
+        GIVEN: Una imagen PNG (sin decodificación reducida)
+        WHEN: Se preprocesa con el camino rápido y con el procesador de transformers
+        THEN: Los pixel_values deben coincidir
+        """
+        data = encode(gradient_image((640, 480)), "PNG")
+
+        expected = processor(Image.open(io.BytesIO(data)).convert("RGB"), return_tensors="np")["pixel_values"]
+        actual = fast.to_pixel_values([fast.load(Image.open(io.BytesIO(data)))])
+
+        assert actual.shape == expected.shape == (1, 3, 224, 224)
+        assert np.abs(actual - expected).max() < 0.02
+
+    # ==================== PRUEBA 2 ====================
+    def test_jpeg_uses_reduced_decode(self, fast):
+        """
+        GIVEN: Una foto JPEG de 4000x3000 (12 MP)
+        WHEN: Se carga con el preprocesador rápido
+        THEN: El decodificador debe trabajar a escala reducida y no a resolución completa
+        """
+        img = Image.open(io.BytesIO(encode(gradient_image((4000, 3000)), "JPEG")))
+
+        img.draft("RGB", (fast.width, fast.height))
+        assert img.size[0] <= 4000 // 8 * 2, f"Decodificación no reducida: {img.size}"
+
+        loaded = fast.load(Image.open(io.BytesIO(encode(gradient_image((4000, 3000)), "JPEG"))))
+        assert loaded.size == (224, 224)
+        assert loaded.mode == "RGB"
+
+    # ==================== PRUEBA 3 ====================
+    def test_buffer_is_reused(self, fast):
+        """
+        GIVEN: Dos lotes consecutivos en el mismo hilo
+        WHEN: Se convierten a pixel_values
+        THEN: Deben escribirse sobre el mismo buffer, sin reservar memoria nueva
+        """
+        images = [fast.load(gradient_image((300, 300))) for _ in range(4)]
+
+        first = fast.to_pixel_values(images)
+        second = fast.to_pixel_values(images[:2])
+
+        assert np.shares_memory(first, second)
+        assert second.shape == (2, 3, 224, 224)
+
+    # ==================== PRUEBA 4 ====================
+    def test_center_crop_processor_is_not_supported(self):
+        """
+        GIVEN: Un procesador con recorte central
+        WHEN: Se intenta construir el preprocesador rápido
+        THEN: Debe retornar None para usar el pipeline estándar
+        """
+        processor = SimpleNamespace(size={"shortest_edge": 256}, do_center_crop=True)
+
+        assert FastPreprocessor.from_pipeline(SimpleNamespace(image_processor=processor, model=object())) is None
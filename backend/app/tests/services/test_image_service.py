@@ -0,0 +1,128 @@
+"""
+Pruebas unitarias del servicio de imágenes.
+Usa un transporte HTTP simulado en lugar de Supabase Storage.
+"""
+import pytest
+import asyncio
+import io
+import httpx
+from PIL import Image
+from app.services.image_service import ImageService
+from app.services.storage_service import MemoryStorageBackend, SupabaseStorageBackend
+
+
+@pytest.fixture
+def valid_image_bytes():
+    """Fixture: Imagen PNG válida"""
+    img = Image.new('RGB', (400, 300), color='blue')
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def storage_requests():
+    """Fixture: Registra las peticiones enviadas al storage simulado"""
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        return httpx.Response(200, json={"Key": request.url.path})
+
+    SupabaseStorageBackend._client = httpx.AsyncClient(
+        base_url="https://storage.test/storage/v1",
+        transport=httpx.MockTransport(handler),
+    )
+    SupabaseStorageBackend._client_loop = None
+    yield requests
+    SupabaseStorageBackend._client = None
+    SupabaseStorageBackend._client_loop = None
+
+
+class TestImageServiceUnit:
+    """Suite de pruebas unitarias para ImageService"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.asyncio
+    async def test_upload_sends_compressed_jpeg_from_memory(self, valid_image_bytes, storage_requests):
+        """
+        GIVEN: Una imagen PNG válida
+        WHEN: Se sube con upload_image
+        THEN: Debe enviarse como JPEG en el cuerpo de la petición y retornar la URL pública
+        """
+        SupabaseStorageBackend._client_loop = asyncio.get_running_loop()
+
+        url = await ImageService().upload_image(valid_image_bytes, "photo.png")
+
+        # La imagen completa (los derivados van bajo <hash>/...)
+        main = [r for r in storage_requests if r.url.path.endswith(url.rsplit("/", 1)[1])]
+        assert len(main) == 1
+        body = main[0].content
+        assert body[:3] == b"\xff\xd8\xff", "El cuerpo debe ser un JPEG"
+        assert main[0].headers["content-type"] == "image/jpeg"
+        assert "/object/public/" in url and url.endswith(".jpg")
+
+    # ==================== PRUEBA 2 ====================
+    @pytest.mark.asyncio
+    async def test_upload_rejects_invalid_extension(self, valid_image_bytes, storage_requests):
+        """
+        GIVEN: Un archivo con extensión no permitida
+        WHEN: Se intenta subir
+        THEN: Debe lanzar ValueError sin contactar al storage
+        """
+        with pytest.raises(ValueError):
+            await ImageService().upload_image(valid_image_bytes, "photo.gif")
+
+        assert storage_requests == []
+
+    # ==================== PRUEBA 3 ====================
+    @pytest.mark.asyncio
+    async def test_upload_does_not_block_event_loop(self, valid_image_bytes, storage_requests):
+        """
+        GIVEN: Una subida en curso
+        WHEN: Otra corrutina necesita el event loop
+        THEN: Debe poder ejecutarse mientras la imagen se procesa
+        """
+        SupabaseStorageBackend._client_loop = asyncio.get_running_loop()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker_task = asyncio.create_task(ticker())
+        await ImageService().upload_image(valid_image_bytes, "photo.png")
+        ticker_task.cancel()
+
+        assert ticks > 1, "El event loop quedó bloqueado durante la subida"
+
+    # ==================== PRUEBA 4 ====================
+    @pytest.mark.asyncio
+    async def test_upload_generates_derivatives(self):
+        """
+        GIVEN: Una foto de 2000x1500
+        WHEN: Se sube con derivados habilitados
+        THEN: Deben guardarse miniatura y vista previa en WebP y JPEG, reducidas y con sus URLs
+        """
+        img = Image.new('RGB', (2000, 1500), color='green')
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG')
+        storage = MemoryStorageBackend()
+        service = ImageService(storage=storage)
+
+        prepared = await service.prepare_image(buffer.getvalue(), "photo.jpg")
+        await service.store_prepared(prepared)
+
+        assert prepared.derivative_formats == "webp,jpeg"
+        for name, max_side in (("thumb", 256), ("preview", 1024)):
+            for fmt, ext in (("webp", "webp"), ("jpeg", "jpg")):
+                key = f"{prepared.content_hash}/{name}.{ext}"
+                derived = Image.open(io.BytesIO(await storage.get(key)))
+                assert derived.format == fmt.upper()
+                assert max(derived.size) == max_side
+
+        urls = service.derivative_urls(prepared.content_hash, prepared.derivative_formats)
+        assert urls["thumbnail_url"] == storage.url(f"{prepared.content_hash}/thumb.jpg")
+        assert urls["image_formats"] == "webp,jpeg"
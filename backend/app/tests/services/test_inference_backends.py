@@ -0,0 +1,32 @@
+"""
+Pruebas unitarias de la selección de backend de inferencia.
+"""
+import sys
+import pytest
+from app.services.inference_backends import build_classifier
+
+
+class TestInferenceBackendsUnit:
+    """Suite de pruebas unitarias para build_classifier"""
+
+    # ==================== PRUEBA 1 ====================
+    def test_unknown_backend_raises(self):
+        """
+        GIVEN: Un AI_INFERENCE_BACKEND inexistente
+        WHEN: Se construye el clasificador
+        THEN: Debe lanzar ValueError indicando las opciones válidas
+        """
+        with pytest.raises(ValueError, match="onnx-int8"):
+            build_classifier("tensorrt", "modelo/falso")
+
+    # ==================== PRUEBA 2 ====================
+    def test_onnx_without_optional_dependency(self, monkeypatch):
+        """
+        GIVEN: optimum[onnxruntime] no instalado
+        WHEN: Se pide el backend ONNX
+        THEN: Debe fallar con un mensaje claro en lugar de un ImportError genérico
+        """
+        monkeypatch.setitem(sys.modules, "optimum.onnxruntime", None)
+
+        with pytest.raises(RuntimeError, match="optimum"):
+            build_classifier("onnx", "modelo/falso")
@@ -0,0 +1,103 @@
+"""
+Pruebas unitarias del planificador de micro-lotes de inferencia.
+Usa un ejecutor de lotes simulado para no depender del modelo real.
+"""
+import pytest
+import asyncio
+from app.services.inference_batcher import InferenceBatcher, InferenceQueueFullError
+
+
+class TestInferenceBatcherUnit:
+    """Suite de pruebas unitarias para InferenceBatcher"""
+
+    @staticmethod
+    def make_runner(calls):
+        """Helper: ejecutor que registra el tamaño de cada lote"""
+        async def run_batch(items):
+            calls.append(len(items))
+            await asyncio.sleep(0.01)
+            return [{"type": f"item-{item}", "confidence": 90.0} for item in items]
+        return run_batch
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_grouped(self):
+        """
+        GIVEN: 8 solicitudes concurrentes y un tamaño de lote de 8
+        WHEN: Se envían al planificador
+        THEN: Deben ejecutarse en una sola pasada y cada una recibir su resultado
+        """
+        calls = []
+        batcher = InferenceBatcher(self.make_runner(calls), max_batch_size=8, max_wait_ms=50)
+
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(8)))
+
+        assert calls == [8]
+        assert [r["type"] for r in results] == [f"item-{i}" for i in range(8)]
+        await batcher.close()
+
+    # ==================== PRUEBA 2 ====================
+    @pytest.mark.asyncio
+    async def test_batch_size_is_bounded(self):
+        """
+        GIVEN: 20 solicitudes concurrentes y un tamaño máximo de 8
+        WHEN: Se procesan
+        THEN: Ningún lote debe superar 8 imágenes
+        """
+        calls = []
+        batcher = InferenceBatcher(self.make_runner(calls), max_batch_size=8, max_wait_ms=50)
+
+        await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+
+        assert sum(calls) == 20
+        assert max(calls) <= 8
+        await batcher.close()
+
+    # ==================== PRUEBA 3 ====================
+    @pytest.mark.asyncio
+    async def test_per_item_errors_are_routed(self):
+        """
+        GIVEN: Un lote donde una imagen es inválida
+        WHEN: El ejecutor devuelve un ValueError en esa posición
+        THEN: Solo esa solicitud debe fallar
+        """
+        async def run_batch(items):
+            return [ValueError("Imagen inválida o corrupta") if item == "bad" else {"type": item}
+                    for item in items]
+
+        batcher = InferenceBatcher(run_batch, max_batch_size=4, max_wait_ms=20)
+
+        results = await asyncio.gather(
+            batcher.submit("ok"), batcher.submit("bad"), return_exceptions=True
+        )
+
+        assert results[0] == {"type": "ok"}
+        assert isinstance(results[1], ValueError)
+        await batcher.close()
+
+    # ==================== PRUEBA 4 ====================
+    @pytest.mark.asyncio
+    async def test_queue_full_raises(self):
+        """
+        GIVEN: Una cola con capacidad 1 y un lote en ejecución
+        WHEN: Llegan más solicitudes de las que caben
+        THEN: Debe lanzar InferenceQueueFullError
+        """
+        release = asyncio.Event()
+
+        async def run_batch(items):
+            await release.wait()
+            return [{"type": "ok"}] * len(items)
+
+        batcher = InferenceBatcher(run_batch, max_batch_size=1, max_wait_ms=0, max_queue_size=1)
+        first = asyncio.create_task(batcher.submit(1))
+        await asyncio.sleep(0.01)  # el worker toma la primera solicitud
+        second = asyncio.create_task(batcher.submit(2))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(InferenceQueueFullError):
+            await batcher.submit(3)
+
+        release.set()
+        await asyncio.gather(first, second)
+        await batcher.close()
@@ -0,0 +1,109 @@
+"""
+Pruebas unitarias del pool de procesos de inferencia.
+Usa tareas simuladas (sin modelo) ejecutadas en procesos reales.
+"""
+import asyncio
+import pytest
+import os
+import time
+from app.services.admission_control import AdmissionController
+from app.services.inference_pool import InferenceProcessPool, InferenceTimeoutError
+
+
+def fake_classify(images):
+    return [{"type": f"item-{image}", "confidence": 90.0, "pid": os.getpid()} for image in images]
+
+
+def crash_once(images):
+    # El primer worker que ve el marcador muere abruptamente; el reintento funciona
+    marker = images[0]
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return ["ok"]
+
+
+def slow_classify(images):
+    time.sleep(2)
+    return images
+
+
+class TestInferenceProcessPoolUnit:
+    """Suite de pruebas unitarias para InferenceProcessPool"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.asyncio
+    async def test_batch_runs_in_worker_process(self):
+        """
+        GIVEN: Un pool con una tarea de clasificación simulada
+        WHEN: Se envía un lote
+        THEN: Debe devolver los resultados calculados en otro proceso
+        """
+        pool = InferenceProcessPool(workers=1, initializer=None, task=fake_classify)
+        try:
+            results = await pool.run_batch([1, 2])
+        finally:
+            pool.close()
+
+        assert [r["type"] for r in results] == ["item-1", "item-2"]
+        assert results[0]["pid"] != os.getpid()
+
+    # ==================== PRUEBA 2 ====================
+    @pytest.mark.asyncio
+    async def test_crashed_worker_is_restarted(self, tmp_path):
+        """
+        GIVEN: Un worker que muere al procesar el lote
+        WHEN: Se envía el lote
+        THEN: El pool debe recrearse y el reintento completar el lote
+        """
+        pool = InferenceProcessPool(workers=1, initializer=None, task=crash_once)
+        try:
+            results = await pool.run_batch([str(tmp_path / "crashed")])
+        finally:
+            pool.close()
+
+        assert results == ["ok"]
+        assert pool.restarts == 1
+
+    # ==================== PRUEBA 3 ====================
+    @pytest.mark.asyncio
+    async def test_deadline_exceeded(self):
+        """
+        GIVEN: Una inferencia que tarda más que el plazo del control de admisión
+        WHEN: Se envía el lote a través del control de admisión
+        THEN: Debe lanzar InferenceTimeoutError sin esperar al worker
+        """
+        pool = InferenceProcessPool(workers=1, initializer=None, task=slow_classify)
+        controller = AdmissionController(max_in_flight=4, max_queue=4, max_wait_s=1, deadline_s=0.3)
+        start = time.perf_counter()
+        try:
+            with pytest.raises(InferenceTimeoutError):
+                await controller.run(lambda: pool.run_batch([1]))
+        finally:
+            pool.close()
+
+        assert time.perf_counter() - start < 1.5
+
+    # ==================== PRUEBA 4 ====================
+    @pytest.mark.asyncio
+    async def test_timed_out_batch_keeps_its_slot_until_done(self):
+        """
+        GIVEN: Un pool con un solo cupo y un lote cuyo plazo vence mientras corre en el worker
+        WHEN: Se envía otro lote
+        THEN: Debe esperar a que el worker termine el primero (el cupo no se libera con el plazo)
+        """
+        pool = InferenceProcessPool(workers=1, max_pending=1, initializer=None, task=slow_classify)
+        try:
+            await pool.warm_up()
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(pool.run_batch([1]), 0.3)
+            assert pool._get_semaphore().locked()
+
+            start = time.perf_counter()
+            assert await pool.run_batch([2]) == [2]
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.close()
+
+        assert elapsed >= 3
+        assert not pool._get_semaphore().locked()
@@ -0,0 +1,142 @@
+"""
+Pruebas unitarias del envejecimiento de prioridades por umbrales de exposición.
+Valida el cálculo de cruces, el heap de reportes programados y que solo se recalculen los vencidos.
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+from sqlalchemy.orm import sessionmaker
+from app.models.report import Report
+from app.services.priority_aging_service import PriorityAgingScheduler, next_threshold
+from app.services.report_service import ReportService
+
+
+def make_report(db, hours_ago: float, now: datetime, **fields):
+    """Helper: reporte activo creado hace hours_ago horas"""
+    values = {"latitude": 6.25, "longitude": -75.56, "image_url": "https://storage.test/a.jpg",
+              "status": "pending", "priority": 1, "waste_type": "glass", "confidence_score": 50.0}
+    values.update(fields)
+    report = Report(created_at=now - timedelta(hours=hours_ago), **values)
+    db.add(report)
+    db.commit()
+    return report
+
+
+def scheduler_for(db, **kwargs):
+    """Helper: programador con sesiones sobre la BD de pruebas"""
+    return PriorityAgingScheduler(session_factory=sessionmaker(bind=db.get_bind()), **kwargs)
+
+
+class TestPriorityAging:
+    """Suite de pruebas para PriorityAgingScheduler"""
+
+    # ==================== PRUEBA 1 ====================
+    def test_next_threshold(self):
+        """
+        GIVEN: Un reporte creado en un momento conocido
+        WHEN: Se pide su próximo cruce desde distintos momentos
+        THEN: Debe retornar 24h, 72h y 168h en orden y None después
+        """
+        created = datetime(2025, 3, 1, 12, 0)  # sin zona horaria, como en SQLite
+        start = created.replace(tzinfo=timezone.utc)
+
+        assert next_threshold(created, start) == start + timedelta(hours=24)
+        assert next_threshold(created, start + timedelta(hours=24)) == start + timedelta(hours=72)
+        assert next_threshold(created, start + timedelta(hours=100)) == start + timedelta(hours=168)
+        assert next_threshold(created, start + timedelta(hours=168)) is None
+
+    # ==================== PRUEBA 2 ====================
+    def test_first_pass_recalculates_and_schedules_recent_reports(self, db_session):
+        """
+        GIVEN: Reportes de 2 horas, 3 días y 30 días de antigüedad
+        WHEN: Corre la primera pasada
+        THEN: Debe recalcular todos y programar solo los que tienen cruces pendientes
+        """
+        now = datetime.now(timezone.utc)
+        recent = make_report(db_session, 2, now)
+        make_report(db_session, 80, now)
+        old = make_report(db_session, 24 * 30, now)
+        scheduler = scheduler_for(db_session)
+
+        result = scheduler.run_once(now)
+
+        assert result == {"total_checked": 3, "updated": 3}
+        assert scheduler.pending == 2
+        assert scheduler.next_due() == recent.created_at.replace(tzinfo=timezone.utc) + timedelta(hours=24)
+        db_session.refresh(old)
+        assert old.priority == 3
+
+    # ==================== PRUEBA 3 ====================
+    def test_only_due_reports_are_rescored(self, db_session):
+        """
+        GIVEN: Un reporte a punto de cruzar 24h, otro a 12h de cruzar 72h y uno creado después de la primera pasada
+        WHEN: Corre una pasada 2 horas más tarde
+        THEN: Debe recalcular solo el vencido, reprogramarlo en 72h y programar el nuevo
+        """
+        now = datetime.now(timezone.utc)
+        due = make_report(db_session, 23, now)
+        waiting = make_report(db_session, 60, now, waste_type="plastic")
+        scheduler = scheduler_for(db_session)
+        scheduler.run_once(now)
+        created_later = make_report(db_session, 0, now)
+        assert db_session.get(Report, due.id).priority == 2
+
+        later = now + timedelta(hours=2)
+        with patch.object(ReportService, "recalculate_priorities",
+                          wraps=ReportService.recalculate_priorities) as recalculate:
+            result = scheduler.run_once(later)
+
+        recalculate.assert_called_once()
+        assert recalculate.call_args.args[1] == [due.id]
+        assert result == {"total_checked": 1, "updated": 1}
+        db_session.expire_all()
+        assert db_session.get(Report, due.id).priority == 3
+        assert db_session.get(Report, waiting.id).priority == 2
+        scheduled = sorted((report_id, crossing) for crossing, report_id, _ in scheduler._heap)
+        assert scheduled == sorted([
+            (due.id, due.created_at.replace(tzinfo=timezone.utc) + timedelta(hours=72)),
+            (waiting.id, waiting.created_at.replace(tzinfo=timezone.utc) + timedelta(hours=72)),
+            (created_later.id, created_later.created_at.replace(tzinfo=timezone.utc) + timedelta(hours=24)),
+        ])
+
+    # ==================== PRUEBA 4 ====================
+    def test_due_reports_are_rescored_in_batches(self, db_session):
+        """
+        GIVEN: 5 reportes vencidos (uno ya resuelto) y lotes de 2
+        WHEN: Corre la pasada
+        THEN: Debe hacer 3 recálculos y no tocar el reporte resuelto
+        """
+        now = datetime.now(timezone.utc)
+        reports = [make_report(db_session, 23, now) for _ in range(4)]
+        resolved = make_report(db_session, 23, now, status="resolved")
+        scheduler = scheduler_for(db_session, batch_size=2)
+        scheduler.run_once(now)
+
+        with patch.object(ReportService, "recalculate_priorities",
+                          wraps=ReportService.recalculate_priorities) as recalculate:
+            result = scheduler.run_once(now + timedelta(hours=2))
+
+        assert recalculate.call_count == 3
+        assert result == {"total_checked": 4, "updated": 4}
+        db_session.expire_all()
+        assert [db_session.get(Report, r.id).priority for r in reports] == [3, 3, 3, 3]
+        assert db_session.get(Report, resolved.id).priority == 1
+
+    # ==================== PRUEBA 5 ====================
+    def test_only_the_leader_worker_recalculates(self, db_session):
+        """
+        GIVEN: Dos workers con el programador y el LeaderLock en manos del primero
+        WHEN: Ambos ejecutan una pasada
+        THEN: Solo el líder debe hacer el recálculo inicial y llenar su heap
+        """
+        now = datetime.now(timezone.utc)
+        make_report(db_session, 2, now)
+        leader, follower = scheduler_for(db_session), scheduler_for(db_session)
+        follower._leader = Mock(acquire=Mock(return_value=False))
+
+        with patch.object(ReportService, "recalculate_all_priorities",
+                          wraps=ReportService.recalculate_all_priorities) as recalculate:
+            assert follower.run_once(now) is None
+            assert leader.run_once(now) == {"total_checked": 1, "updated": 1}
+
+        recalculate.assert_called_once()
+        assert (follower.pending, leader.pending) == (0, 1)
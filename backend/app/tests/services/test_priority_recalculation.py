@@ -0,0 +1,117 @@
+"""
+Pruebas unitarias del recálculo masivo de prioridades.
+Valida que el UPDATE ... CASE y el recorrido por lotes apliquen las mismas reglas que PriorityService.
+"""
+import itertools
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, func
+from app.models.report import Report
+from app.models.report_counter import ReportCounter
+from app.services.priority_service import PriorityService
+from app.services.report_counter_service import counter_key
+from app.services.report_service import ReportService
+
+WASTE_TYPES = ["battery", "Batteries", " E_Waste ", "glass", "metals", "plastic", "paper", "organic",
+               "trash", "styrofoam", "", None]
+CONFIDENCES = [None, 0.0, 45.0, 60.0, 79.9, 80.0, 97.5]
+AGES_HOURS = [1, 30, 100, 500]
+
+
+def seed_matrix(db):
+    """Helper: un reporte activo por combinación de tipo, confianza y antigüedad, más uno resuelto"""
+    now = datetime.now(timezone.utc)
+    reports = [
+        Report(latitude=6.25, longitude=-75.56, image_url="https://storage.test/a.jpg", status=status,
+               priority=1, waste_type=waste_type, confidence_score=confidence,
+               created_at=now - timedelta(hours=hours))
+        for (waste_type, confidence, hours), status in zip(
+            itertools.product(WASTE_TYPES, CONFIDENCES, AGES_HOURS), itertools.cycle(["pending", "in_progress"])
+        )
+    ]
+    reports.append(Report(latitude=0, longitude=0, image_url="x", status="resolved", priority=1,
+                          waste_type="battery", confidence_score=10.0, created_at=now - timedelta(days=30)))
+    db.add_all(reports)
+    db.commit()
+    return reports
+
+
+def expected_priorities(db) -> dict:
+    """Helper: prioridad calculada en Python para cada reporte activo"""
+    return {
+        report.id: PriorityService.calculate_priority(report.waste_type, report.confidence_score, report.created_at)[0]
+        for report in db.query(Report).filter(Report.status != "resolved")
+    }
+
+
+class TestPriorityRecalculation:
+    """Suite de pruebas para ReportService.recalculate_all_priorities"""
+
+    # ==================== PRUEBA 1 ====================
+    def test_set_based_update_matches_python_rules(self, db_session):
+        """
+        GIVEN: Reportes con todos los tipos (alias, mayúsculas, desconocidos, nulos), confianzas y antigüedades
+        WHEN: Se recalculan las prioridades con el UPDATE ... CASE
+        THEN: Cada prioridad debe ser la de PriorityService.calculate_priority, con un solo UPDATE
+        """
+        reports = seed_matrix(db_session)
+        expected = expected_priorities(db_session)
+        statements = []
+        event.listen(db_session.get_bind(), "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        result = ReportService.recalculate_all_priorities(db_session)
+
+        assert result == {
+            "total_checked": len(reports) - 1,
+            "updated": sum(1 for priority in expected.values() if priority != 1),
+        }
+        assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE REPORTS")]) == 1
+        actual = {report.id: report.priority for report in db_session.query(Report).filter(Report.status != "resolved")}
+        assert actual == expected
+        assert db_session.query(Report).filter(Report.status == "resolved").one().priority == 1
+        assert ReportService.recalculate_all_priorities(db_session)["updated"] == 0
+
+    # ==================== PRUEBA 2 ====================
+    def test_chunked_fallback_gives_same_result(self, db_session):
+        """
+        GIVEN: Los mismos reportes y lotes más pequeños que el total
+        WHEN: Se recalculan con el recorrido por lotes
+        THEN: Debe producir las mismas prioridades y el mismo resultado
+        """
+        reports = seed_matrix(db_session)
+        expected = expected_priorities(db_session)
+
+        result = ReportService._recalculate_priorities_chunked(db_session, chunk_size=7)
+
+        assert result == {
+            "total_checked": len(reports) - 1,
+            "updated": sum(1 for priority in expected.values() if priority != 1),
+        }
+        actual = {report.id: report.priority for report in db_session.query(Report).filter(Report.status != "resolved")}
+        assert actual == expected
+
+    # ==================== PRUEBA 3 ====================
+    def test_set_based_update_keeps_counters_exact(self, db_session):
+        """
+        GIVEN: Contadores al día antes del recálculo
+        WHEN: Se recalculan las prioridades con el UPDATE ... CASE
+        THEN: report_counters y los totales aproximados deben reflejar las nuevas prioridades
+        """
+        seed_matrix(db_session)
+        assert ReportService.count_reports(db_session, count_mode="approximate", priority=3)[0] == 0
+
+        ReportService.recalculate_all_priorities(db_session)
+
+        rows = db_session.query(Report.status, Report.priority, Report.waste_type, func.count(Report.id)).group_by(
+            Report.status, Report.priority, Report.waste_type
+        ).all()
+        actual = {}
+        for status, priority, waste_type, count in rows:
+            key = counter_key(status, priority, waste_type)
+            actual[key] = actual.get(key, 0) + count
+        stored = {(row.status, row.priority, row.waste_type): row.count
+                  for row in db_session.query(ReportCounter) if row.count}
+        assert stored == actual
+        high = db_session.query(func.count(Report.id)).filter(Report.priority == 3).scalar()
+        assert high > 0
+        assert ReportService.count_reports(db_session, count_mode="approximate", priority=3) == (high, "approximate")
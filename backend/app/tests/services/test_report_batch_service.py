@@ -0,0 +1,228 @@
+"""
+Pruebas unitarias de la carga masiva de reportes.
+Valida la clasificación en lote, el INSERT y el UPDATE de puntos agregados y los resultados por entrada.
+"""
+import pytest
+from unittest.mock import patch
+from sqlalchemy import event, text
+from app.models.image_asset import ImageAsset
+from app.models.report import Report
+from app.models.user import User
+from app.services.image_asset_service import ImageAssetService
+from app.services.image_service import PreparedImage
+from app.services.report_batch_service import ReportBatchService
+from app.services.report_service import POINTS_BY_WASTE_TYPE
+
+
+async def fake_prepare(self, file_bytes, original_filename, **kwargs):
+    return PreparedImage(file_bytes, file_bytes.hex().ljust(64, "0")[:64])
+
+
+async def fake_store(self, prepared):
+    return f"https://storage.test/{prepared.object_key}"
+
+
+def item(image, **extra):
+    return {"image": image, "latitude": 6.25, "longitude": -75.56, **extra}
+
+
+class TestReportBatchServiceUnit:
+    """Suite de pruebas unitarias para ReportBatchService"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.parametrize("manifest", [
+        '[{"image": "a.jpg"}, {"image": "b.jpg"}]',
+        '{"image": "a.jpg"}\n\n{"image": "b.jpg"}\n',
+    ])
+    def test_parse_manifest_accepts_json_and_ndjson(self, manifest):
+        """
+        GIVEN: Un manifiesto como arreglo JSON o como NDJSON
+        WHEN: Se parsea
+        THEN: Debe retornar una entrada por reporte
+        """
+        assert [entry["image"] for entry in ReportBatchService.parse_manifest(manifest)] == ["a.jpg", "b.jpg"]
+
+    # ==================== PRUEBA 2 ====================
+    @pytest.mark.asyncio
+    async def test_batch_creates_reports_with_bulk_statements(self, db_session):
+        """
+        GIVEN: Un manifiesto con 3 reportes válidos y 1 sin imagen
+        WHEN: Se ingiere
+        THEN: Debe clasificar en un solo lote, insertar en un solo flush, sumar
+              los puntos con un UPDATE y reportar el error de la entrada inválida
+        """
+        user = User(username="crew", email="crew@test.com", hashed_password="hash", points=5)
+        db_session.add(user)
+        db_session.commit()
+
+        batches = []
+
+        async def fake_batch(self, images_data, decoded=None):
+            batches.append(len(images_data))
+            return [{"type": "plastic", "confidence": 90.0} for _ in images_data]
+
+        statements = []
+        engine = db_session.get_bind()
+
+        def record(conn, cursor, statement, params, context, executemany):
+            statements.append(statement.split()[0:3])
+
+        manifest = [
+            item("a.jpg"),
+            item("b.jpg"),
+            item("c.jpg", ai_classification={"type": "glass", "confidence": 70.0}),
+            item("missing.jpg"),
+        ]
+        files = {"a.jpg": b"\x01", "b.jpg": b"\x02", "c.jpg": b"\x03"}
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            with patch('app.services.report_pipeline.ImageService.prepare_image', fake_prepare), \
+                 patch('app.services.report_pipeline.ImageService.store_prepared', fake_store), \
+                 patch('app.services.ai_service.AIService.classify_waste_batch_async', fake_batch):
+                result, deferred = await ReportBatchService.ingest(db_session, manifest, files, user)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert batches == [2]
+        assert result.created == 3 and result.failed == 1
+        assert [r.status for r in result.results] == ["created", "created", "created", "error"]
+        assert "missing.jpg" in result.results[3].error
+        assert deferred == []
+
+        # Las filas se insertan en un solo flush (en PostgreSQL, un único INSERT ... RETURNING;
+        # SQLite no tiene centinela implícito y emite una por fila) y sin consultas intermedias
+        inserts = [i for i, s in enumerate(statements) if s[:3] == ["INSERT", "INTO", "reports"]]
+        assert len(inserts) == 3 and inserts == list(range(inserts[0], inserts[0] + 3))
+        assert sum(1 for s in statements if s[:2] == ["UPDATE", "users"]) == 1
+
+        expected = 2 * POINTS_BY_WASTE_TYPE["plastic"] + POINTS_BY_WASTE_TYPE["glass"]
+        user = db_session.query(User).filter(User.id == user.id).first()
+        assert user.points == 5 + expected
+        assert db_session.query(Report).filter(Report.user_id == user.id).count() == 3
+
+    # ==================== PRUEBA 3 ====================
+    @pytest.mark.asyncio
+    async def test_only_admin_can_assign_other_users(self, db_session):
+        """
+        GIVEN: Un usuario normal que intenta asignar un reporte a otro usuario
+        WHEN: Se ingiere el manifiesto
+        THEN: Esa entrada debe fallar sin afectar al resto
+        """
+        user = User(username="crew2", email="crew2@test.com", hashed_password="hash", points=0)
+        db_session.add(user)
+        db_session.commit()
+
+        async def fake_batch(self, images_data, decoded=None):
+            return [{"type": "paper", "confidence": 90.0} for _ in images_data]
+
+        with patch('app.services.report_pipeline.ImageService.prepare_image', fake_prepare), \
+             patch('app.services.report_pipeline.ImageService.store_prepared', fake_store), \
+             patch('app.services.ai_service.AIService.classify_waste_batch_async', fake_batch):
+            result, _ = await ReportBatchService.ingest(
+                db_session, [item("a.jpg", user_id=999), item("a.jpg")], {"a.jpg": b"\x01"}, user
+            )
+
+        assert [r.status for r in result.results] == ["error", "created"]
+        assert result.results[1].points_earned == POINTS_BY_WASTE_TYPE["paper"]
+
+    # ==================== PRUEBA 4 ====================
+    @pytest.mark.asyncio
+    async def test_assets_are_saved_in_the_batch_transaction(self, db_session):
+        """
+        GIVEN: Un manifiesto con 3 imágenes nuevas (una repetida) subidas en paralelo
+        WHEN: Se ingiere
+        THEN: No debe haber commits ni rollbacks intermedios: índice y reportes se
+              confirman en un solo commit, con una entrada por imagen distinta
+        """
+        async def fake_batch(self, images_data, decoded=None):
+            return [{"type": "metal", "confidence": 90.0} for _ in images_data]
+
+        commits, rollbacks = [], []
+        engine = db_session.get_bind()
+        event.listen(engine, "commit", commits.append)
+        event.listen(engine, "rollback", rollbacks.append)
+
+        with patch('app.services.report_pipeline.ImageService.prepare_image', fake_prepare), \
+             patch('app.services.report_pipeline.ImageService.store_prepared', fake_store), \
+             patch('app.services.ai_service.AIService.classify_waste_batch_async', fake_batch):
+            result, _ = await ReportBatchService.ingest(
+                db_session, [item("a.jpg"), item("b.jpg"), item("a2.jpg")],
+                {"a.jpg": b"\x01", "b.jpg": b"\x02", "a2.jpg": b"\x01"},
+            )
+
+        assert result.created == 3
+        assert (len(commits), len(rollbacks)) == (1, 0)
+        assets = db_session.query(ImageAsset).order_by(ImageAsset.content_hash).all()
+        assert [(a.content_hash[:2], a.waste_type) for a in assets] == [("01", "metal"), ("02", "metal")]
+
+    # ==================== PRUEBA 5 ====================
+    @pytest.mark.asyncio
+    async def test_asset_registered_in_parallel_does_not_fail_the_batch(self, db_session):
+        """
+        GIVEN: Otra solicitud que registra el mismo hash entre la consulta del índice y el INSERT
+        WHEN: Se ingiere el manifiesto
+        THEN: Solo se descarta esa entrada del índice y los reportes se crean igual
+        """
+        existing = ImageAsset(content_hash="01".ljust(64, "0"), object_key="x", image_url="https://storage.test/x")
+        db_session.add(existing)
+        db_session.commit()
+
+        async def fake_batch(self, images_data, decoded=None):
+            return [{"type": "paper", "confidence": 90.0} for _ in images_data]
+
+        with patch('app.services.report_pipeline.ImageService.prepare_image', fake_prepare), \
+             patch('app.services.report_pipeline.ImageService.store_prepared', fake_store), \
+             patch('app.services.ai_service.AIService.classify_waste_batch_async', fake_batch), \
+             patch.object(ImageAssetService, "get_by_hash", return_value=None):
+            result, _ = await ReportBatchService.ingest(
+                db_session, [item("a.jpg"), item("b.jpg")], {"a.jpg": b"\x01", "b.jpg": b"\x02"},
+            )
+
+        assert result.created == 2
+        assert db_session.query(Report).count() == 2
+        assert db_session.query(ImageAsset).count() == 2
+        assert db_session.get(ImageAsset, existing.id).waste_type is None
+
+    # ==================== PRUEBA 6 ====================
+    @pytest.mark.asyncio
+    async def test_unknown_assigned_user_fails_only_its_entry(self, db_session):
+        """
+        GIVEN: Un administrador que asigna reportes a dos usuarios, uno inexistente en medio
+               del lote, con las llaves foráneas activas
+        WHEN: Se ingiere el manifiesto
+        THEN: Solo esa entrada debe fallar, con una sola consulta de usuarios para todo el lote
+        """
+        db_session.execute(text("PRAGMA foreign_keys = ON"))
+        admin = User(username="admin", email="admin@test.com", hashed_password="hash", role="admin")
+        crew = User(username="crew3", email="crew3@test.com", hashed_password="hash", points=0)
+        db_session.add_all([admin, crew])
+        db_session.commit()
+
+        async def fake_batch(self, images_data, decoded=None):
+            return [{"type": "paper", "confidence": 90.0} for _ in images_data]
+
+        statements = []
+        engine = db_session.get_bind()
+
+        def record(conn, cursor, statement, params, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            with patch('app.services.report_pipeline.ImageService.prepare_image', fake_prepare), \
+                 patch('app.services.report_pipeline.ImageService.store_prepared', fake_store), \
+                 patch('app.services.ai_service.AIService.classify_waste_batch_async', fake_batch):
+                result, _ = await ReportBatchService.ingest(
+                    db_session,
+                    [item("a.jpg", user_id=crew.id), item("b.jpg", user_id=999), item("c.jpg", user_id=crew.id)],
+                    {"a.jpg": b"\x01", "b.jpg": b"\x02", "c.jpg": b"\x03"},
+                    admin,
+                )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert [r.status for r in result.results] == ["created", "error", "created"]
+        assert "999" in result.results[1].error
+        assert sum(1 for s in statements if s.startswith("SELECT") and "users.id IN" in s) == 1
+        assert db_session.query(Report).filter(Report.user_id == crew.id).count() == 2
@@ -0,0 +1,171 @@
+"""
+Pruebas unitarias de la tabla report_counters.
+Valida que cada cambio en reportes la actualice en la misma transacción y que la reconciliación corrija diferencias.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from sqlalchemy import func, text
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from app.core.database import get_db
+from app.core.security import get_current_admin_user
+from app.main import app
+from app.models.report import Report
+from app.models.report_counter import ReportCounter
+from app.models.user import User
+from app.services.report_counter_service import ReportCounterReconciler, ReportCounterService, counter_key
+from app.services.report_service import ReportService
+
+
+def table_counts(db) -> dict:
+    """Helper: contenido de report_counters (sin claves en cero)"""
+    return {
+        (row.status, row.priority, row.waste_type): row.count
+        for row in db.query(ReportCounter).all() if row.count
+    }
+
+
+def actual_counts(db) -> dict:
+    """Helper: conteo real por GROUP BY sobre reports"""
+    rows = db.query(Report.status, Report.priority, Report.waste_type, func.count(Report.id)).group_by(
+        Report.status, Report.priority, Report.waste_type
+    ).all()
+    return {counter_key(status, priority, waste_type): count for status, priority, waste_type, count in rows}
+
+
+def report_data(waste_type=None, confidence=90.0):
+    """Helper: datos de creación de un reporte"""
+    classification = {"type": waste_type, "confidence": confidence} if waste_type else None
+    return SimpleNamespace(
+        latitude=6.25, longitude=-75.56, description=None, image_url="https://storage.test/a.jpg",
+        address=None, manual_classification=None, ai_classification=classification,
+    )
+
+
+class TestReportCounters:
+    """Suite de pruebas para report_counters"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.asyncio
+    async def test_every_change_path_keeps_counters_exact(self, db_session):
+        """
+        GIVEN: Reportes creados con ReportService.create_report
+        WHEN: Se cambian estado, clasificación (servicio y PATCH de admin) y prioridad
+        THEN: report_counters debe coincidir con el conteo real tras cada cambio
+        """
+        admin = User(username="admin", email="admin@test.com", hashed_password="x", role="admin")
+        db_session.add(admin)
+        db_session.commit()
+        with patch.object(ReportService, "_generate_urgent_alert"):
+            reports = [
+                await ReportService.create_report(db_session, report_data(waste_type))
+                for waste_type in ("plastic", "organic", "glass", None)
+            ]
+        assert table_counts(db_session) == actual_counts(db_session)
+
+        ReportService.update_report_status(db_session, reports[0].id, "resolved")
+        ReportService.update_report_classification(db_session, reports[3].id, "metal")
+        assert table_counts(db_session) == actual_counts(db_session)
+
+        app.dependency_overrides[get_db] = lambda: db_session
+        app.dependency_overrides[get_current_admin_user] = lambda: admin
+        try:
+            response = TestClient(app).patch(
+                f"/api/v1/admin/reports/{reports[1].id}/status", json={"status": "in_progress"}
+            )
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            app.dependency_overrides.pop(get_current_admin_user, None)
+        assert response.status_code == 200
+        assert table_counts(db_session) == actual_counts(db_session)
+
+        # Reportes viejos: el recálculo sube su prioridad
+        db_session.query(Report).update({Report.created_at: datetime.now(timezone.utc) - timedelta(days=30)})
+        db_session.commit()
+        ReportService.recalculate_all_priorities(db_session)
+        ReportService.recalculate_priority(db_session, reports[0].id)
+        assert table_counts(db_session) == actual_counts(db_session)
+
+    # ==================== PRUEBA 2 ====================
+    def test_counters_follow_the_transaction(self, db_session):
+        """
+        GIVEN: Un reporte agregado y luego revertido
+        WHEN: Se consulta report_counters dentro y fuera de la transacción
+        THEN: El contador debe verse en la transacción y desaparecer con el rollback
+        """
+        db_session.add(Report(latitude=0, longitude=0, image_url="x", status="pending", priority=2))
+        db_session.flush()
+        assert table_counts(db_session) == {("pending", 2, ""): 1}
+
+        db_session.rollback()
+
+        assert table_counts(db_session) == {}
+
+    # ==================== PRUEBA 3 ====================
+    def test_reconcile_repairs_drift(self, db_session):
+        """
+        GIVEN: report_counters con diferencias (fila alterada, sobrante y faltante)
+        WHEN: Se ejecuta la reconciliación
+        THEN: Debe corregir solo las claves con diferencias
+        """
+        db_session.add_all([
+            Report(latitude=0, longitude=0, image_url="x", status="pending", priority=1, waste_type="plastic"),
+            Report(latitude=0, longitude=0, image_url="x", status="pending", priority=1, waste_type="plastic"),
+            Report(latitude=0, longitude=0, image_url="x", status="resolved", priority=3, waste_type=None),
+        ])
+        db_session.commit()
+        db_session.execute(text("UPDATE report_counters SET count = 7 WHERE waste_type = 'plastic'"))
+        db_session.execute(text("DELETE FROM report_counters WHERE status = 'resolved'"))
+        db_session.execute(text("INSERT INTO report_counters (status, priority, waste_type, count) "
+                                "VALUES ('in_progress', 2, 'glass', 4)"))
+        db_session.commit()
+
+        result = ReportCounterService.reconcile(db_session.connection())
+        db_session.commit()
+
+        assert result == {"checked": 3, "repaired": 3}
+        assert table_counts(db_session) == actual_counts(db_session)
+        assert ReportCounterService.reconcile(db_session.connection())["repaired"] == 0
+
+    # ==================== PRUEBA 4 ====================
+    def test_backfill_fills_empty_table_before_serving(self, db_session):
+        """
+        GIVEN: Reportes insertados sin pasar por el ORM (base anterior a report_counters)
+        WHEN: Se ejecuta la carga inicial de arranque dos veces
+        THEN: La primera debe llenar la tabla y la segunda no hacer nada
+        """
+        db_session.execute(text(
+            "INSERT INTO reports (latitude, longitude, image_url, status, priority, waste_type) "
+            "VALUES (0, 0, 'x', 'pending', 3, 'organic'), (0, 0, 'x', 'pending', 3, 'organic')"
+        ))
+        db_session.commit()
+        engine = db_session.get_bind()
+
+        with engine.begin() as connection:
+            assert ReportCounterService.backfill(connection)["repaired"] == 1
+        with engine.begin() as connection:
+            assert ReportCounterService.backfill(connection) is None
+
+        assert table_counts(db_session) == {("pending", 3, "organic"): 2}
+
+    # ==================== PRUEBA 5 ====================
+    def test_reconciler_runs_only_in_the_leader_worker(self, db_session):
+        """
+        GIVEN: report_counters con una diferencia y dos workers con el reconciliador
+        WHEN: Solo uno obtiene el LeaderLock
+        THEN: Solo ese debe reconciliar
+        """
+        db_session.add(Report(latitude=0, longitude=0, image_url="x", status="pending", priority=1))
+        db_session.commit()
+        db_session.execute(text("UPDATE report_counters SET count = 9"))
+        db_session.commit()
+        factory = sessionmaker(bind=db_session.get_bind())
+        leader, follower = ReportCounterReconciler(session_factory=factory), ReportCounterReconciler(session_factory=factory)
+        follower._leader = Mock(acquire=Mock(return_value=False))
+
+        assert follower.run_once() is None
+        assert table_counts(db_session) == {("pending", 1, ""): 9}
+        assert leader.run_once()["repaired"] == 1
+        assert table_counts(db_session) == {("pending", 1, ""): 1}
@@ -0,0 +1,121 @@
+"""
+Pruebas unitarias de los totales de los listados de reportes.
+Valida los modos exact (COUNT en caché), approximate (contadores mantenidos) y none.
+"""
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+from app.core.database import get_db
+from app.main import app
+from app.models.report import Report
+from app.services.report_service import ReportService
+
+
+def make_report(**fields):
+    """Helper: reporte mínimo"""
+    values = {"latitude": 6.25, "longitude": -75.56, "image_url": "https://storage.test/a.jpg",
+              "status": "pending", "priority": 1, "waste_type": "plastic"}
+    values.update(fields)
+    return Report(**values)
+
+
+class SelectCounter:
+    """Helper: cuenta las consultas SELECT emitidas por el engine"""
+
+    def __init__(self, engine):
+        self.selects = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.selects += 1
+
+
+class TestReportCounts:
+    """Suite de pruebas para los modos de conteo"""
+
+    # ==================== PRUEBA 1 ====================
+    def test_exact_count_is_cached_until_a_write(self, db_session):
+        """
+        GIVEN: Un conteo exacto ya calculado
+        WHEN: Se repite y luego se confirma un reporte nuevo
+        THEN: Debe servirse de la caché hasta que la escritura confirmada la invalide
+        """
+        db_session.add_all([make_report(), make_report(), make_report(status="resolved")])
+        db_session.commit()
+        selects = SelectCounter(db_session.get_bind())
+
+        assert ReportService.count_reports(db_session, "exact", status="pending") == (2, "exact")
+        assert ReportService.count_reports(db_session, "exact", status="pending") == (2, "exact")
+        assert selects.selects == 1
+
+        db_session.add(make_report())
+        db_session.commit()
+
+        assert ReportService.count_reports(db_session, "exact", status="pending") == (3, "exact")
+
+    # ==================== PRUEBA 2 ====================
+    def test_approximate_counters_follow_committed_changes(self, db_session):
+        """
+        GIVEN: Contadores cargados con un solo GROUP BY
+        WHEN: Se crean, actualizan y eliminan reportes (y se revierte una transacción)
+        THEN: Los totales deben seguir los cambios confirmados sin volver a consultar la BD
+        """
+        reports = [make_report(user_id=1), make_report(user_id=1, priority=3), make_report(waste_type="glass")]
+        db_session.add_all(reports)
+        db_session.commit()
+        assert ReportService.count_reports(db_session, "approximate") == (3, "approximate")
+        selects = SelectCounter(db_session.get_bind())
+
+        db_session.add(make_report(user_id=1))
+        db_session.get(Report, reports[0].id).status = "resolved"
+        db_session.delete(db_session.get(Report, reports[2].id))
+        db_session.commit()
+        db_session.add(make_report(user_id=1))
+        db_session.flush()
+        db_session.rollback()
+        before_selects = selects.selects
+
+        assert ReportService.count_reports(db_session, "approximate") == (3, "approximate")
+        assert ReportService.count_reports(db_session, "approximate", status="pending")[0] == 2
+        assert ReportService.count_user_reports(db_session, 1, count_mode="approximate")[0] == 3
+        assert ReportService.count_reports(db_session, "approximate", waste_type="glass")[0] == 0
+        assert selects.selects == before_selects
+
+    # ==================== PRUEBA 3 ====================
+    def test_bulk_update_reloads_counters(self, db_session):
+        """
+        GIVEN: Contadores cargados
+        WHEN: Se ejecuta un UPDATE masivo sobre reportes
+        THEN: Los contadores deben recargarse en la siguiente consulta
+        """
+        db_session.add_all([make_report(), make_report()])
+        db_session.commit()
+        assert ReportService.count_reports(db_session, "approximate", priority=3)[0] == 0
+
+        db_session.query(Report).update({Report.priority: 3}, synchronize_session=False)
+        db_session.commit()
+
+        assert ReportService.count_reports(db_session, "approximate", priority=3)[0] == 2
+
+    # ==================== PRUEBA 4 ====================
+    def test_api_reports_total_kind(self, db_session):
+        """
+        GIVEN: El endpoint de listado
+        WHEN: Se pide con count=none, approximate y un modo inválido
+        THEN: Debe indicar el tipo de total y responder 400 al modo inválido
+        """
+        db_session.add_all([make_report(), make_report()])
+        db_session.commit()
+        app.dependency_overrides[get_db] = lambda: db_session
+        try:
+            client = TestClient(app)
+            none = client.get("/api/v1/reports/", params={"count": "none"}).json()
+            approximate = client.get("/api/v1/reports/", params={"count": "approximate", "skip": 1}).json()
+            invalid = client.get("/api/v1/reports/", params={"count": "todo"})
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+
+        assert none["total"] is None and none["total_kind"] == "none"
+        assert approximate["total"] == 2 and approximate["total_kind"] == "approximate"
+        assert len(approximate["reports"]) == 1
+        assert invalid.status_code == 400
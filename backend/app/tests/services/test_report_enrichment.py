@@ -0,0 +1,266 @@
+"""
+Pruebas unitarias del enriquecimiento diferido de reportes.
+Usa storage en memoria y un pipeline simulado (sin modelo ni red).
+"""
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from sqlalchemy.orm import sessionmaker
+from app.models.report import Report
+from app.models.user import User
+from app.services.report_enrichment import ReportEnrichment
+from app.services.report_pipeline import ReportPipelineResult
+from app.services.report_service import POINTS_BY_WASTE_TYPE, ReportService
+from app.services.storage_service import MemoryStorageBackend
+
+
+async def fake_pipeline(file_bytes, original_filename, ai_result=None, db=None, defer_on_overload=False):
+    return ReportPipelineResult(
+        image_url="memory://storage/normalized.jpg",
+        ai_classification={"type": "plastic", "confidence": 85.0},
+        timings={},
+    )
+
+
+def report_data():
+    return SimpleNamespace(latitude=6.25, longitude=-75.56, address=None,
+                           description=None, manual_classification=None)
+
+
+class TestReportEnrichmentUnit:
+    """Suite de pruebas unitarias para ReportEnrichment"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.asyncio
+    async def test_submit_stores_raw_then_enriches(self, db_session):
+        """
+        GIVEN: El modo de enriquecimiento diferido con un worker
+        WHEN: Se envía un reporte
+        THEN: Debe guardarse de inmediato como "classifying" y luego quedar clasificado con puntos
+        """
+        user = User(username="async", email="async@test.com", hashed_password="hash", points=0)
+        db_session.add(user)
+        db_session.commit()
+        storage = MemoryStorageBackend()
+        enrichment = ReportEnrichment(workers=1, max_queue=10, session_factory=lambda: db_session, storage=storage)
+        enrichment.start()
+
+        with patch('app.services.report_enrichment.ReportPipeline.run', fake_pipeline):
+            report = await enrichment.submit(db_session, b"raw-bytes", "photo.jpg", report_data(), user_id=user.id)
+            report_id = report.id
+            raw_key = report.raw_image_key
+
+            assert report.classification_status == "classifying"
+            assert report.image_url == storage.url(raw_key)
+            assert await storage.exists(raw_key)
+
+            await enrichment.wait_for(report_id, timeout=2)
+        await enrichment.stop()
+
+        report = db_session.query(Report).filter(Report.id == report_id).first()
+        user = db_session.query(User).filter(User.id == user.id).first()
+        assert report.classification_status == "classified"
+        assert report.waste_type == "plastic"
+        assert report.image_url == "memory://storage/normalized.jpg"
+        assert report.raw_image_key is None
+        assert not await storage.exists(raw_key)
+        assert user.points == POINTS_BY_WASTE_TYPE["plastic"]
+
+    # ==================== PRUEBA 2 ====================
+    @pytest.mark.asyncio
+    async def test_recover_requeues_unfinished_reports(self, db_session):
+        """
+        GIVEN: Un reporte que quedó en "classifying" antes de un reinicio
+        WHEN: Arranca el servicio y ejecuta recover
+        THEN: Debe reencolarse desde su imagen original y completarse
+        """
+        storage = MemoryStorageBackend()
+        await storage.put("raw/abc.jpg", b"raw-bytes")
+        report = Report(latitude=6.25, longitude=-75.56, image_url=storage.url("raw/abc.jpg"),
+                        classification_status="classifying", raw_image_key="raw/abc.jpg")
+        db_session.add(report)
+        db_session.commit()
+        report_id = report.id
+
+        enrichment = ReportEnrichment(workers=1, max_queue=10, session_factory=lambda: db_session, storage=storage)
+        enrichment.start()
+        with patch('app.services.report_enrichment.ReportPipeline.run', fake_pipeline):
+            await enrichment.recover()
+            await enrichment.wait_for(report_id, timeout=2)
+        await enrichment.stop()
+
+        report = db_session.query(Report).filter(Report.id == report_id).first()
+        assert report.classification_status == "classified"
+        assert report.waste_type == "plastic"
+
+    # ==================== PRUEBA 3 ====================
+    @pytest.mark.asyncio
+    async def test_concurrent_recovery_enriches_once(self, db_session):
+        """
+        GIVEN: Un reporte en "classifying" y dos workers que ejecutan recover al arrancar
+        WHEN: Ambos lo reencolan
+        THEN: Solo uno debe tomarlo, ejecutar el pipeline y asignar los puntos
+        """
+        user = User(username="twice", email="twice@test.com", hashed_password="hash", points=0)
+        db_session.add(user)
+        storage = MemoryStorageBackend()
+        await storage.put("raw/abc.jpg", b"raw-bytes")
+        report = Report(latitude=6.25, longitude=-75.56, image_url=storage.url("raw/abc.jpg"),
+                        classification_status="classifying", raw_image_key="raw/abc.jpg", user=user)
+        db_session.add(report)
+        db_session.commit()
+        report_id, user_id = report.id, user.id
+
+        runs = []
+
+        async def counting_pipeline(*args, **kwargs):
+            runs.append(report_id)
+            await asyncio.sleep(0.05)
+            return await fake_pipeline(*args, **kwargs)
+
+        workers = [ReportEnrichment(workers=1, max_queue=10, session_factory=lambda: db_session, storage=storage)
+                   for _ in range(2)]
+        with patch('app.services.report_enrichment.ReportPipeline.run', counting_pipeline):
+            for enrichment in workers:
+                enrichment.start()
+                await enrichment.recover()
+            for enrichment in workers:
+                await enrichment.wait_for(report_id, timeout=2)
+                await enrichment.stop()
+
+        assert runs == [report_id]
+        assert db_session.query(Report).filter(Report.id == report_id).first().classification_status == "classified"
+        assert db_session.query(User).filter(User.id == user_id).first().points == POINTS_BY_WASTE_TYPE["plastic"]
+
+    # ==================== PRUEBA 4 ====================
+    @pytest.mark.asyncio
+    async def test_deferred_classification_awards_points_once(self, db_session):
+        """
+        GIVEN: Un reporte pendiente leído por dos sesiones (dos workers)
+        WHEN: Ambas aplican la clasificación diferida
+        THEN: Solo la primera debe completarlo y asignar los puntos
+        """
+        user = User(username="once", email="once@test.com", hashed_password="hash", points=0)
+        db_session.add(user)
+        report = Report(latitude=6.25, longitude=-75.56, image_url="x", classification_status="enriching", user=user)
+        db_session.add(report)
+        db_session.commit()
+        report_id, user_id = report.id, user.id
+        other_worker = sessionmaker(bind=db_session.get_bind())()
+        assert other_worker.get(Report, report_id).classification_status == "enriching"
+
+        classification = {"type": "plastic", "confidence": 85.0}
+        await ReportService.apply_deferred_classification(db_session, report_id, classification)
+        await ReportService.apply_deferred_classification(other_worker, report_id, classification)
+        other_worker.close()
+
+        db_session.expire_all()
+        assert db_session.get(User, user_id).points == POINTS_BY_WASTE_TYPE["plastic"]
+
+    # ==================== PRUEBA 5 ====================
+    @pytest.mark.asyncio
+    async def test_identical_images_keep_separate_raw_objects(self, db_session):
+        """
+        GIVEN: Dos reportes enviados con los mismos bytes de imagen
+        WHEN: Se enriquecen ambos
+        THEN: Cada uno debe tener su propio original y ambos deben quedar clasificados
+        """
+        storage = MemoryStorageBackend()
+        enrichment = ReportEnrichment(workers=1, max_queue=10, session_factory=lambda: db_session, storage=storage)
+        enrichment.start()
+
+        with patch('app.services.report_enrichment.ReportPipeline.run', fake_pipeline):
+            reports = [await enrichment.submit(db_session, b"same-bytes", "photo.jpg", report_data()) for _ in range(2)]
+            report_ids = [report.id for report in reports]
+            assert reports[0].raw_image_key != reports[1].raw_image_key
+            for report_id in report_ids:
+                await enrichment.wait_for(report_id, timeout=2)
+        await enrichment.stop()
+
+        statuses = [db_session.query(Report).filter(Report.id == rid).first().classification_status for rid in report_ids]
+        assert statuses == ["classified", "classified"]
+
+    # ==================== PRUEBA 6 ====================
+    @pytest.mark.asyncio
+    async def test_wait_polls_reports_owned_by_another_worker(self, db_session):
+        """
+        GIVEN: Un reporte que enriquece otro worker (sin aviso de fin en este proceso)
+        WHEN: Se hace long-polling y el otro worker lo termina a los 0.2 s
+        THEN: La espera debe durar hasta que termina, no retornar de inmediato ni agotar el tiempo
+        """
+        report = Report(latitude=6.25, longitude=-75.56, image_url="x", classification_status="enriching")
+        db_session.add(report)
+        db_session.commit()
+        report_id = report.id
+        enrichment = ReportEnrichment(workers=1, max_queue=10, session_factory=lambda: db_session)
+
+        async def finish_elsewhere():
+            await asyncio.sleep(0.2)
+            db_session.query(Report).filter(Report.id == report_id).first().classification_status = "classified"
+            db_session.commit()
+
+        with patch('app.services.report_enrichment.settings.REPORT_ENRICHMENT_POLL_S', 0.05):
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            finisher = asyncio.create_task(finish_elsewhere())
+            await enrichment.wait_for(report_id, timeout=5)
+            elapsed = loop.time() - start
+            await finisher
+
+        assert 0.15 <= elapsed < 2
+
+    # ==================== PRUEBA 7 ====================
+    @pytest.mark.asyncio
+    async def test_full_queue_enriches_in_the_request(self, db_session):
+        """
+        GIVEN: Una cola de enriquecimiento llena
+        WHEN: Se envía otro reporte
+        THEN: Debe enriquecerse en la misma solicitud en lugar de quedar como "failed"
+        """
+        storage = MemoryStorageBackend()
+        enrichment = ReportEnrichment(workers=0, max_queue=1, session_factory=sessionmaker(bind=db_session.get_bind()),
+                                      storage=storage)
+        enrichment.start()
+
+        with patch('app.services.report_enrichment.ReportPipeline.run', fake_pipeline):
+            queued = await enrichment.submit(db_session, b"first", "photo.jpg", report_data())
+            overflow = await enrichment.submit(db_session, b"second", "photo.jpg", report_data())
+        await enrichment.stop()
+
+        assert queued.classification_status == "classifying"
+        assert overflow.classification_status == "classified"
+        assert overflow.raw_image_key is None
+        assert list(storage.objects) == [queued.raw_image_key]
+
+    # ==================== PRUEBA 8 ====================
+    @pytest.mark.asyncio
+    async def test_recover_waits_for_queue_space(self, db_session):
+        """
+        GIVEN: 3 reportes en "classifying" y una cola de un solo cupo
+        WHEN: Se ejecuta recover
+        THEN: Debe retornar sin esperar y reencolarlos todos a medida que hay espacio
+        """
+        storage = MemoryStorageBackend()
+        report_ids = []
+        for index in range(3):
+            key = f"raw/{index}.jpg"
+            await storage.put(key, b"raw-bytes")
+            report = Report(latitude=6.25, longitude=-75.56, image_url=storage.url(key),
+                            classification_status="classifying", raw_image_key=key)
+            db_session.add(report)
+            db_session.commit()
+            report_ids.append(report.id)
+        enrichment = ReportEnrichment(workers=1, max_queue=1, session_factory=sessionmaker(bind=db_session.get_bind()),
+                                      storage=storage)
+        enrichment.start()
+
+        with patch('app.services.report_enrichment.ReportPipeline.run', fake_pipeline):
+            await enrichment.recover()
+            for report_id in report_ids:
+                await enrichment.wait_for(report_id, timeout=2)
+        await enrichment.stop()
+
+        db_session.expire_all()
+        statuses = [db_session.get(Report, report_id).classification_status for report_id in report_ids]
+        assert statuses == ["classified"] * 3
@@ -0,0 +1,120 @@
+"""
+Pruebas unitarias de la paginación por cursor (keyset) de los listados de reportes.
+Valida que recorrer todas las páginas no repita ni omita reportes, incluso con empates en el orden.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from app.core.database import get_db
+from app.main import app
+from app.models.report import Report
+from app.services.report_service import ReportService
+from app.utils.helpers import decode_cursor, encode_cursor
+
+
+def seed_reports(db, count: int, user_id=None):
+    """Helper: reportes con muchos empates de prioridad y fecha"""
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    reports = [
+        Report(
+            latitude=6.25, longitude=-75.56, image_url=f"https://storage.test/{i}.jpg",
+            status="pending", priority=1 + i % 3,
+            created_at=base + timedelta(minutes=i // 4),  # 4 reportes por minuto
+            user_id=user_id,
+        )
+        for i in range(count)
+    ]
+    db.add_all(reports)
+    db.commit()
+    return reports
+
+
+def walk(get_page, limit: int) -> list:
+    """Helper: recorre todas las páginas siguiendo next_cursor"""
+    ids, cursor = [], None
+    while True:
+        page, cursor = get_page(limit, cursor)
+        assert len(page) <= limit
+        ids.extend(report.id for report in page)
+        if cursor is None:
+            return ids
+
+
+class TestReportPagination:
+    """Suite de pruebas para la paginación keyset"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.parametrize("limit", [1, 7, 50])
+    def test_pages_cover_all_reports_in_order(self, db_session, limit):
+        """
+        GIVEN: 45 reportes con prioridades y fechas repetidas
+        WHEN: Se recorren todas las páginas por cursor
+        THEN: Debe obtener cada reporte una sola vez, en el mismo orden que el listado por offset
+        """
+        seed_reports(db_session, 45)
+
+        ids = walk(lambda l, c: ReportService.get_reports_page(db_session, limit=l, cursor=c), limit)
+        expected, total = ReportService.get_reports(db_session, limit=100)
+
+        assert total == 45
+        assert ids == [report.id for report in expected]
+
+    # ==================== PRUEBA 2 ====================
+    def test_user_history_pages_with_filters(self, db_session):
+        """
+        GIVEN: Reportes de dos usuarios
+        WHEN: Se recorre el historial de uno de ellos por cursor
+        THEN: Debe traer solo sus reportes, del más reciente al más antiguo
+        """
+        seed_reports(db_session, 20, user_id=1)
+        seed_reports(db_session, 10, user_id=2)
+
+        ids = walk(lambda l, c: ReportService.get_user_reports_page(db_session, user_id=1, limit=l, cursor=c), 6)
+        expected, _ = ReportService.get_user_reports(db_session, user_id=1, limit=100)
+
+        assert len(ids) == len(set(ids)) == 20
+        assert ids == [report.id for report in expected]
+        assert ReportService.count_user_reports(db_session, user_id=1) == (20, "exact")
+
+    # ==================== PRUEBA 3 ====================
+    def test_cursor_round_trip_and_invalid_cursor(self, db_session):
+        """
+        GIVEN: Un cursor codificado y cursores manipulados
+        WHEN: Se decodifican
+        THEN: Debe recuperar los valores o lanzar ValueError
+        """
+        created_at = datetime(2025, 1, 1, 12, 30, 0, 123456)
+        cursor = encode_cursor([3, created_at, 42])
+
+        assert decode_cursor(cursor, [int, datetime, int]) == [3, created_at, 42]
+        for bad in ["no-es-base64!", encode_cursor([1, 2]), encode_cursor(["x", created_at, 1])]:
+            with pytest.raises(ValueError):
+                ReportService.get_reports_page(db_session, limit=10, cursor=bad)
+
+    # ==================== PRUEBA 4 ====================
+    def test_api_follows_next_cursor(self, db_session):
+        """
+        GIVEN: 12 reportes y el endpoint de listado
+        WHEN: Se sigue next_cursor página a página
+        THEN: Debe traer los 12 reportes sin repetir y responder 400 a un cursor inválido
+        """
+        seed_reports(db_session, 12)
+        app.dependency_overrides[get_db] = lambda: db_session
+        try:
+            client = TestClient(app)
+            ids, params = [], {"limit": 5}
+            while True:
+                data = client.get("/api/v1/reports/", params=params).json()
+                assert data["total"] == 12
+                ids.extend(report["id"] for report in data["reports"])
+                if data["next_cursor"] is None:
+                    break
+                params = {"limit": 5, "cursor": data["next_cursor"]}
+
+            invalid = client.get("/api/v1/reports/", params={"cursor": "inválido"})
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+
+        assert sorted(ids) == sorted(report.id for report in db_session.query(Report).all())
+        assert len(ids) == len(set(ids))
+        assert invalid.status_code == 400
@@ -0,0 +1,196 @@
+"""
+Pruebas unitarias del pipeline de creación de reportes.
+Valida que la subida y la clasificación corran en paralelo y se cancelen limpiamente.
+"""
+import pytest
+import asyncio
+import time
+from unittest.mock import patch
+from app.services.image_service import PreparedImage
+from app.services.report_pipeline import ReportPipeline
+
+
+async def fake_prepare(self, file_bytes, original_filename, **kwargs):
+    return PreparedImage(file_bytes, "ab" * 32)
+
+
+class TestReportPipelineUnit:
+    """Suite de pruebas unitarias para ReportPipeline"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.asyncio
+    async def test_stages_run_concurrently(self):
+        """
+        GIVEN: Una subida de 0.2s y una clasificación de 0.2s
+        WHEN: Se ejecuta el pipeline
+        THEN: La latencia total debe acercarse a max(0.2, 0.2) y no a la suma
+        """
+        async def fake_upload(self, prepared):
+            await asyncio.sleep(0.2)
+            return "https://storage.test/image.jpg"
+
+        async def fake_classify(self, image_data, **kwargs):
+            await asyncio.sleep(0.2)
+            return {"type": "plastic", "confidence": 90.0}
+
+        with patch('app.services.report_pipeline.ImageService.prepare_image', fake_prepare), \
+             patch('app.services.report_pipeline.ImageService.store_prepared', fake_upload), \
+             patch('app.services.report_pipeline.AIService.classify_waste_async', fake_classify):
+            start = time.perf_counter()
+            result = await ReportPipeline.run(b"bytes", "photo.jpg")
+            elapsed = time.perf_counter() - start
+
+        assert result.image_url == "https://storage.test/image.jpg"
+        assert result.ai_classification["type"] == "plastic"
+        assert elapsed < 0.35, f"Las etapas no corrieron en paralelo: {elapsed:.2f}s"
+        assert {"upload", "classify", "total"} <= set(result.timings)
+        assert "upload;dur=" in result.server_timing_header()
+
+    # ==================== PRUEBA 2 ====================
+    @pytest.mark.asyncio
+    async def test_failure_cancels_other_stage(self):
+        """
+        GIVEN: Una clasificación que falla rápido y una subida lenta
+        WHEN: Se ejecuta el pipeline
+        THEN: Debe propagar el error y cancelar la subida
+        """
+        upload_cancelled = asyncio.Event()
+
+        async def slow_upload(self, prepared):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                upload_cancelled.set()
+                raise
+
+        async def failing_classify(self, image_data, **kwargs):
+            raise ValueError("Imagen inválida o corrupta")
+
+        with patch('app.services.report_pipeline.ImageService.prepare_image', fake_prepare), \
+             patch('app.services.report_pipeline.ImageService.store_prepared', slow_upload), \
+             patch('app.services.report_pipeline.AIService.classify_waste_async', failing_classify):
+            with pytest.raises(ValueError):
+                await ReportPipeline.run(b"bytes", "photo.jpg")
+
+        assert upload_cancelled.is_set()
+
+    # ==================== PRUEBA 3 ====================
+    @pytest.mark.asyncio
+    async def test_client_classification_skips_ai_stage(self):
+        """
+        GIVEN: Una clasificación enviada por el cliente
+        WHEN: Se ejecuta el pipeline
+        THEN: No debe invocar al servicio IA
+        """
+        async def fake_upload(self, prepared):
+            return "https://storage.test/image.jpg"
+
+        async def unexpected_classify(self, image_data, **kwargs):
+            raise AssertionError("No debía clasificar")
+
+        with patch('app.services.report_pipeline.ImageService.prepare_image', fake_prepare), \
+             patch('app.services.report_pipeline.ImageService.store_prepared', fake_upload), \
+             patch('app.services.report_pipeline.AIService.classify_waste_async', unexpected_classify):
+            result = await ReportPipeline.run(b"bytes", "photo.jpg", ai_result={"type": "glass", "confidence": 80})
+
+        assert result.ai_classification == {"type": "glass", "confidence": 80}
+        assert "classify" not in result.timings
+
+    # ==================== PRUEBA 4 ====================
+    @pytest.mark.asyncio
+    async def test_duplicate_image_skips_upload_and_classification(self, db_session):
+        """
+        GIVEN: Una imagen ya subida y clasificada con el modelo actual
+        WHEN: Se envía de nuevo la misma imagen
+        THEN: No debe subirse ni clasificarse otra vez
+        """
+        calls = {"store": 0, "classify": 0}
+
+        async def counting_store(self, prepared):
+            calls["store"] += 1
+            return f"https://storage.test/{prepared.object_key}"
+
+        async def counting_classify(self, image_data, **kwargs):
+            calls["classify"] += 1
+            await asyncio.sleep(0.05)
+            return {"type": "plastic", "confidence": 90.0}
+
+        with patch('app.services.report_pipeline.ImageService.prepare_image', fake_prepare), \
+             patch('app.services.report_pipeline.ImageService.store_prepared', counting_store), \
+             patch('app.services.report_pipeline.AIService.classify_waste_async', counting_classify):
+            first = await ReportPipeline.run(b"bytes", "photo.jpg", db=db_session)
+            second = await ReportPipeline.run(b"bytes", "photo.jpg", db=db_session)
+
+        assert calls["store"] == 1
+        assert calls["classify"] == 1
+        assert first.deduplicated is False and second.deduplicated is True
+        assert second.image_url == first.image_url
+        assert second.ai_classification == {"type": "plastic", "confidence": 90.0}
+
+    # ==================== PRUEBA 5 ====================
+    @pytest.mark.asyncio
+    async def test_overload_defers_classification(self):
+        """
+        GIVEN: Un servicio de clasificación sobrecargado
+        WHEN: Se ejecuta el pipeline con defer_on_overload
+        THEN: La imagen debe subirse y la clasificación quedar diferida
+        """
+        from app.services.admission_control import OverloadedError
+
+        async def fake_upload(self, prepared):
+            return "https://storage.test/image.jpg"
+
+        async def overloaded_classify(self, image_data, **kwargs):
+            raise OverloadedError("cola de espera llena")
+
+        with patch('app.services.report_pipeline.ImageService.prepare_image', fake_prepare), \
+             patch('app.services.report_pipeline.ImageService.store_prepared', fake_upload), \
+             patch('app.services.report_pipeline.AIService.classify_waste_async', overloaded_classify):
+            result = await ReportPipeline.run(b"bytes", "photo.jpg", defer_on_overload=True)
+            with pytest.raises(OverloadedError):
+                await ReportPipeline.run(b"bytes", "photo.jpg")
+
+        assert result.image_url == "https://storage.test/image.jpg"
+        assert result.ai_classification is None
+        assert result.classification_deferred is True
+
+    # ==================== PRUEBA 6 ====================
+    @pytest.mark.asyncio
+    async def test_image_is_decoded_once(self, monkeypatch):
+        """
+        GIVEN: Un reporte sin clasificación del cliente (compresión + inferencia)
+        WHEN: Se ejecuta el pipeline con el servicio IA real (modelo simulado)
+        THEN: PIL debe abrir la imagen una sola vez para todas las etapas
+        """
+        import io
+        from PIL import Image
+        from app.services.ai_service import AIService
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (640, 480), color=(12, 200, 34)).save(buffer, format="JPEG")
+        image_bytes = buffer.getvalue()
+
+        def fake_model(images, **kwargs):
+            assert all(isinstance(img, Image.Image) for img in (images if isinstance(images, list) else [images]))
+            result = [{"label": "plastic", "score": 0.9}]
+            return [result] * len(images) if isinstance(images, list) else result
+
+        monkeypatch.setattr(AIService, "_pipeline", fake_model)
+        monkeypatch.setattr(AIService, "_preprocessor", None)
+
+        opens = []
+        real_open = Image.open
+
+        def counting_open(*args, **kwargs):
+            opens.append(args)
+            return real_open(*args, **kwargs)
+
+        async def fake_upload(self, prepared):
+            return f"https://storage.test/{prepared.object_key}"
+
+        monkeypatch.setattr(Image, "open", counting_open)
+        with patch('app.services.report_pipeline.ImageService.store_prepared', fake_upload):
+            result = await ReportPipeline.run(image_bytes, "photo.jpg")
+
+        assert result.ai_classification == {"type": "plastic", "confidence": 90.0}
+        assert len(opens) == 1, f"La imagen se decodificó {len(opens)} veces"
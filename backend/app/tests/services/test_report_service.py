@@ -296,6 +296,8 @@ class TestReportServiceUnit:
 
         query_mock = Mock()
         query_mock.filter.return_value = query_mock
+        query_mock.order_by.return_value = query_mock
+        query_mock.limit.return_value = query_mock
         query_mock.all.return_value = [report1, report2]
         mock_db.query.return_value = query_mock
 
@@ -319,12 +321,17 @@ class TestReportServiceUnit:
         WHEN: Se consultan las estadísticas
         THEN: Debe retornar conteo por nivel de prioridad
         """
-        # Mock de resultados de query
-        stats_data = [(1, 5), (2, 3), (3, 2)]  # (priority, count)
+        # Mock de la lectura de report_counters: una fila por
+        # (status, priority, waste_type); los resueltos no cuentan como activos
+        stats_data = [
+            ("pending", 1, "plastic", 4),
+            ("in_progress", 1, "glass", 1),
+            ("pending", 2, "paper", 3),
+            ("pending", 3, None, 2),
+            ("resolved", 3, "metal", 9),
+        ]
 
         query_mock = Mock()
-        query_mock.filter.return_value = query_mock
-        query_mock.group_by.return_value = query_mock
         query_mock.all.return_value = stats_data
 
         mock_db.query.return_value = query_mock
@@ -335,4 +342,42 @@ class TestReportServiceUnit:
         # Verificar
         assert stats["Low"] == 5
         assert stats["Medium"] == 3
-        assert stats["High"] == 2
\ No newline at end of file
+        assert stats["High"] == 2
+        assert mock_db.query.call_count == 1
+
+    # ==================== PRUEBA 11: Clasificación Diferida ====================
+
+    @pytest.mark.asyncio
+    async def test_deferred_classification_completes_report(self, db_session):
+        """
+        GIVEN: Un reporte guardado sin clasificación por sobrecarga
+        WHEN: La tarea en segundo plano obtiene la clasificación
+        THEN: Debe completar tipo, prioridad y puntos del usuario
+        """
+        user = User(username="defer", email="defer@test.com", hashed_password="hash", points=0)
+        db_session.add(user)
+        db_session.commit()
+
+        data = Mock()
+        data.latitude, data.longitude = 6.25, -75.56
+        data.description, data.address, data.manual_classification = None, None, None
+        data.image_url = "https://storage.test/image.jpg"
+        data.ai_classification = None
+
+        report = await ReportService.create_report(db_session, data, user_id=user.id)
+        assert report.classification_status == "pending"
+        assert report.waste_type is None
+        assert user.points == 0
+
+        async def fake_classify(self, image_data):
+            return {"type": "plastic", "confidence": 85.0}
+
+        with patch('app.services.ai_service.AIService.classify_waste_async', fake_classify):
+            await ReportService.classify_deferred_report(report.id, b"bytes", session_factory=lambda: db_session)
+
+        # La tarea cierra su sesión: volver a consultar los objetos
+        report = db_session.query(Report).filter(Report.id == report.id).first()
+        user = db_session.query(User).filter(User.id == user.id).first()
+        assert report.classification_status == "classified"
+        assert report.waste_type == "plastic"
+        assert user.points == POINTS_BY_WASTE_TYPE["plastic"]
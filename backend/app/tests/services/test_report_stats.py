@@ -0,0 +1,117 @@
+"""
+Pruebas unitarias de las estadísticas de reportes compartidas por los paneles.
+Valida los desgloses leídos de report_counters, la caché y su invalidación al escribir.
+"""
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+from app.core.database import get_db
+from app.core.security import get_current_admin_user
+from app.main import app
+from app.models.report import Report
+from app.models.user import User
+from app.services.report_stats import ReportStatsService
+
+
+def seed_reports(db):
+    """Helper: reportes en varios estados, prioridades y tipos"""
+    rows = [
+        ("pending", 3, "organic"), ("pending", 3, "organic"), ("pending", 2, "plastic"),
+        ("pending", 1, None), ("in_progress", 3, "glass"), ("in_progress", 1, "plastic"),
+        ("resolved", 3, "organic"), ("resolved", 2, "metal"),
+    ]
+    db.add_all([
+        Report(latitude=6.25, longitude=-75.56, image_url="https://storage.test/a.jpg",
+               status=status, priority=priority, waste_type=waste_type)
+        for status, priority, waste_type in rows
+    ])
+    db.commit()
+
+
+class StatementCounter:
+    """Helper: registra las sentencias SQL emitidas"""
+
+    def __init__(self, engine):
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def reading(self, table: str) -> list:
+        return [s for s in self.statements if f"FROM {table} " in s or s.rstrip().endswith(f"FROM {table}")]
+
+
+class TestReportStats:
+    """Suite de pruebas para ReportStatsService"""
+
+    # ==================== PRUEBA 1 ====================
+    def test_all_dashboards_share_one_counters_read(self, db_session):
+        """
+        GIVEN: Reportes en varios estados y prioridades
+        WHEN: Se piden las estadísticas de admin, de prioridades y de reportes
+        THEN: Las cifras deben ser correctas y salir de una sola lectura de report_counters, sin tocar reports
+        """
+        seed_reports(db_session)
+        admin = User(username="admin", email="admin@test.com", hashed_password="x", role="admin")
+        db_session.add(admin)
+        db_session.commit()
+        counter = StatementCounter(db_session.get_bind())
+        app.dependency_overrides[get_db] = lambda: db_session
+        app.dependency_overrides[get_current_admin_user] = lambda: admin
+        try:
+            client = TestClient(app)
+            admin_stats = client.get("/api/v1/admin/stats").json()
+            priority_stats = client.get("/api/v1/priority/priority-stats").json()
+            report_stats = client.get("/api/v1/reports/stats/priority").json()
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            app.dependency_overrides.pop(get_current_admin_user, None)
+
+        assert admin_stats["total_reports"] == 8
+        assert admin_stats["reports_by_status"] == {"pending": 4, "in_progress": 2, "resolved": 2}
+        assert admin_stats["active_reports_by_priority"] == {"high": 3, "medium": 1, "low": 2}
+        assert admin_stats["active_reports_by_waste_type"] == {
+            "organic": 2, "plastic": 2, "glass": 1, "unclassified": 1
+        }
+        assert priority_stats["pending_reports"] == {
+            "high_priority": 2, "medium_priority": 1, "low_priority": 1, "total": 4
+        }
+        assert report_stats == {"high": 3, "medium": 1, "low": 2, "total": 6}
+        assert len(counter.reading("report_counters")) == 1
+        assert counter.reading("reports") == []
+
+    # ==================== PRUEBA 2 ====================
+    def test_cache_is_invalidated_by_committed_writes(self, db_session):
+        """
+        GIVEN: Estadísticas ya calculadas
+        WHEN: Se repite la consulta, se confirma un cambio y se revierte otro
+        THEN: Debe reutilizar la caché hasta que una escritura confirmada la invalide
+        """
+        seed_reports(db_session)
+        first = ReportStatsService.get(db_session)
+        assert ReportStatsService.get(db_session) is first
+
+        db_session.add(Report(latitude=0, longitude=0, image_url="x", status="pending", priority=3))
+        db_session.flush()
+        db_session.rollback()
+        assert ReportStatsService.get(db_session) is first
+
+        report = db_session.query(Report).filter(Report.status == "pending").first()
+        report.status = "resolved"
+        db_session.commit()
+
+        updated = ReportStatsService.get(db_session)
+        assert updated is not first
+        assert updated.by_status()["resolved"] == 3
+        assert updated.total() == 8
+
+    # ==================== PRUEBA 3 ====================
+    def test_ttl_bounds_the_cache(self, db_session):
+        """
+        GIVEN: Un TTL de 0 segundos
+        WHEN: Se piden las estadísticas dos veces
+        THEN: Debe recalcularlas cada vez
+        """
+        seed_reports(db_session)
+
+        assert ReportStatsService.get(db_session, ttl_seconds=0) is not ReportStatsService.get(db_session, ttl_seconds=0)
@@ -0,0 +1,89 @@
+"""
+Pruebas unitarias de los backends de storage.
+Valida que disco local y memoria cumplan el mismo contrato put/get/url/delete.
+"""
+import pytest
+from app.services.storage_service import LocalStorageBackend, MemoryStorageBackend
+
+
+@pytest.fixture(params=["local", "memory"])
+def storage(request, tmp_path):
+    """Fixture: Cada prueba corre contra ambos backends"""
+    if request.param == "local":
+        return LocalStorageBackend(root_dir=str(tmp_path), public_base_url="/uploads")
+    return MemoryStorageBackend()
+
+
+class TestStorageBackends:
+    """Contrato común de StorageBackend"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.asyncio
+    async def test_put_get_delete_roundtrip(self, storage):
+        """
+        GIVEN: Un objeto guardado
+        WHEN: Se lee, se consulta y se elimina
+        THEN: Debe devolver los mismos bytes y luego dejar de existir
+        """
+        await storage.put("reports/a.jpg", b"contenido", content_type="image/jpeg")
+
+        assert await storage.exists("reports/a.jpg")
+        assert await storage.get("reports/a.jpg") == b"contenido"
+        assert storage.url("reports/a.jpg").endswith("/reports/a.jpg")
+
+        await storage.delete("reports/a.jpg")
+        assert not await storage.exists("reports/a.jpg")
+        with pytest.raises(FileNotFoundError):
+            await storage.get("reports/a.jpg")
+
+    # ==================== PRUEBA 2 ====================
+    @pytest.mark.asyncio
+    async def test_streaming_put_and_read(self, storage):
+        """
+        GIVEN: Un objeto enviado en fragmentos
+        WHEN: Se lee en fragmentos pequeños
+        THEN: El contenido reconstruido debe ser idéntico
+        """
+        payload = bytes(range(256)) * 100
+
+        async def chunks():
+            for start in range(0, len(payload), 1000):
+                yield payload[start:start + 1000]
+
+        await storage.put_stream("rewards/b.bin", chunks())
+        received = [chunk async for chunk in storage.stream("rewards/b.bin", chunk_size=4096)]
+
+        assert b"".join(received) == payload
+        assert max(len(c) for c in received) <= 4096
+
+    # ==================== PRUEBA 3 ====================
+    @pytest.mark.asyncio
+    async def test_local_backend_rejects_path_traversal(self, tmp_path):
+        """
+        GIVEN: Una clave que intenta salir del directorio raíz
+        WHEN: Se intenta guardar
+        THEN: Debe lanzar ValueError
+        """
+        storage = LocalStorageBackend(root_dir=str(tmp_path / "root"))
+
+        with pytest.raises(ValueError):
+            await storage.put("../fuera.txt", b"x")
+
+    # ==================== PRUEBA 4 ====================
+    @pytest.mark.asyncio
+    async def test_local_stream_failure_removes_temp_file(self, tmp_path):
+        """
+        GIVEN: Un stream que falla después del primer fragmento
+        WHEN: Se guarda con put_stream en disco local
+        THEN: Debe propagar el error sin dejar el archivo temporal ni el destino
+        """
+        storage = LocalStorageBackend(root_dir=str(tmp_path))
+
+        async def chunks():
+            yield b"parcial"
+            raise ConnectionError("cliente desconectado")
+
+        with pytest.raises(ConnectionError):
+            await storage.put_stream("rewards/a.jpg", chunks())
+
+        assert list((tmp_path / "rewards").iterdir()) == []
@@ -0,0 +1,135 @@
+"""
+Pruebas unitarias de la lectura por fragmentos de imágenes subidas.
+"""
+import io
+import pytest
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+from PIL import Image
+from app.main import app
+from app.utils.validators import InvalidImageError, UploadTooLargeError, read_image_upload
+
+
+class CountingFile(io.BytesIO):
+    """Helper: archivo que registra cuántos bytes se leyeron"""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def jpeg_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), color='green').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class TestReadImageUploadUnit:
+    """Suite de pruebas unitarias para read_image_upload"""
+
+    # ==================== PRUEBA 1 ====================
+    @pytest.mark.asyncio
+    async def test_valid_image_is_read_completely(self):
+        """
+        GIVEN: Un JPEG válido
+        WHEN: Se lee por fragmentos pequeños
+        THEN: Debe retornar exactamente los bytes subidos
+        """
+        data = jpeg_bytes()
+        upload = UploadFile(io.BytesIO(data), filename="foto.JPG")
+
+        assert await read_image_upload(upload, chunk_size=256) == data
+
+    # ==================== PRUEBA 2 ====================
+    @pytest.mark.asyncio
+    async def test_oversized_stream_aborts_early(self):
+        """
+        GIVEN: Un archivo de 3MB de tamaño desconocido y un límite de 1MB
+        WHEN: Se lee
+        THEN: Debe lanzar UploadTooLargeError sin leer más de límite + un fragmento
+        """
+        source = CountingFile(b"\xff\xd8\xff" + b"\x00" * (3 * 1024 * 1024))
+        upload = UploadFile(source, filename="foto.jpg")
+
+        with pytest.raises(UploadTooLargeError):
+            await read_image_upload(upload, max_size_mb=1, chunk_size=64 * 1024)
+
+        assert source.bytes_read <= 1024 * 1024 + 64 * 1024
+
+    # ==================== PRUEBA 3 ====================
+    @pytest.mark.asyncio
+    async def test_known_size_rejected_without_reading(self):
+        """
+        GIVEN: Un archivo cuyo tamaño declarado supera el límite
+        WHEN: Se lee
+        THEN: Debe rechazarse sin leer ningún byte
+        """
+        source = CountingFile(b"\xff\xd8\xff" + b"\x00" * (2 * 1024 * 1024))
+        upload = UploadFile(source, filename="foto.jpg", size=len(source.getvalue()))
+
+        with pytest.raises(UploadTooLargeError):
+            await read_image_upload(upload, max_size_mb=1)
+
+        assert source.bytes_read == 0
+
+    # ==================== PRUEBA 4 ====================
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("filename,data", [
+        ("foto.jpg", b"not an image at all"),
+        ("foto.gif", b"GIF89a" + b"\x00" * 32),
+        ("foto.jpg", b""),
+        ("foto", jpeg_bytes()),
+    ])
+    async def test_rejects_invalid_content_or_extension(self, filename, data):
+        """
+        GIVEN: Contenido que no es JPEG/PNG/WebP, extensión no permitida o archivo vacío
+        WHEN: Se lee
+        THEN: Debe lanzar InvalidImageError
+        """
+        upload = UploadFile(io.BytesIO(data), filename=filename)
+
+        with pytest.raises(InvalidImageError):
+            await read_image_upload(upload)
+
+    # ==================== PRUEBA 5 ====================
+    def test_api_rejects_large_body_with_413(self):
+        """
+        GIVEN: Una subida multipart mayor a IMAGE_MAX_SIZE_MB
+        WHEN: Se envía a POST /api/v1/reports/
+        THEN: Debe responder 413 antes de procesar el formulario
+        """
+        client = TestClient(app)
+        big = b"\xff\xd8\xff" + b"\x00" * (6 * 1024 * 1024)
+
+        response = client.post(
+            "/api/v1/reports/",
+            data={"latitude": "6.25", "longitude": "-75.56"},
+            files={"image": ("foto.jpg", big, "image/jpeg")},
+        )
+
+        assert response.status_code == 413
+
+    # ==================== PRUEBA 6 ====================
+    def test_413_response_has_cors_headers(self):
+        """
+        GIVEN: Una subida demasiado grande desde un frontend en otro origen
+        WHEN: Se envía a POST /api/v1/reports/
+        THEN: El 413 debe llevar los headers CORS para que el navegador lo entregue al frontend
+        """
+        client = TestClient(app)
+        big = b"\xff\xd8\xff" + b"\x00" * (6 * 1024 * 1024)
+
+        response = client.post(
+            "/api/v1/reports/",
+            data={"latitude": "6.25", "longitude": "-75.56"},
+            files={"image": ("foto.jpg", big, "image/jpeg")},
+            headers={"Origin": "https://app.zerbin.test"},
+        )
+
+        assert response.status_code == 413
+        assert "access-control-allow-origin" in response.headers
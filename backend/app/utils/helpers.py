@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+# Formatos de imagen derivados en orden de preferencia (mejor compresión primero)
+IMAGE_FORMAT_PREFERENCE = ("avif", "webp", "jpeg")
+IMAGE_FORMAT_EXTENSIONS = {"avif": "avif", "webp": "webp", "jpeg": "jpg"}
+
+
+def negotiate_image_format(accept_header: Optional[str], available: Optional[str]) -> str:
+    """
+    Elige el formato de los derivados según el header Accept del cliente.
+
+    Args:
+        accept_header: Valor del header Accept (p. ej. "image/avif,image/webp,*/*")
+        available: Formatos generados para la imagen, separados por coma ("webp,jpeg")
+
+    Returns:
+        El formato preferido que el cliente acepta; "jpeg" como respaldo.
+    """
+    accept = (accept_header or "").lower()
+    formats = set((available or "").split(","))
+    for fmt in IMAGE_FORMAT_PREFERENCE[:-1]:
+        if fmt in formats and f"image/{fmt}" in accept:
+            return fmt
+    return "jpeg"
+
+
+def image_url_for_format(url: Optional[str], fmt: str) -> Optional[str]:
+    """Cambia la extensión .jpg de la URL de un derivado por la del formato indicado."""
+    if not url or fmt == "jpeg" or not url.endswith(".jpg"):
+        return url
+    return f"{url[:-len('.jpg')]}.{IMAGE_FORMAT_EXTENSIONS[fmt]}"
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Codifica los valores de orden de la última fila de una página como un
+    cursor opaco (base64 URL-safe de un arreglo JSON; fechas en ISO 8601).
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: list) -> list:
+    """
+    Decodifica un cursor de encode_cursor convirtiendo cada valor al tipo
+    esperado (int, datetime, ...). Lanza ValueError si el cursor no es válido
+    para ese orden.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError
+        return [datetime.fromisoformat(v) if t is datetime else t(v) for v, t in zip(payload, types)]
+    except (ValueError, TypeError):
+        raise ValueError("Cursor de paginación inválido") from None
@@ -0,0 +1,81 @@
+import io
+from typing import Optional
+from starlette.datastructures import UploadFile
+from app.core.config import settings
+
+# Bytes necesarios para reconocer la firma (magic bytes) de los formatos aceptados
+IMAGE_SIGNATURE_BYTES = 12
+
+
+class UploadTooLargeError(ValueError):
+    """El archivo subido supera IMAGE_MAX_SIZE_MB (HTTP 413)."""
+
+
+class InvalidImageError(ValueError):
+    """El archivo subido no es una imagen permitida (HTTP 400)."""
+
+
+def detect_image_format(header: bytes) -> Optional[str]:
+    """Identifica el formato por sus primeros bytes; None si no es JPEG, PNG ni WebP."""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def validate_image_filename(filename: Optional[str]) -> str:
+    """Valida la extensión contra IMAGE_ALLOWED_EXTENSIONS y la retorna (sin punto)."""
+    ext = (filename or "").rsplit(".", 1)[-1].lower() if "." in (filename or "") else ""
+    if f".{ext}" not in settings.IMAGE_ALLOWED_EXTENSIONS:
+        raise InvalidImageError(f"Extensión de imagen no permitida: .{ext}")
+    return ext
+
+
+async def read_image_upload(
+    upload: UploadFile,
+    max_size_mb: int = settings.IMAGE_MAX_SIZE_MB,
+    chunk_size: int = settings.UPLOAD_CHUNK_SIZE_KB * 1024,
+) -> bytes:
+    """
+    Lee una imagen subida por fragmentos validándola mientras llega.
+
+    - La extensión se valida antes de leer nada.
+    - Si el tamaño ya es conocido (`upload.size`) y supera el límite, se
+      rechaza sin leer el contenido.
+    - Los magic bytes se validan con el primer fragmento.
+    - La lectura se corta en cuanto se supera el límite, así el buffer de la
+      solicitud nunca pasa de `max_size_mb` + un fragmento.
+
+    Raises:
+        InvalidImageError: extensión o contenido no permitidos, o archivo vacío
+        UploadTooLargeError: el archivo supera `max_size_mb`
+    """
+    validate_image_filename(upload.filename)
+    max_bytes = max_size_mb * 1024 * 1024
+    too_large = f"La imagen supera el tamaño máximo de {max_size_mb}MB"
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLargeError(too_large)
+
+    buffer = io.BytesIO()
+    checked = False
+    while chunk := await upload.read(chunk_size):
+        buffer.write(chunk)
+        if buffer.tell() > max_bytes:
+            raise UploadTooLargeError(too_large)
+        if not checked and buffer.tell() >= IMAGE_SIGNATURE_BYTES:
+            _check_signature(buffer.getvalue()[:IMAGE_SIGNATURE_BYTES])
+            checked = True
+
+    if buffer.tell() == 0:
+        raise InvalidImageError("El archivo está vacío")
+    if not checked:
+        _check_signature(buffer.getvalue())
+    return buffer.getvalue()
+
+
+def _check_signature(header: bytes):
+    if detect_image_format(header) is None:
+        raise InvalidImageError("El archivo no es una imagen JPEG, PNG o WebP válida")
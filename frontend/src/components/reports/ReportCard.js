@@ -74,7 +74,7 @@ export default function ReportCard({ report, onPress }) {
         <View style={styles.imageContainer}>
           {report.image_url ? (
             <Image 
-              source={{ uri: report.image_url }} 
+              source={{ uri: report.thumbnail_url || report.image_url }} 
               style={styles.image}
               resizeMode="cover"
             />
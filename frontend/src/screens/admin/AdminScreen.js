@@ -144,7 +144,7 @@ export function AdminScreen({ navigation }) {
   const renderReportItem = ({ item }) => (
     <View style={styles.reportCard}>
       <View style={styles.reportHeader}>
-        <Image source={{ uri: item.image_url }} style={styles.reportImage} />
+        <Image source={{ uri: item.thumbnail_url || item.image_url }} style={styles.reportImage} />
         <View style={styles.reportInfo}>
           <Text style={styles.reportWasteType}>{item.waste_type || 'Residuo'}</Text>
           <Text style={styles.reportUser}>Usuario: {item.username}</Text>